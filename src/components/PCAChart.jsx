@@ -2,7 +2,6 @@ import React, { useEffect, useState } from "react";
 import {
   ScatterChart, Scatter, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer
 } from "recharts";
-import Papa from "papaparse";
 import { Box, TextField, Autocomplete } from "@mui/material";
 
 const clusterColors = {
@@ -12,10 +11,13 @@ const clusterColors = {
   "At-Risk Customers": "#D32F2F",
 };
 
+// Colours for segments beyond the four standard ones
+const fallbackColors = ["#9C27B0", "#00BCD4", "#CDDC39", "#795548", "#E91E63", "#607D8B"];
+
 const CustomTooltip = ({ active, payload, selectedCustomer }) => {
   if (!payload || payload.length === 0) return null;
 
-  const { CustomerID, Segment, PCA1, PCA2 } = payload[0].payload;
+  const { CustomerID, Segment, PCA1, PCA2, weight } = payload[0].payload;
 
   return (
     <div
@@ -32,7 +34,7 @@ const CustomTooltip = ({ active, payload, selectedCustomer }) => {
       }}
     >
       <p style={{ margin: 0, fontSize: "18px", color: "#000" }}>
-        <strong>Customer ID: {CustomerID}</strong>
+        <strong>{CustomerID ? `Customer ID: ${CustomerID}` : `${weight} customers`}</strong>
       </p>
       <p style={{ margin: "8px 0", color: "#333" }}>Segment: {Segment}</p>
       <p style={{ margin: 0, fontSize: "14px", color: "#666" }}>
@@ -44,32 +46,32 @@ const CustomTooltip = ({ active, payload, selectedCustomer }) => {
 
 const PCAChart = () => {
   const [data, setData] = useState([]);
+  const [segments, setSegments] = useState([]);
   const [selectedCustomer, setSelectedCustomer] = useState(null);
   const [hoveredData, setHoveredData] = useState(null);
   const [inputValue, setInputValue] = useState("");
 
   useEffect(() => {
-    fetch("/data/customer_segments.csv")
-      .then((response) => response.text())
-      .then((csvText) => {
-        Papa.parse(csvText, {
-          header: true,
-          dynamicTyping: true,
-          complete: (result) => {
-            if (!result.data || result.data.length === 0) return;
+    // Columnar payload from pca.py: one entry per segment, large segments pre-binned
+    fetch("/data/customer_segments_chart.json")
+      .then((response) => response.json())
+      .then((payload) => {
+        if (!payload.segments || payload.segments.length === 0) return;
 
-            const formattedData = result.data
-              .filter(d => d.customer_id)
-              .map(d => ({
-                ...d,
-                CustomerID: d.customer_id.toString(),
-                Segment: d.Segment,
-                PCA1: parseFloat(d.PCA1) || 0,
-                PCA2: parseFloat(d.PCA2) || 0,
-              }));
-            setData(formattedData);
-          },
-        });
+        const formattedData = payload.segments.flatMap(s =>
+          s.x.map((x, i) => ({
+            CustomerID: s.binned ? null : s.customer_id[i],
+            Segment: s.segment,
+            PCA1: x,
+            PCA2: s.y[i],
+            weight: s.binned ? s.weight[i] : 1,
+          }))
+        );
+        setSegments(payload.segments.map((s, i) => ({
+          name: s.segment,
+          color: clusterColors[s.segment] || s.color || fallbackColors[i % fallbackColors.length],
+        })));
+        setData(formattedData);
       })
       .catch(error => console.error("Error loading customer data:", error));
   }, []);
@@ -77,7 +79,7 @@ const PCAChart = () => {
   // Handle input change for autocomplete and hover
   const handleInputChange = (event, newInputValue) => {
     setInputValue(newInputValue);
-    const foundCustomer = data.find(d => d.CustomerID === newInputValue);
+    const foundCustomer = newInputValue ? data.find(d => d.CustomerID === newInputValue) : null;
     if (foundCustomer) {
       setHoveredData(foundCustomer);
       setSelectedCustomer(newInputValue);
@@ -103,7 +105,7 @@ const PCAChart = () => {
       {/* Customer Search & Dropdown */}
       <Box display="flex" justifyContent="center" mb={4}>
         <Autocomplete
-          options={data.map(d => d.CustomerID)}
+          options={data.filter(d => d.CustomerID).map(d => d.CustomerID)}
           getOptionLabel={(option) => option ? option.toString() : ""}
           onChange={(event, value) => setSelectedCustomer(value)}
           onInputChange={handleInputChange}
@@ -182,12 +184,12 @@ const PCAChart = () => {
           <Tooltip content={<CustomTooltip selectedCustomer={selectedCustomer} />} />
           <Legend wrapperStyle={{ color: "#FFF", fontSize: 14 }} />
           {data.length > 0 &&
-            Object.keys(clusterColors).map((segment, index) => (
+            segments.map((segment, index) => (
               <Scatter
                 key={index}
-                name={segment}
-                data={data.filter(d => d.Segment === segment)}
-                fill={clusterColors[segment]}
+                name={segment.name}
+                data={data.filter(d => d.Segment === segment.name)}
+                fill={segment.color}
                 shape="circle"
                 opacity={0.6}
                 r={5}
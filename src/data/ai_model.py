@@ -1,74 +1,188 @@
-from flask import Flask, request, jsonify
-import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from flask_cors import CORS
-
-app = Flask(__name__)
-CORS(app)  #CORS for Global Implementation
-
-file_path = "/Users/apple/Desktop/Blazebuilders/Deloitte_Round_3/react-app/public/data/indian_retail_data_audi_2030.csv"  
-df = pd.read_csv(file_path)
-df_products = df[['product_name', 'category']].dropna().drop_duplicates()
-
-# TF-IDF Vectorization
-vectorizer = TfidfVectorizer(stop_words='english')
-tfidf_matrix = vectorizer.fit_transform(df_products["product_name"])
-cosine_sim = cosine_similarity(tfidf_matrix, tfidf_matrix)
-
-# Category refinement
-category_refinement = {
-    "Electronics": {
-        "Headphones": ["boAt", "JBL", "Sony", "Bose"],
-        "Televisions": ["TV", "LED", "Smart TV", "OLED"],
-        "Speakers": ["Speaker", "Soundbar", "Bluetooth Speaker"]
-    },
-    "Appliances": {
-        "Kitchen Appliances": ["Microwave", "Blender", "Toaster"],
-        "Home Appliances": ["Washing Machine", "Refrigerator", "Air Conditioner"]
+from flask import Blueprint, request, jsonify
+import os
+import sys
+import json
+import argparse
+from functools import lru_cache
+import numpy as np
+import pyarrow as pa
+import pyarrow.feather as feather
+from data_store import OUTPUT_DIR
+import recommender
+from recommender import ProductResolver, TOP_K
+import basket
+from api import create_app
+
+blueprint = Blueprint('ai_model', __name__)
+
+# Product catalogue with refined sub-categories
+df_products = recommender.load_catalogue()
+
+EXPORT_FILE = os.path.join(OUTPUT_DIR, 'product_recommendations.json')
+MAX_BATCH_SIZE = 10000
+
+# Top-k TF-IDF neighbours per product within its sub_category
+neighbour_index = recommender.load_model(df_products)
+product_names = df_products["product_name"].to_numpy()
+product_keys = np.array([name.lower() for name in product_names])
+product_id_index = {product_id: i for i, product_id in reversed(list(enumerate(df_products["product_id"])))}
+
+# Name lookup (exact -> token prefix -> fuzzy) built once at startup
+resolver = ProductResolver(product_names)
+
+# "Bought together" rules mined from customer baskets (see basket.py)
+basket_index = basket.load_model()
+product_id_names = dict(zip(df_products["product_id"], df_products["product_name"]))
+
+def resolve_product(product_name, resolver):
+    # Returns (row index, None) or (None, error payload)
+    resolution = resolver.resolve(product_name)
+    if not resolution.candidates:
+        return None, {"error": "Product not found in dataset."}
+    if resolution.ambiguous:
+        candidates = [product_names[i] for i, _ in resolution.candidates]
+        return None, {
+            "error": f"Multiple products match '{product_name}'. Did you mean: {', '.join(candidates)}?",
+            "candidates": candidates
+        }
+    return resolution.best, None
+
+def recommendations_for(indices, neighbour_index, num_recommendations=5):
+    # Vectorised neighbour gather for any number of catalogue rows
+    rows = neighbour_index.lookup_many(indices, num_recommendations, product_keys)
+    return [product_names[row].tolist() for row in rows]
+
+def recommend_similar_products(product_name, resolver, neighbour_index, num_recommendations=5):
+    idx, error = resolve_product(product_name, resolver)
+    if error:
+        return error
+
+    recommended_product_names = recommendations_for([idx], neighbour_index, num_recommendations)[0]
+    if not recommended_product_names:
+        return {"error": "No relevant recommendations found."}
+    return {"matched_product": product_names[idx], "recommendations": recommended_product_names}
+
+def recommend_batch(product_names_query, product_ids_query, resolver, neighbour_index, num_recommendations=5):
+    results, resolved = [], []
+    for product_name in product_names_query:
+        idx, error = resolve_product(product_name, resolver)
+        results.append({"query": product_name, **(error or {})})
+        if error is None:
+            resolved.append((len(results) - 1, idx))
+    for product_id in product_ids_query:
+        idx = product_id_index.get(str(product_id).strip())
+        results.append({"query": product_id} if idx is not None else {"query": product_id, "error": "Product not found in dataset."})
+        if idx is not None:
+            resolved.append((len(results) - 1, idx))
+
+    if resolved:
+        positions, indices = zip(*resolved)
+        for position, idx, recommended in zip(
+            positions, indices, recommendations_for(indices, neighbour_index, num_recommendations)
+        ):
+            results[position].update({
+                "matched_product": product_names[idx],
+                "product_id": df_products["product_id"].iat[idx],
+                "recommendations": recommended
+            })
+    return results
+
+@lru_cache(maxsize=4096)
+def bought_together(idx, num_recommendations=5):
+    product_id = df_products["product_id"].iat[idx]
+    rules = basket_index.bought_together(product_id, num_recommendations) or []
+    return {
+        "matched_product": product_names[idx],
+        "product_id": product_id,
+        "basket": basket_index.basket,
+        "recommendations": [
+            {"product_id": other, "product_name": product_id_names.get(other, other),
+             "confidence": confidence, "lift": lift, "support": support}
+            for other, confidence, lift, support in rules
+        ]
     }
-}
-
-def assign_subcategory(product_name, category):
-    if category in category_refinement:
-        for sub_category, keywords in category_refinement[category].items():
-            if any(keyword.lower() in product_name.lower() for keyword in keywords):
-                return sub_category
-    return category
-
-df_products["sub_category"] = df_products.apply(
-    lambda row: assign_subcategory(row["product_name"], row["category"]), axis=1
-)
-
-def recommend_similar_products(product_name, df, cosine_sim, num_recommendations=5):
-    matching_products = df[df["product_name"].str.contains(product_name, case=False, na=False)]
-    if matching_products.empty:
-        return {"error": "Product not found in dataset."}
-
-    idx = matching_products.index[0]
-    similar_products = sorted(list(enumerate(cosine_sim[idx])), key=lambda x: x[1], reverse=True)
-    recommended_product_names = []
-    base_sub_category = df.iloc[idx]["sub_category"]
-
-    for i in similar_products:
-        product = df.iloc[i[0]]["product_name"]
-        product_sub_category = df.iloc[i[0]]["sub_category"]
-        if product_sub_category == base_sub_category and product.lower() != product_name.lower():
-            recommended_product_names.append(product)
-        if len(recommended_product_names) == num_recommendations:
-            break
-
-    return {"recommendations": recommended_product_names} if recommended_product_names else {"error": "No relevant recommendations found."}
-
-@app.route('/api/recommend', methods=['POST'])
+
+def export_recommendations(path, num_recommendations=TOP_K):
+    # Recommendations for the whole catalogue, laid out column-wise for static serving
+    recommended = recommendations_for(np.arange(len(df_products)), neighbour_index, num_recommendations)
+    columns = {
+        "product_id": df_products["product_id"].tolist(),
+        "product_name": df_products["product_name"].tolist(),
+        "sub_category": df_products["sub_category"].tolist(),
+        "recommendations": recommended
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if path.endswith(('.arrow', '.feather')):
+        feather.write_feather(pa.table(columns), path)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(columns, f)
+    return len(recommended)
+
+@blueprint.route('/api/recommend', methods=['POST'])
 def get_recommendations():
     data = request.get_json()
     product_name = data.get('product_name')
     if not product_name:
         return jsonify({"error": "Product name is required"}), 400
     
-    result = recommend_similar_products(product_name, df_products, cosine_sim)
+    result = recommend_similar_products(product_name, resolver, neighbour_index)
     return jsonify(result)
 
+@blueprint.route('/api/bought_together', methods=['POST'])
+def get_bought_together():
+    data = request.get_json(silent=True) or {}
+    product_name, product_id = data.get('product_name'), data.get('product_id')
+    if not product_name and not product_id:
+        return jsonify({"error": "product_name or product_id is required"}), 400
+
+    num_recommendations = data.get('num_recommendations', 5)
+    if not isinstance(num_recommendations, int) or not 1 <= num_recommendations <= basket.TOP_K:
+        return jsonify({"error": f"num_recommendations must be between 1 and {basket.TOP_K}"}), 400
+
+    if product_id:
+        idx = product_id_index.get(str(product_id).strip())
+        if idx is None:
+            return jsonify({"error": "Product not found in dataset."})
+    else:
+        idx, error = resolve_product(product_name, resolver)
+        if error:
+            return jsonify(error)
+
+    result = bought_together(idx, num_recommendations)
+    if not result["recommendations"]:
+        return jsonify({**result, "error": "No products are frequently bought together with this one."})
+    return jsonify(result)
+
+@blueprint.route('/api/recommend_batch', methods=['POST'])
+def get_batch_recommendations():
+    data = request.get_json(silent=True) or {}
+    product_names_query = data.get('product_names') or []
+    product_ids_query = data.get('product_ids') or []
+    if not isinstance(product_names_query, list) or not isinstance(product_ids_query, list):
+        return jsonify({"error": "product_names and product_ids must be lists"}), 400
+    if not product_names_query and not product_ids_query:
+        return jsonify({"error": "product_names or product_ids is required"}), 400
+    if len(product_names_query) + len(product_ids_query) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"At most {MAX_BATCH_SIZE} products per request"}), 400
+
+    num_recommendations = data.get('num_recommendations', 5)
+    if not isinstance(num_recommendations, int) or not 1 <= num_recommendations <= TOP_K:
+        return jsonify({"error": f"num_recommendations must be between 1 and {TOP_K}"}), 400
+
+    results = recommend_batch(product_names_query, product_ids_query, resolver, neighbour_index, num_recommendations)
+    return jsonify({"results": results})
+
+app = create_app([blueprint])
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Product recommender API')
+    parser.add_argument('--export', nargs='?', const=EXPORT_FILE, help='write recommendations for every product and exit')
+    parser.add_argument('--num-recommendations', type=int, default=TOP_K)
+    args = parser.parse_args()
+
+    if args.export:
+        count = export_recommendations(args.export, args.num_recommendations)
+        print(f"✅ Recommendations for {count} products saved to '{args.export}'")
+        sys.exit(0)
     app.run(debug=True, port=5004)
\ No newline at end of file
@@ -0,0 +1,102 @@
+import os
+import gc
+import re
+import argparse
+import importlib
+from flask import Flask
+from flask_cors import CORS
+
+# Consolidated API server. Every service module exposes its routes as a
+# blueprint and this app mounts them in one process, so the transaction store,
+# the registry models and the precomputed response caches are loaded once.
+# Under gunicorn the app is built in the master before forking and the workers
+# share it copy-on-write. The old per-service ports are all bound, so existing
+# frontend URLs keep working. Also runnable as:
+#   gunicorn --preload -w 4 -k gthread --threads 4 -b 0.0.0.0:5001 'api:load_app()'
+
+# Service modules mounted by default, with the port each one used to run on
+SERVICES = {
+    'clv': 5000,
+    'forecast': 5001,
+    'filter_data': 5002,
+    'ai_model': 5004,
+    'geography': 5008,
+    'customer_segments': 5010,
+}
+
+# Blueprint -> allowed CORS origins (any origin when not listed)
+CORS_ORIGINS = {'clv': 'http://localhost:4000'}
+
+WORKERS = max(2, min(8, os.cpu_count() or 1))
+THREADS = 4
+TIMEOUT = 120
+
+
+def create_app(blueprints):
+    app = Flask(__name__)
+    for blueprint in blueprints:
+        app.register_blueprint(blueprint)
+
+    # One CORS policy for the whole app, scoped per blueprint route
+    resources = {}
+    for rule in app.url_map.iter_rules():
+        name = rule.endpoint.rpartition('.')[0]
+        if name in app.blueprints:
+            resources[f'^{re.escape(rule.rule)}$'] = {'origins': CORS_ORIGINS.get(name, '*')}
+    CORS(app, resources=resources)
+    return app
+
+
+def load_app(services=None):
+    # Importing a service module loads its data and models
+    app = create_app([importlib.import_module(name).blueprint for name in services or SERVICES])
+    # Move everything loaded so far out of the collector's reach, so GC passes
+    # in forked workers don't touch (and un-share) the preloaded pages
+    gc.collect()
+    gc.freeze()
+    return app
+
+
+def serve(app, binds, workers=WORKERS, threads=THREADS, timeout=TIMEOUT):
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        host, port = binds[0].rsplit(':', 1)
+        print(f"⚠️ gunicorn is not installed; serving on {binds[0]} with Flask's threaded server")
+        app.run(host=host, port=int(port), threaded=True)
+        return
+
+    options = {
+        'bind': binds,
+        'workers': workers,
+        'worker_class': 'gthread',
+        'threads': threads,
+        'timeout': timeout,
+        'preload_app': True,
+    }
+
+    class Server(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    Server().run()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve every API from one preloaded, multi-worker app')
+    parser.add_argument('--services', nargs='+', choices=list(SERVICES), default=list(SERVICES))
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--ports', type=int, nargs='+', help='ports to bind (default: every service\'s old port)')
+    parser.add_argument('--workers', type=int, default=WORKERS)
+    parser.add_argument('--threads', type=int, default=THREADS)
+    parser.add_argument('--timeout', type=int, default=TIMEOUT, help='seconds before a stuck worker is restarted')
+    args = parser.parse_args()
+
+    app = load_app(args.services)
+    ports = args.ports or sorted({SERVICES[name] for name in args.services})
+    print(f"🚀 Serving {', '.join(args.services)} on port(s) {', '.join(map(str, ports))} with {args.workers} workers")
+    serve(app, [f'{args.host}:{port}' for port in ports], args.workers, args.threads, args.timeout)
@@ -0,0 +1,191 @@
+import os
+import json
+import socket
+import asyncio
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from werkzeug.exceptions import HTTPException
+from werkzeug.test import EnvironBuilder, run_wsgi_app
+import api
+
+# Asyncio serving mode for the consolidated API. An ASGI front end (run under
+# uvicorn) accepts every request on the event loop and hands the Flask work to
+# a pool: CPU-heavy endpoints go to forked worker processes that inherit the
+# preloaded app, everything else to a thread pool, so cheap calls never queue
+# behind expensive ones. Each endpoint has its own concurrency limit and
+# timeout, and identical in-flight requests share one computation.
+
+# endpoint -> (pool, max concurrent requests, timeout in seconds)
+ENDPOINTS = {
+    'clv.get_future_cltv': ('process', 2, 60),
+    'clv.get_cltv_horizons': ('process', 2, 60),
+    'forecast.predict_sales': ('process', 2, 120),
+    'geography.analyze_stores': ('process', 1, 60),
+    'ai_model.get_batch_recommendations': ('process', 2, 60),
+    'customer_segments.assign_segment': ('process', 2, 60),
+}
+DEFAULT_POLICY = ('thread', 16, 10)
+
+PROCESS_WORKERS = max(1, min(4, os.cpu_count() or 1))
+THREAD_WORKERS = 16
+
+# Request headers that can change a response; identical requests are coalesced on these
+VARY_HEADERS = ['accept', 'content-type', 'origin', 'if-none-match', 'if-modified-since']
+
+flask_app = None
+
+
+def call_wsgi(method, path, query_string, headers, body):
+    # Runs one request through the Flask app; buffered, so streamed responses arrive whole
+    builder = EnvironBuilder(path=path, method=method, query_string=query_string, headers=headers, data=body)
+    try:
+        environ = builder.get_environ()
+    finally:
+        builder.close()
+    app_iter, status, response_headers = run_wsgi_app(flask_app, environ, buffered=True)
+    try:
+        payload = b''.join(app_iter)
+    finally:
+        if hasattr(app_iter, 'close'):
+            app_iter.close()
+    return int(status.split(' ', 1)[0]), response_headers.to_wsgi_list(), payload
+
+
+def error_response(status, message):
+    return status, [('Content-Type', 'application/json')], json.dumps({'status': 'error', 'message': message}).encode()
+
+
+class Dispatcher:
+    def __init__(self, app, endpoints=ENDPOINTS, process_workers=PROCESS_WORKERS, thread_workers=THREAD_WORKERS):
+        self.adapter = app.url_map.bind('localhost')
+        self.endpoints = endpoints
+        self.pools = {'thread': ThreadPoolExecutor(max_workers=thread_workers)}
+        if process_workers > 0:
+            # Forked, so workers share the preloaded app copy-on-write; started
+            # eagerly, before the event loop and pool threads exist
+            self.pools['process'] = ProcessPoolExecutor(
+                max_workers=process_workers, mp_context=multiprocessing.get_context('fork')
+            )
+            self.pools['process'].submit(os.getpid).result()
+        self.limits = {}
+        self.in_flight = {}  # coalescing key -> task
+        self.waiters = {}    # coalescing key -> callers waiting on it
+        self.started = set() # keys whose task holds a concurrency slot
+
+    def policy(self, method, path):
+        try:
+            endpoint, _ = self.adapter.match(path, method)
+        except HTTPException:
+            endpoint = None
+        pool, limit, timeout = self.endpoints.get(endpoint, DEFAULT_POLICY)
+        return endpoint, (pool if pool in self.pools else 'thread'), limit, timeout
+
+    async def _run(self, key, endpoint, pool, limit, request):
+        if endpoint not in self.limits:
+            self.limits[endpoint] = asyncio.Semaphore(limit)
+        async with self.limits[endpoint]:
+            self.started.add(key)
+            try:
+                return await asyncio.get_running_loop().run_in_executor(self.pools[pool], call_wsgi, *request)
+            finally:
+                self.started.discard(key)
+
+    async def handle(self, method, path, query_string, headers, body):
+        endpoint, pool, limit, timeout = self.policy(method, path)
+        request = (method, path, query_string, headers, body)
+        lowered = {name.lower(): value for name, value in headers}
+        key = (method, path, query_string, body, tuple(lowered.get(name) for name in VARY_HEADERS))
+
+        task = self.in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._run(key, endpoint, pool, limit, request))
+            self.in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        self.waiters[key] = self.waiters.get(key, 0) + 1
+        try:
+            # Shielded: a timed-out caller leaves the computation running for anyone else waiting on it
+            return await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            return error_response(504, f'Request timed out after {timeout}s')
+        except Exception as e:
+            return error_response(500, f'Internal server error: {type(e).__name__}')
+        finally:
+            self.waiters[key] -= 1
+            if not self.waiters[key]:
+                del self.waiters[key]
+                # Nobody is waiting any more: drop it if it is still queued. Work
+                # already running in a pool can't be interrupted and keeps its slot.
+                if not task.done() and key not in self.started:
+                    task.cancel()
+                    self._forget(key, task)
+
+    def _forget(self, key, task):
+        if self.in_flight.get(key) is task:
+            del self.in_flight[key]
+
+    def shutdown(self):
+        for pool in self.pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def create_asgi_app(dispatcher):
+    async def app(scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while True:
+                message = await receive()
+                if message['type'] == 'lifespan.startup':
+                    await send({'type': 'lifespan.startup.complete'})
+                elif message['type'] == 'lifespan.shutdown':
+                    dispatcher.shutdown()
+                    await send({'type': 'lifespan.shutdown.complete'})
+                    return
+        if scope['type'] != 'http':
+            return
+
+        body, more = b'', True
+        while more:
+            message = await receive()
+            body += message.get('body', b'')
+            more = message.get('more_body', False)
+        headers = tuple((name.decode('latin-1'), value.decode('latin-1')) for name, value in scope['headers'])
+
+        status, response_headers, payload = await dispatcher.handle(
+            scope['method'], scope['path'], scope['query_string'].decode('latin-1'), headers, body
+        )
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in response_headers],
+        })
+        await send({'type': 'http.response.body', 'body': payload})
+
+    return app
+
+
+def load(services=None, process_workers=PROCESS_WORKERS, thread_workers=THREAD_WORKERS):
+    global flask_app
+    flask_app = api.load_app(services)
+    return create_asgi_app(Dispatcher(flask_app, ENDPOINTS, process_workers, thread_workers))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve the consolidated API from an asyncio event loop')
+    parser.add_argument('--services', nargs='+', choices=list(api.SERVICES), default=list(api.SERVICES))
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--ports', type=int, nargs='+', help='ports to bind (default: every service\'s old port)')
+    parser.add_argument('--process-workers', type=int, default=PROCESS_WORKERS,
+                        help='worker processes for CPU-heavy endpoints (0 runs them in threads)')
+    parser.add_argument('--thread-workers', type=int, default=THREAD_WORKERS)
+    args = parser.parse_args()
+
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("❌ The async server needs uvicorn (pip install uvicorn)")
+
+    asgi_app = load(args.services, args.process_workers, args.thread_workers)
+    ports = args.ports or sorted({api.SERVICES[name] for name in args.services})
+    sockets = [socket.create_server((args.host, port)) for port in ports]
+    print(f"🚀 Serving {', '.join(args.services)} asynchronously on port(s) {', '.join(map(str, ports))}")
+    uvicorn.Server(uvicorn.Config(asgi_app, lifespan='on')).run(sockets=sockets)
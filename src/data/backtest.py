@@ -0,0 +1,209 @@
+import os
+import json
+import time
+import argparse
+import warnings
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from statsmodels.tsa.arima.model import ARIMA
+from data_store import OUTPUT_DIR
+from sales_forecast import (
+    load_sales, build_series, fit_ets, predict_ets, fit_hybrid, hybrid_forecast, ARIMA_ORDER,
+)
+
+# Rolling-origin backtests for the sales forecasting models. Each fold trains
+# on everything before its origin and forecasts the next `horizon` points;
+# folds and models run in parallel and every fold records fit and predict
+# wall time next to its errors, so models can be compared on accuracy and cost.
+
+PRECOMPUTED_SALES = os.path.join(OUTPUT_DIR, 'precomputed_sales_data_audi_2028.csv')
+RESULTS_FILE = os.path.join(OUTPUT_DIR, 'forecast_backtest.json')
+
+# frequency -> fold layout and the models evaluated on it
+FREQUENCIES = {
+    'daily': {'horizon': 28, 'folds': 6, 'step': 28, 'min_train': 365, 'season': 7,
+              'models': ['naive', 'ets', 'arima', 'xgb_hybrid']},
+    'yearly': {'horizon': 1, 'folds': 2, 'step': 1, 'min_train': 3, 'season': 1,
+               'models': ['naive', 'arima', 'xgb_hybrid']},
+}
+
+
+def load_daily_sales(path=PRECOMPUTED_SALES):
+    # The daily series precompute_sales.py writes; rebuilt from the store when it hasn't run
+    if os.path.exists(path):
+        sales = pd.read_csv(path, parse_dates=['Date']).set_index('Date')['Sales']
+        return sales.asfreq('D', fill_value=0).astype(np.float64)
+    return build_series(load_sales())['total']
+
+
+def load_series(frequency, daily=None):
+    daily = load_daily_sales() if daily is None else daily
+    if frequency == 'yearly':
+        return daily.groupby(daily.index.year).sum().to_numpy(dtype=np.float64)
+    return daily.to_numpy(dtype=np.float64)
+
+
+# Models: name -> (fit(train, season) -> state, predict(state, horizon) -> array)
+def fit_naive(train, season):
+    return train[-season:]
+
+
+def predict_naive(last_season, horizon):
+    # Repeats the last observed season (the last value for yearly data)
+    return np.resize(last_season, horizon)
+
+
+def fit_arima(train, season):
+    return ARIMA(pd.Series(train), order=ARIMA_ORDER).fit()
+
+
+def predict_arima(arima_fit, horizon):
+    return np.asarray(arima_fit.forecast(steps=horizon))
+
+
+def fit_ets_model(train, season):
+    return fit_ets(train, 'daily' if season == 7 else 'weekly')
+
+
+def predict_ets_model(ets_fit, horizon):
+    return predict_ets(ets_fit, horizon)[0]
+
+
+def fit_hybrid_model(train, season):
+    sales = pd.Series(train)
+    return (sales, *fit_hybrid(sales))
+
+
+def predict_hybrid_model(state, horizon):
+    return np.asarray(hybrid_forecast(*state, horizon))
+
+
+MODELS = {
+    'naive': (fit_naive, predict_naive),
+    'ets': (fit_ets_model, predict_ets_model),
+    'arima': (fit_arima, predict_arima),
+    'xgb_hybrid': (fit_hybrid_model, predict_hybrid_model),
+}
+
+# Fewest training points a model is fitted on: ARIMA loses d points to
+# differencing and needs one more per coefficient; the hybrid adds two lags.
+# Shorter folds are reported as skipped rather than fitted on noise.
+MIN_HISTORY = {
+    'arima': sum(ARIMA_ORDER) + 1,
+    'xgb_hybrid': sum(ARIMA_ORDER) + 3,
+}
+
+
+def rolling_origins(n, horizon, folds, step, min_train):
+    # Training-set lengths, oldest fold first; the last fold ends at the final observation
+    origins = [n - horizon - i * step for i in range(folds)]
+    return sorted(origin for origin in origins if origin >= min_train)
+
+
+def run_fold(frequency, model, values, origin, horizon, season):
+    fit, predict = MODELS[model]
+    result = {'frequency': frequency, 'model': model, 'origin': int(origin), 'horizon': horizon}
+    if origin < MIN_HISTORY.get(model, 1):
+        result['skipped'] = f"insufficient history: {origin} points, needs {MIN_HISTORY[model]}"
+        return result
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            start = time.perf_counter()
+            state = fit(values[:origin], season)
+            fitted = time.perf_counter()
+            predicted = np.asarray(predict(state, horizon), dtype=np.float64)
+            result.update({'fit_seconds': fitted - start, 'predict_seconds': time.perf_counter() - fitted})
+        if len(predicted) != horizon or not np.isfinite(predicted).all():
+            raise ValueError('forecast has missing or non-finite values')
+        result.update({'actual': values[origin:origin + horizon].tolist(), 'predicted': predicted.tolist()})
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def error_metrics(actual, predicted):
+    actual, predicted = np.asarray(actual), np.asarray(predicted)
+    nonzero = actual != 0
+    return {
+        # MAPE skips zero-sales points, where it is undefined
+        'mape': float(np.mean(np.abs((actual[nonzero] - predicted[nonzero]) / actual[nonzero])) * 100) if nonzero.any() else None,
+        'rmse': float(np.sqrt(np.mean((actual - predicted) ** 2))) if len(actual) else None,
+    }
+
+
+def summarise(folds):
+    summary = []
+    for (frequency, model), rows in pd.DataFrame(folds).groupby(['frequency', 'model'], sort=False):
+        failed = rows['error'].notna() if 'error' in rows else pd.Series(False, index=rows.index)
+        skipped = rows['skipped'].notna() if 'skipped' in rows else pd.Series(False, index=rows.index)
+        ok = rows[~failed & ~skipped]
+        entry = {
+            'frequency': frequency, 'model': model, 'folds': len(ok), 'failed': int(failed.sum()), 'skipped': int(skipped.sum())
+        }
+        if len(ok):
+            entry.update(error_metrics(np.concatenate(ok['actual'].tolist()), np.concatenate(ok['predicted'].tolist())))
+            entry.update({
+                'fit_seconds': float(ok['fit_seconds'].mean()),
+                'predict_seconds': float(ok['predict_seconds'].mean()),
+            })
+        summary.append(entry)
+    return summary
+
+
+def run_backtest(frequencies=FREQUENCIES, models=None, workers=1, daily=None):
+    daily = load_daily_sales() if daily is None else daily
+    tasks = []
+    for frequency, config in frequencies.items():
+        values = load_series(frequency, daily)
+        for origin in rolling_origins(len(values), config['horizon'], config['folds'], config['step'], config['min_train']):
+            for model in config['models']:
+                if models is None or model in models:
+                    tasks.append((frequency, model, values, origin, config['horizon'], config['season']))
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            folds = list(pool.map(run_fold, *zip(*tasks)))
+    else:
+        folds = [run_fold(*task) for task in tasks]
+    return summarise(folds), folds
+
+
+def print_summary(summary):
+    print(f"{'frequency':<10}{'model':<12}{'folds':>6}{'failed':>7}{'skipped':>8}{'MAPE %':>10}{'RMSE':>16}{'fit (s)':>10}{'predict (s)':>13}")
+    for row in summary:
+        mape = f"{row['mape']:.2f}" if row.get('mape') is not None else '-'
+        rmse = f"{row['rmse']:.1f}" if row.get('rmse') is not None else '-'
+        fit = f"{row['fit_seconds']:.4f}" if 'fit_seconds' in row else '-'
+        predict = f"{row['predict_seconds']:.4f}" if 'predict_seconds' in row else '-'
+        print(f"{row['frequency']:<10}{row['model']:<12}{row['folds']:>6}{row['failed']:>7}{row['skipped']:>8}{mape:>10}{rmse:>16}{fit:>10}{predict:>13}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rolling-origin backtest of the sales forecasting models')
+    parser.add_argument('--frequencies', nargs='+', choices=list(FREQUENCIES), default=list(FREQUENCIES))
+    parser.add_argument('--models', nargs='+', choices=list(MODELS))
+    parser.add_argument('--folds', type=int, help='override the number of folds per frequency')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--output', default=RESULTS_FILE)
+    args = parser.parse_args()
+
+    frequencies = {
+        frequency: {**FREQUENCIES[frequency], **({'folds': args.folds} if args.folds else {})}
+        for frequency in args.frequencies
+    }
+    start = time.perf_counter()
+    summary, folds = run_backtest(frequencies, args.models, args.workers)
+    print_summary(summary)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'generated_at': pd.Timestamp.now().isoformat(timespec='seconds'),
+            'wall_seconds': time.perf_counter() - start,
+            'config': frequencies,
+            'summary': summary,
+            'folds': folds,
+        }, f, indent=4)
+    print(f"✅ Backtest results saved to '{args.output}'")
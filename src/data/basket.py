@@ -0,0 +1,217 @@
+import os
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import model_registry
+from data_store import load_transactions, RAW_CSV_2030, OUTPUT_DIR
+
+# Market-basket mining for "bought together" recommendations. Baskets are
+# encoded as a sparse binary baskets x products matrix; pair counts come from
+# blocked sparse co-occurrence products (B.T @ B over frequent products only)
+# and larger itemsets are grown Eclat-style by intersecting the basket lists of
+# frequent pairs, so nothing products x products dense is ever materialised.
+# The top-k association rules per product are stored in the model registry.
+
+MODEL_NAME = 'basket'
+MODEL_VERSION = 1
+
+# Basket definition -> grouping column
+BASKETS = {'customer': 'customer_id', 'transaction': 'transaction_id'}
+DEFAULT_BASKET = 'customer'
+MIN_SUPPORT = 0.01       # fraction of baskets an itemset must appear in
+MAX_ITEMSET_SIZE = 3
+TOP_K = 20
+BLOCK_PRODUCTS = 2048    # products per co-occurrence block
+
+ITEMSETS_FILE = os.path.join(OUTPUT_DIR, 'frequent_itemsets.json')
+
+
+def basket_matrix(df, basket=DEFAULT_BASKET):
+    # Binary CSR matrix (one row per basket) and the product id of each column
+    basket_codes, baskets = pd.factorize(df[BASKETS[basket]])
+    product_codes, products = pd.factorize(df['product_id'], sort=True)
+    valid = (basket_codes >= 0) & (product_codes >= 0)
+    matrix = sp.coo_matrix(
+        (np.ones(int(valid.sum()), dtype=np.int32), (basket_codes[valid], product_codes[valid])),
+        shape=(len(baskets), len(products))
+    ).tocsr()
+    matrix.data[:] = 1  # repeat purchases count once per basket
+    return matrix, np.asarray(products)
+
+
+def min_count(n_baskets, min_support):
+    return max(int(np.ceil(min_support * n_baskets)), 1)
+
+
+def pair_counts(matrix, threshold):
+    # (a, b, count) for every ordered pair of distinct products bought together in >= threshold baskets
+    support = np.asarray(matrix.sum(axis=0)).ravel()
+    frequent = np.flatnonzero(support >= threshold)  # a pair is never more frequent than its items
+    sub = matrix[:, frequent].tocsc()
+
+    firsts, seconds, counts = [], [], []
+    for start in range(0, len(frequent), BLOCK_PRODUCTS):
+        block = (sub[:, start:start + BLOCK_PRODUCTS].T @ sub).tocoo()
+        keep = (block.data >= threshold) & (block.row + start != block.col)
+        firsts.append(frequent[block.row[keep] + start])
+        seconds.append(frequent[block.col[keep]])
+        counts.append(block.data[keep])
+    if not firsts:
+        return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.int64)
+    return np.concatenate(firsts), np.concatenate(seconds), np.concatenate(counts).astype(np.int64)
+
+
+def frequent_itemsets(matrix, threshold, max_size=MAX_ITEMSET_SIZE, pairs=None):
+    # [(items, count)] with items as sorted product column tuples, sizes 1..max_size
+    support = np.asarray(matrix.sum(axis=0)).ravel()
+    itemsets = [((int(i),), int(support[i])) for i in np.flatnonzero(support >= threshold)]
+    if max_size < 2:
+        return itemsets
+
+    firsts, seconds, counts = pairs if pairs is not None else pair_counts(matrix, threshold)
+    ordered = firsts < seconds
+    itemsets += [((int(a), int(b)), int(c)) for a, b, c in zip(firsts[ordered], seconds[ordered], counts[ordered])]
+
+    # Basket lists per product, and the frequent partners of each product
+    csc = matrix.tocsc()
+    csc.sort_indices()
+
+    def baskets_of(item):
+        return csc.indices[csc.indptr[item]:csc.indptr[item + 1]]
+
+    partners = {}
+    for a, b in zip(firsts[ordered], seconds[ordered]):
+        partners.setdefault(int(a), []).append(int(b))
+
+    level = [(items, np.intersect1d(baskets_of(items[0]), baskets_of(items[1]), assume_unique=True))
+             for items, _ in itemsets if len(items) == 2]
+    for size in range(3, max_size + 1):
+        next_level = []
+        for items, rows in level:
+            # Apriori pruning: every extension must be a frequent partner of each item
+            candidates = set(partners.get(items[-1], []))
+            for item in items[:-1]:
+                candidates &= set(partners.get(item, []))
+            for item in sorted(candidates):
+                extended = np.intersect1d(rows, baskets_of(item), assume_unique=True)
+                if len(extended) >= threshold:
+                    next_level.append(((*items, item), extended))
+        itemsets += [(items, len(rows)) for items, rows in next_level]
+        level = next_level
+    return itemsets
+
+
+def top_rules(support, pairs, n_baskets, k=TOP_K):
+    # Top-k consequents per antecedent product, by lift then co-occurrence count
+    n = len(support)
+    firsts, seconds, counts = pairs
+    confidence = counts / np.maximum(support[firsts], 1)
+    lift = confidence * n_baskets / np.maximum(support[seconds], 1)
+
+    order = np.lexsort((seconds, -counts, -lift, firsts))
+    firsts, seconds = firsts[order], seconds[order]
+    starts = np.searchsorted(firsts, np.arange(n))
+    rank = np.arange(len(firsts)) - starts[firsts]
+    keep = rank < k
+
+    arrays = {
+        'consequents': np.full((n, k), -1, dtype=np.int32),
+        'confidence': np.zeros((n, k), dtype=np.float64),
+        'lift': np.zeros((n, k), dtype=np.float64),
+        'support': np.zeros((n, k), dtype=np.float64),
+    }
+    at = (firsts[keep], rank[keep])
+    arrays['consequents'][at] = seconds[keep]
+    arrays['confidence'][at] = confidence[order][keep]
+    arrays['lift'][at] = lift[order][keep]
+    arrays['support'][at] = counts[order][keep] / n_baskets
+    return arrays
+
+
+def mine(df, basket=DEFAULT_BASKET, min_support=MIN_SUPPORT, max_size=MAX_ITEMSET_SIZE, k=TOP_K):
+    matrix, products = basket_matrix(df, basket)
+    threshold = min_count(matrix.shape[0], min_support)
+    support = np.asarray(matrix.sum(axis=0)).ravel().astype(np.int64)
+    pairs = pair_counts(matrix, threshold)
+    itemsets = frequent_itemsets(matrix, threshold, max_size, pairs)
+    return {
+        'basket': basket,
+        'n_baskets': matrix.shape[0],
+        'products': products,
+        'product_support': support,
+        # Ragged itemsets, flattened: items[offsets[i]:offsets[i + 1]] bought together in counts[i] baskets
+        'itemset_items': np.array([item for items, _ in itemsets for item in items], dtype=np.int32),
+        'itemset_offsets': np.cumsum([0, *(len(items) for items, _ in itemsets)]).astype(np.int64),
+        'itemset_counts': np.array([count for _, count in itemsets], dtype=np.int64),
+        **top_rules(support, pairs, matrix.shape[0], k),
+    }
+
+
+class BasketIndex:
+    def __init__(self, arrays):
+        self.arrays = arrays
+        self.basket = arrays['basket']
+        self.n_baskets = arrays['n_baskets']
+        self.products = np.asarray(arrays['products'])
+        self.positions = {product_id: i for i, product_id in enumerate(self.products)}
+
+    def bought_together(self, product_id, n=None):
+        # [(product_id, confidence, lift, support)], strongest first; None for unknown products
+        idx = self.positions.get(product_id)
+        if idx is None:
+            return None
+        row = self.arrays['consequents'][idx]
+        valid = np.flatnonzero(row >= 0)[:n]
+        return [
+            (self.products[row[j]], float(self.arrays['confidence'][idx, j]),
+             float(self.arrays['lift'][idx, j]), float(self.arrays['support'][idx, j]))
+            for j in valid
+        ]
+
+    def itemsets(self, min_size=1):
+        offsets, items, counts = self.arrays['itemset_offsets'], self.arrays['itemset_items'], self.arrays['itemset_counts']
+        return [
+            {'items': self.products[items[offsets[i]:offsets[i + 1]]].tolist(), 'count': int(counts[i]),
+             'support': counts[i] / self.n_baskets}
+            for i in range(len(counts)) if offsets[i + 1] - offsets[i] >= min_size
+        ]
+
+
+def load_or_mine(df, basket=DEFAULT_BASKET, min_support=MIN_SUPPORT, max_size=MAX_ITEMSET_SIZE, k=TOP_K, registry_dir=None):
+    # Arrays are memory-mapped from the registry, so worker processes share one copy
+    fp = model_registry.fingerprint(
+        df[[BASKETS[basket], 'product_id']], MODEL_VERSION, basket, min_support, max_size, k
+    )
+    arrays = model_registry.load_or_train(
+        MODEL_NAME, fp, lambda: mine(df, basket, min_support, max_size, k), registry_dir, mmap_mode='r'
+    )
+    return BasketIndex(arrays)
+
+
+def load_model(source=RAW_CSV_2030):
+    # Bought-together rules for the default basket definition, as served by ai_model.py
+    return load_or_mine(load_transactions(source, columns=[BASKETS[DEFAULT_BASKET], 'product_id']))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Mine frequent itemsets and bought-together rules')
+    parser.add_argument('--basket', choices=list(BASKETS), default=DEFAULT_BASKET)
+    parser.add_argument('--min-support', type=float, default=MIN_SUPPORT, help='fraction of baskets')
+    parser.add_argument('--max-size', type=int, default=MAX_ITEMSET_SIZE)
+    parser.add_argument('--output', default=ITEMSETS_FILE)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    df = load_transactions(RAW_CSV_2030, columns=[BASKETS[args.basket], 'product_id'])
+    index = BasketIndex(mine(df, args.basket, args.min_support, args.max_size))
+    itemsets = index.itemsets(min_size=2)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'basket': args.basket, 'baskets': index.n_baskets, 'min_support': args.min_support,
+                   'itemsets': sorted(itemsets, key=lambda itemset: -itemset['count'])}, f, indent=4)
+    print(f"✅ {len(itemsets)} frequent itemsets over {index.n_baskets} baskets saved to '{args.output}' "
+          f"in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,172 @@
+import os
+import json
+import argparse
+import numpy as np
+import pandas as pd
+from data_store import load_transactions, OUTPUT_DIR
+
+# One batch job for every static dashboard artifact. The transactions are
+# loaded once, the grouping keys are factorised once, and all outputs are
+# derived from the same per-day / per-customer / per-product intermediates.
+
+COLUMNS = [
+    'transaction_date', 'customer_id', 'transaction_id', 'product_id', 'product_name', 'category',
+    'total_sales_per_transaction', 'total_profit_per_transaction',
+]
+
+# Years shown in the sales calendar
+SALES_YEARS = [2021, 2022, 2023, 2024]
+
+
+# Conversion rate (%) buckets: (-inf, 8], (8, 25], (25, inf)
+CONVERSION_BINS = [-np.inf, 8, 25, np.inf]
+CONVERSION_LABELS = ['Low Conversion (≤8%)', 'Medium Conversion (8%–25%)', 'High Conversion (>25%)']
+
+
+# Map acc to values
+def categorize_conversion(rates):
+    return pd.cut(pd.Series(rates), CONVERSION_BINS, labels=CONVERSION_LABELS).astype(str).to_numpy()
+
+
+def _values(series):
+    # Money columns are accumulated in float64 regardless of the store dtype
+    return series.to_numpy(dtype=np.float64, na_value=0)
+
+
+def _distinct_pairs(group_codes, value_codes, n_values):
+    # Unique (group, value) code pairs, via a combined int64 key
+    keys = np.unique(group_codes.astype(np.int64) * max(n_values, 1) + value_codes)
+    return keys // max(n_values, 1), keys % max(n_values, 1)
+
+
+def compute_aggregates(df):
+    sales = _values(df['total_sales_per_transaction'])
+    profit = _values(df['total_profit_per_transaction'])
+
+    # Shared grouping keys
+    day_codes, days = pd.factorize(df['transaction_date'].dt.normalize(), sort=True)
+    customer_codes, customers = pd.factorize(df['customer_id'], sort=True)
+    product_codes, products = pd.factorize(df['product_id'], sort=True)
+    transaction_codes, transactions = pd.factorize(df['transaction_id'])
+
+    # Per-day sums
+    daily_sales = np.bincount(day_codes, weights=sales, minlength=len(days))
+    daily_profit = np.bincount(day_codes, weights=profit, minlength=len(days))
+
+    # Per-customer sums and distinct transactions
+    has_customer = customer_codes >= 0
+    customer_sales = np.bincount(customer_codes[has_customer], weights=sales[has_customer], minlength=len(customers))
+    has_transaction = has_customer & (transaction_codes >= 0)
+    txn_customers, _ = _distinct_pairs(customer_codes[has_transaction], transaction_codes[has_transaction], len(transactions))
+    customer_transactions = np.bincount(txn_customers, minlength=len(customers))
+
+    # Per-product distinct customers
+    has_product = (product_codes >= 0) & has_customer
+    pair_products, pair_customers = _distinct_pairs(product_codes[has_product], customer_codes[has_product], len(customers))
+    product_customers = np.bincount(pair_products, minlength=len(products))
+
+    # First seen name/category for each product id
+    codes, first_rows = np.unique(product_codes, return_index=True)
+    product_info = df[['product_name', 'category']].iloc[first_rows[codes >= 0]].astype(str).reset_index(drop=True)
+
+    return {
+        'days': days,
+        'daily_sales': daily_sales,
+        'daily_profit': daily_profit,
+        'sales_is_integral': pd.api.types.is_integer_dtype(df['total_sales_per_transaction']),
+        'customers': customers,
+        'customer_sales': customer_sales,
+        'customer_transactions': customer_transactions,
+        'products': products,
+        'product_info': product_info,
+        'product_customers': product_customers,
+        'product_customer_pairs': (pair_products, pair_customers),
+    }
+
+
+def sales_profit_metrics(agg):
+    return {
+        'total_sales': float(agg['daily_sales'].sum()),
+        'total_profit': float(agg['daily_profit'].sum()),
+    }
+
+
+def average_basket_size(agg):
+    bought = agg['customer_transactions'] > 0
+    aov_per_customer = agg['customer_sales'][bought] / agg['customer_transactions'][bought]
+    return {'average_basket_size': float(aov_per_customer.mean())}
+
+
+def product_conversion_rates(agg):
+    num_customers = len(agg['customers'])
+    conversion = agg['product_info'].copy()
+    conversion['conversion_rate'] = agg['product_customers'] / num_customers * 100
+    conversion['conversion_category'] = categorize_conversion(conversion['conversion_rate'])
+    return conversion[['product_name', 'category', 'conversion_rate', 'conversion_category']]
+
+
+def precomputed_sales(agg):
+    days = pd.DatetimeIndex(agg['days'])
+    daily_sales = agg['daily_sales']
+    if agg['sales_is_integral']:
+        daily_sales = np.rint(daily_sales).astype(np.int64)
+
+    sales = pd.DataFrame({'Date': days.date, 'Sales': daily_sales, 'Profit': agg['daily_profit']})
+    return sales[days.year.isin(SALES_YEARS)].reset_index(drop=True)
+
+
+def _write_json(data, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=4)
+
+
+# name -> (file name, builder, writer)
+OUTPUTS = {
+    'sales_profit_metrics': ('sales_profit_metrics.json', sales_profit_metrics, _write_json),
+    'average_basket_size': ('average_basket_size.json', average_basket_size, _write_json),
+    'product_conversion_rates': (
+        'product_conversion_rates.json', product_conversion_rates,
+        lambda data, path: data.to_json(path, orient='records', lines=False),
+    ),
+    'precomputed_sales': (
+        'precomputed_sales_data_audi_2028.csv', precomputed_sales,
+        lambda data, path: data.to_csv(path, index=False),
+    ),
+}
+
+
+def run(outputs=None, output_dir=OUTPUT_DIR, df=None):
+    outputs = list(outputs or OUTPUTS)
+    unknown = [name for name in outputs if name not in OUTPUTS]
+    if unknown:
+        raise ValueError(f"Unknown outputs: {unknown}")
+
+    if df is None:
+        df = load_transactions(columns=COLUMNS)
+    agg = compute_aggregates(df)
+
+    os.makedirs(output_dir, exist_ok=True)
+    results = {}
+    for name in outputs:
+        file_name, build, write = OUTPUTS[name]
+        data = build(agg)
+        path = os.path.join(output_dir, file_name)
+        write(data, path)
+        results[name] = (path, data)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build all precomputed dashboard metrics in one pass')
+    parser.add_argument('--only', nargs='+', choices=list(OUTPUTS), help='subset of outputs to write')
+    parser.add_argument('--output-dir', default=OUTPUT_DIR)
+    parser.add_argument('--incremental', action='store_true', help='fold only newly appended rows (see incremental_metrics.py)')
+    args = parser.parse_args()
+
+    if args.incremental:
+        from incremental_metrics import incremental_refresh
+        rows = incremental_refresh(output_dir=args.output_dir)
+        print(f"✅ Folded {rows} transactions into '{args.output_dir}'")
+    else:
+        for name, (path, data) in run(args.only, args.output_dir).items():
+            print(f"✅ {name} saved to '{path}'")
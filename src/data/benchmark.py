@@ -0,0 +1,246 @@
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import platform
+import subprocess
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import run_all
+import generate_data
+from data_store import RAW_CSV, RAW_CSV_2030, OUTPUT_DIR
+
+# End-to-end benchmark at a given data scale: generates (or reuses) a
+# synthetic dataset, runs every batch stage against it, starts the
+# consolidated API and load-tests the main endpoints. Each run appends one
+# record (stage wall times and peak RSS, API startup time, per-endpoint latency
+# percentiles and throughput, server memory) to a JSON results file, so runs
+# across commits and machines can be compared side by side.
+#   python benchmark.py --rows 1000000 10000000
+
+SCALES = [1_000_000]
+RESULTS_FILE = os.path.join(OUTPUT_DIR, 'benchmark_results.json')
+REQUESTS = 200
+CONCURRENCY = 8
+STARTUP_TIMEOUT = 1800
+REQUEST_TIMEOUT = 300
+
+# Endpoint -> (method, path, JSON body); values exist in every generated dataset
+ENDPOINTS = {
+    'recommend': ('POST', '/api/recommend', {'product_name': 'Lego City Set'}),
+    'bought_together': ('POST', '/api/bought_together', {'product_name': 'Lego City Set'}),
+    'future_cltv': ('GET', '/api/future_cltv?top=100', None),
+    'cltv_horizons': ('GET', '/api/cltv_horizons?per_page=100', None),
+    'predict_sales': ('GET', '/api/predict_sales', None),
+    'analyze_stores': ('GET', '/api/analyze_stores', None),
+    'filter_city': ('GET', '/api/get_filtered_data?city=Jaipur&per_page=100', None),
+    'filter_combined': ('GET', '/api/get_filtered_data?category=Electronics&store_type=Online'
+                               '&start_date=2023-01-01&end_date=2023-12-31&min_annual_income=500000', None),
+    'filter_product_name': ('GET', '/api/get_filtered_data?product_name=oil&page=5', None),
+}
+READY_PATH = '/api/get_cities'
+
+
+def scale_environment(rows, seed, base_dir):
+    # Data, cache and outputs for one scale live under one directory
+    path, meta = generate_data.generate(rows, seed, os.path.join(base_dir, os.path.basename(RAW_CSV)))
+    alias = os.path.join(base_dir, os.path.basename(RAW_CSV_2030))
+    if not os.path.exists(alias):
+        os.symlink(os.path.basename(path), alias)  # the 2030 services read the same data
+    env = {
+        'SUPERMART_DATA_DIR': base_dir,
+        'SUPERMART_CACHE_DIR': os.path.join(base_dir, 'cache'),
+        'SUPERMART_OUTPUT_DIR': os.path.join(base_dir, 'output'),
+    }
+    os.makedirs(env['SUPERMART_OUTPUT_DIR'], exist_ok=True)
+    return meta, env
+
+
+def run_stages(names):
+    # Stage scripts read their paths from the environment set by the caller
+    results = {}
+    for name in names:
+        returncode, elapsed, rss = run_all.run_stage(name, run_all.STAGES[name])
+        results[name] = {'status': 'ok' if returncode == 0 else f'exit {returncode}',
+                         'wall_s': round(elapsed, 3), 'peak_rss_mb': round(rss, 1)}
+    return results
+
+
+def process_tree(pid):
+    pids, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        pids.append(current)
+        try:
+            with open(f'/proc/{current}/task/{current}/children') as f:
+                pending.extend(int(child) for child in f.read().split())
+        except OSError:
+            pass
+    return pids
+
+
+def memory_mb(pids, field):
+    # Sum of a /proc status field (VmRSS, VmHWM) over processes; None where /proc is unavailable
+    total, found = 0, False
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                for line in f:
+                    if line.startswith(f'{field}:'):
+                        total += int(line.split()[1])
+                        found = True
+        except OSError:
+            pass
+    return round(total / 1024, 1) if found else None
+
+
+def request(base_url, method, path, body, timeout=REQUEST_TIMEOUT):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(base_url + path, data=data, method=method, headers={'Content-Type': 'application/json'})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            response.read()
+            ok = response.status < 400
+    except (urllib.error.URLError, OSError):
+        ok = False
+    return time.perf_counter() - start, ok
+
+
+def load_test(base_url, endpoint, requests, concurrency):
+    method, path, body = endpoint
+    first, first_ok = request(base_url, method, path, body)  # cold call, reported separately
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: request(base_url, method, path, body), range(requests)))
+    wall = time.perf_counter() - start
+
+    latencies = np.array([elapsed for elapsed, _ in results]) * 1000
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        'requests': requests,
+        'concurrency': concurrency,
+        'errors': sum(not ok for _, ok in results) + (not first_ok),
+        'first_ms': round(first * 1000, 2),
+        'mean_ms': round(float(latencies.mean()), 2),
+        'p50_ms': round(float(p50), 2),
+        'p95_ms': round(float(p95), 2),
+        'p99_ms': round(float(p99), 2),
+        'max_ms': round(float(latencies.max()), 2),
+        'throughput_rps': round(requests / wall, 1),
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def benchmark_api(endpoints, requests, concurrency, workers, startup_timeout=STARTUP_TIMEOUT):
+    port = free_port()
+    base_url = f'http://127.0.0.1:{port}'
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, run_all.script('api.py'), '--host', '127.0.0.1', '--ports', str(port), '--workers', str(workers)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        # Startup: until the app answers, which includes loading every service's data and models
+        while True:
+            if server.poll() is not None:
+                return {'status': f'exit {server.returncode}'}
+            if time.perf_counter() - start > startup_timeout:
+                return {'status': 'startup timeout'}
+            if request(base_url, 'GET', READY_PATH, None, timeout=5)[1]:
+                break
+            time.sleep(0.2)
+        results = {
+            'status': 'ok',
+            'workers': workers,
+            'startup_s': round(time.perf_counter() - start, 3),
+            'idle_rss_mb': memory_mb(process_tree(server.pid), 'VmRSS'),
+            'endpoints': {},
+        }
+        for name, endpoint in endpoints.items():
+            stats = results['endpoints'][name] = load_test(base_url, endpoint, requests, concurrency)
+            print(f"  {name:<22}p50 {stats['p50_ms']:>9.2f} ms  p99 {stats['p99_ms']:>9.2f} ms  "
+                  f"{stats['throughput_rps']:>8.1f} req/s", flush=True)
+        # Summed over master and workers, so pages shared copy-on-write count once per process
+        pids = process_tree(server.pid)
+        results['rss_mb'] = memory_mb(pids, 'VmRSS')
+        results['peak_rss_mb'] = memory_mb(pids, 'VmHWM')
+        return results
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            server.wait()
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=run_all.scripts_dir,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_result(record, path):
+    try:
+        with open(path) as f:
+            runs = json.load(f)
+    except (OSError, ValueError):
+        runs = []
+    runs.append(record)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(runs, f, indent=4)
+    os.replace(tmp, path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the batch pipeline and the API on synthetic data')
+    parser.add_argument('--rows', type=int, nargs='+', default=SCALES, help='dataset sizes to benchmark')
+    parser.add_argument('--seed', type=int, default=generate_data.DEFAULT_SEED)
+    parser.add_argument('--data-dir', default=generate_data.BENCH_DATA_DIR, help='where datasets are generated and kept')
+    parser.add_argument('--stages', nargs='*', choices=list(run_all.STAGES), default=list(run_all.STAGES))
+    parser.add_argument('--endpoints', nargs='*', choices=list(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument('--requests', type=int, default=REQUESTS, help='requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=CONCURRENCY)
+    parser.add_argument('--workers', type=int, default=2, help='API worker processes')
+    parser.add_argument('--output', default=RESULTS_FILE, help='results file; each run is appended')
+    args = parser.parse_args()
+    output = os.path.abspath(args.output)
+
+    record = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'machine': {'platform': platform.platform(), 'python': platform.python_version(), 'cpus': os.cpu_count()},
+        'config': {'seed': args.seed, 'requests': args.requests, 'concurrency': args.concurrency, 'workers': args.workers},
+        'scales': [],
+    }
+    for rows in args.rows:
+        print(f"📦 {rows} rows", flush=True)
+        start = time.perf_counter()
+        meta, env = scale_environment(rows, args.seed, generate_data.dataset_dir(rows, args.seed, args.data_dir))
+        scale = {'rows': rows, 'dataset': meta, 'generate_s': round(time.perf_counter() - start, 3)}
+        os.environ.update(env)  # inherited by the stage and server subprocesses
+
+        scale['stages'] = run_stages(args.stages)
+        if args.endpoints:
+            print("🚀 Load-testing the API ...", flush=True)
+            scale['api'] = benchmark_api({name: ENDPOINTS[name] for name in args.endpoints},
+                                         args.requests, args.concurrency, args.workers)
+        record['scales'].append(scale)
+
+    save_result(record, output)
+    print(f"✅ Benchmark results appended to '{output}'")
@@ -0,0 +1,168 @@
+import hashlib
+import numpy as np
+import pandas as pd
+import lifetimes
+from scipy.special import hyp2f1
+from lifetimes import BetaGeoFitter, GammaGammaFitter
+from lifetimes.utils import summary_data_from_transaction_data
+from data_store import load_transactions, RAW_CSV
+import model_registry
+
+# Predictive CLTV: BG/NBD for how many purchases each customer will make and
+# Gamma-Gamma for how much each purchase is worth. Both models reduce to a
+# handful of parameters, which are kept in the model registry so services
+# start without refitting. All predictions are closed-form and vectorised over customers
+# and horizons.
+
+MODEL_NAME = 'cltv'
+MODEL_VERSION = 2
+PENALIZER = 0.001
+DAYS_PER_YEAR = 365.0
+OBSERVATION_END = pd.Timestamp('2024-12-31')
+# Lower bound on the BG/NBD Beta(a, b) dropout parameters. Unbounded fits can
+# collapse both towards zero (a point mass at "never drops out"), which makes
+# the closed-form predictions numerically fragile for little likelihood gain.
+MIN_DROPOUT_PARAM = 0.01
+
+
+def _frozen(values):
+    values = np.array(values, dtype=np.float64)
+    values.flags.writeable = False
+    return values
+
+
+class BoundedBetaGeoFitter(BetaGeoFitter):
+    # lifetimes' optimiser accepts bounds but BetaGeoFitter.fit never passes any;
+    # parameters are optimised as logs, in the order r, alpha, a, b
+    def _fit(self, minimizing_function_args, initial_params, params_size, disp, tol=1e-7, bounds=None, **kwargs):
+        bounds = [(None, None), (None, None), (np.log(MIN_DROPOUT_PARAM), None), (np.log(MIN_DROPOUT_PARAM), None)]
+        return super()._fit(minimizing_function_args, initial_params, params_size, disp, tol, bounds, **kwargs)
+
+
+def load_summary(source=RAW_CSV, observation_period_end=OBSERVATION_END):
+    # Per-customer frequency / recency / T / monetary_value, plus the simple model's inputs
+    df = load_transactions(source, columns=['customer_id', 'transaction_date', 'total_sales_per_transaction'])
+    summary = summary_data_from_transaction_data(
+        df,
+        customer_id_col='customer_id',
+        datetime_col='transaction_date',
+        monetary_value_col='total_sales_per_transaction',
+        observation_period_end=observation_period_end
+    )
+    summary = summary.reset_index().rename(columns={'index': 'customer_id'})
+
+    customer_transactions = df.groupby('customer_id')['total_sales_per_transaction'].agg(['mean', 'count', 'sum'])
+    customer_transactions['weighted_avg_order'] = customer_transactions['sum'] / customer_transactions['count']
+    summary = summary.merge(customer_transactions['weighted_avg_order'], left_on='customer_id', right_index=True, how='left')
+    summary['average_order_value'] = summary['weighted_avg_order'].fillna(summary['monetary_value'].mean())  # Fallback
+    summary['purchase_freq'] = summary['frequency']
+    summary['lifespan'] = summary['T'] / 365
+    return summary
+
+
+def summary_fingerprint(summary, penalizer=PENALIZER):
+    h = hashlib.sha256(f'{MODEL_VERSION}|{penalizer}|{MIN_DROPOUT_PARAM}|{lifetimes.__version__}'.encode())
+    h.update('\x1f'.join(map(str, summary['customer_id'])).encode())
+    for col in ['frequency', 'recency', 'T', 'monetary_value']:
+        h.update(np.ascontiguousarray(summary[col].to_numpy(dtype=np.float64)).tobytes())
+    return h.hexdigest()
+
+
+class CLTVEngine:
+    def __init__(self, summary, bgnbd_params, gamma_gamma_params):
+        # summary: output of summary_data_from_transaction_data (freq='D') with a customer_id column
+        self.customer_ids = summary['customer_id'].to_numpy()
+        self.frequency = _frozen(summary['frequency'])
+        self.recency = _frozen(summary['recency'])
+        self.T = _frozen(summary['T'])
+        self.monetary_value = _frozen(summary['monetary_value'])
+        self.bgnbd_params = dict(bgnbd_params)
+        self.gamma_gamma_params = dict(gamma_gamma_params)
+        self.expected_avg_order_value = _frozen(self._expected_average_profit())
+
+    @classmethod
+    def fit(cls, summary, penalizer=PENALIZER):
+        bgf = BoundedBetaGeoFitter(penalizer_coef=penalizer)
+        bgf.fit(summary['frequency'], summary['recency'], summary['T'])
+
+        returning_customers = summary[summary['frequency'] > 0]
+        ggf = GammaGammaFitter(penalizer_coef=penalizer)
+        ggf.fit(returning_customers['frequency'], returning_customers['monetary_value'])
+
+        return cls(
+            summary,
+            {name: float(bgf.params_[name]) for name in ['r', 'alpha', 'a', 'b']},
+            {name: float(ggf.params_[name]) for name in ['p', 'q', 'v']},
+        )
+
+    @classmethod
+    def load_or_fit(cls, summary, penalizer=PENALIZER, registry_dir=None):
+        def train():
+            engine = cls.fit(summary, penalizer)
+            return {'bgnbd': engine.bgnbd_params, 'gamma_gamma': engine.gamma_gamma_params}
+
+        params = model_registry.load_or_train(
+            MODEL_NAME, summary_fingerprint(summary, penalizer), train, registry_dir
+        )
+        return cls(summary, params['bgnbd'], params['gamma_gamma'])
+
+    def _expected_average_profit(self):
+        p, q, v = (self.gamma_gamma_params[name] for name in ['p', 'q', 'v'])
+        individual_weight = p * self.frequency / (p * self.frequency + q - 1)
+        population_mean = v * p / (q - 1)
+        return (1 - individual_weight) * population_mean + individual_weight * self.monetary_value
+
+    def expected_purchases(self, t, customers=slice(None)):
+        # Conditional expected repeat purchases in the next t days (Fader, Hardie & Lee 2005, eq. 10).
+        # t broadcasts against customers: a scalar, one horizon per customer (n,),
+        # or several horizons per customer (n, k).
+        r, alpha, a, b = (self.bgnbd_params[name] for name in ['r', 'alpha', 'a', 'b'])
+        t = np.asarray(t, dtype=np.float64)
+        x, recency, T = self.frequency[customers], self.recency[customers], self.T[customers]
+        if t.ndim == 2:
+            x, recency, T = x[:, None], recency[:, None], T[:, None]
+
+        _a, _b, _c = r + x, b + x, a + b + x - 1
+        z = t / (alpha + T + t)
+        ln_shrink = (r + x) * np.log((alpha + T) / (alpha + t + T))
+        # 2F1 can be negative (c < 0 when a + b + x < 1), so work with sign and log magnitude;
+        # where it overflows, use Euler's transformation instead
+        hyp = hyp2f1(_a, _b, _c, z)
+        hyp_alt = hyp2f1(_c - _a, _c - _b, _c, z)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ln_hyp = np.where(
+                np.isfinite(hyp),
+                np.log(np.abs(hyp)) + ln_shrink,
+                np.log(np.abs(hyp_alt)) + (_c - _a - _b) * np.log(1 - z) + ln_shrink,
+            )
+        sign = np.sign(np.where(np.isfinite(hyp), hyp, hyp_alt))
+
+        numerator = (a + b + x - 1) / (a - 1) * (1 - sign * np.exp(ln_hyp))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            repeat_term = np.where(x > 0, (a / (b + x - 1)) * ((alpha + T) / (alpha + recency)) ** (r + x), 0.0)
+        return numerator / (1 + repeat_term)
+
+    def cltv(self, horizon_days, discount_rate=0.0, period_days=30, customers=slice(None)):
+        # Expected value over each customer's horizon. With a discount rate (annual),
+        # purchases are bucketed into periods and each period is discounted; periods
+        # are accumulated one at a time, so memory stays O(customers) for any horizon.
+        n = len(self.frequency[customers])
+        horizon = np.broadcast_to(np.asarray(horizon_days, dtype=np.float64), (n,))
+        aov = self.expected_avg_order_value[customers]
+
+        if not discount_rate:
+            return aov * self.expected_purchases(horizon, customers)
+
+        total = np.zeros(n)
+        previous = np.zeros(n)
+        for period in range(1, int(np.ceil(horizon.max() / period_days)) + 1):
+            end = period * float(period_days)
+            cumulative = self.expected_purchases(np.minimum(end, horizon), customers)
+            total += (cumulative - previous) * (1 + discount_rate) ** (-end / DAYS_PER_YEAR)
+            previous = cumulative
+        return aov * total
+
+
+def load_model(summary=None):
+    # The engine clv.py serves, fitted (or loaded from the registry) on the current data
+    return CLTVEngine.load_or_fit(load_summary() if summary is None else summary)
@@ -1,44 +1,106 @@
-from flask import Flask, jsonify, request
-from flask_cors import CORS
-import pandas as pd
+from flask import Blueprint, jsonify, request, Response, stream_with_context
+import json
 import numpy as np
-from lifetimes import GammaGammaFitter
-from lifetimes.utils import summary_data_from_transaction_data
-
-app = Flask(__name__)
-CORS(app, resources={r"/api/*": {"origins": "http://localhost:4000"}}) 
-
-df = pd.read_csv('/Users/apple/Desktop/Blazebuilders/Deloitte_Round_3/react-app/public/data/indian_retail_data_audi_2028.csv')  
-df['transaction_date'] = pd.to_datetime(df['transaction_date'], format='%d-%m-%Y')
-current_date = pd.to_datetime('2024-12-31')
-
-summary = summary_data_from_transaction_data(
-    df,
-    customer_id_col='customer_id',
-    datetime_col='transaction_date',
-    monetary_value_col='total_sales_per_transaction',
-    observation_period_end=current_date
-)
-
-summary = summary.reset_index().rename(columns={'index': 'customer_id'})
-
-customer_transactions = df.groupby('customer_id')['total_sales_per_transaction'].agg(['mean', 'count', 'sum'])
-customer_transactions['weighted_avg_order'] = customer_transactions['sum'] / customer_transactions['count']
-summary = summary.merge(customer_transactions['weighted_avg_order'], left_on='customer_id', right_index=True, how='left')
-summary['average_order_value'] = summary['weighted_avg_order'].fillna(summary['monetary_value'].mean())  # Fallback
-summary['purchase_freq'] = summary['frequency']
-summary['lifespan'] = summary['T'] / 365
-
-# Train Gamma-Gamma model
-returning_customers = summary[summary['frequency'] > 0]
-ggf = GammaGammaFitter(penalizer_coef=0.001)
-ggf.fit(returning_customers['frequency'], returning_customers['monetary_value'])
-
-@app.route('/api/future_cltv', methods=['GET'])
+import pyarrow as pa
+from functools import lru_cache
+from cltv_engine import load_summary, load_model
+from api import create_app
+
+blueprint = Blueprint('clv', __name__)
+
+summary = load_summary()
+
+# BG/NBD + Gamma-Gamma models; fitted parameters are reused from disk while the summary is unchanged
+cltv_engine = load_model(summary)
+
+# Gamma-Gamma expectations are fixed for a given fit: compute them once and
+# freeze them. Requests only rescale these arrays and never touch `summary`.
+CLTV_CACHE_SIZE = 64
+SORT_KEYS = ['ltv', 'avg_order_value', 'customer_id']
+RESPONSE_FORMATS = ['json', 'ndjson', 'columnar', 'arrow']
+MODELS = ['simple', 'bgnbd']
+MAX_PER_PAGE = 10000
+STREAM_CHUNK = 1000
+MAX_HORIZONS = 12
+MAX_DAYS = 5 * 365  # longest horizon served; predictions that far out are mostly extrapolation anyway
+
+def _frozen(values):
+    values = np.asarray(values, dtype=np.float64)
+    values.flags.writeable = False
+    return values
+
+customer_ids = summary['customer_id'].to_numpy()
+customer_positions = {customer: i for i, customer in enumerate(customer_ids)}
+expected_avg_order_values = cltv_engine.expected_avg_order_value
+default_avg_order_value = float(summary['average_order_value'].mean())
+default_purchase_freq = float(summary['purchase_freq'].mean())
+
+@lru_cache(maxsize=CLTV_CACHE_SIZE)
+def compute_cltv(avg_order_value, purchase_freq, lifespan):
+    # Vectorised (avg_order_value, ltv) arrays for one parameter tuple
+    aov = np.where(np.isfinite(expected_avg_order_values), expected_avg_order_values, avg_order_value)
+    ltv = aov * purchase_freq * lifespan
+    ltv = np.where(np.isfinite(ltv), ltv, 0)
+    return _frozen(aov), _frozen(ltv)
+
+@lru_cache(maxsize=CLTV_CACHE_SIZE)
+def compute_bgnbd_cltv(avg_order_value, days, discount_rate):
+    # Per-customer expected purchases (BG/NBD) times expected order value (Gamma-Gamma)
+    aov = np.where(np.isfinite(expected_avg_order_values), expected_avg_order_values, avg_order_value)
+    purchases = cltv_engine.expected_purchases(days)
+    if discount_rate:
+        ltv = cltv_engine.cltv(days, discount_rate)
+        ltv = np.where(np.isfinite(expected_avg_order_values), ltv, aov * purchases)
+    else:
+        ltv = aov * purchases
+    # Non-finite predictions stay NaN here and go out as null, never as a made-up 0
+    return _frozen(aov), _frozen(ltv), _frozen(purchases)
+
+def model_arrays(params):
+    # params: ('simple', avg_order_value, purchase_freq, lifespan) or ('bgnbd', avg_order_value, days, discount_rate)
+    if params[0] == 'bgnbd':
+        return compute_bgnbd_cltv(*params[1:])
+    return compute_cltv(*params[1:])
+
+@lru_cache(maxsize=CLTV_CACHE_SIZE)
+def sorted_positions(params, sort, descending):
+    # Customer order for one parameter tuple; ties keep summary order
+    aov, ltv = model_arrays(params)[:2]
+    if sort == 'customer_id':
+        order = np.argsort(customer_ids, kind='stable')
+        order = order[::-1] if descending else order
+    else:
+        values = ltv if sort == 'ltv' else aov
+        order = np.argsort(-values if descending else values, kind='stable')
+    order.flags.writeable = False
+    return order
+
+def cltv_columns(positions, arrays):
+    columns = {
+        'customer_id': customer_ids[positions],
+        'ltv': arrays[1][positions],
+        'avg_order_value': arrays[0][positions]
+    }
+    if len(arrays) > 2:
+        columns['expected_purchases'] = arrays[2][positions]
+    return columns
+
+def json_values(values):
+    # Plain lists for JSON; NaN/inf become null (bare NaN tokens are not valid JSON)
+    values = np.asarray(values)
+    if values.dtype.kind != 'f':
+        return values.tolist()
+    return np.where(np.isfinite(values), values, None).tolist()
+
+def cltv_records(positions, arrays):
+    columns = {name: json_values(values) for name, values in cltv_columns(positions, arrays).items()}
+    return [dict(zip(columns, row)) for row in zip(*columns.values())]
+
+@blueprint.route('/api/future_cltv', methods=['GET'])
 def get_future_cltv():
     days = request.args.get('days', default=365, type=int)
-    if days <= 0:
-        return jsonify({'error': 'Days must be positive'}), 400
+    if not 0 < days <= MAX_DAYS:
+        return jsonify({'error': f'Days must be between 1 and {MAX_DAYS}'}), 400
 
     avg_order_value = request.args.get('avg_order_value', type=float)
     if avg_order_value is not None and avg_order_value <= 0:
@@ -52,45 +114,148 @@ def get_future_cltv():
     if lifespan is not None and lifespan <= 0:
         return jsonify({'error': 'Lifespan must be positive'}), 400
 
+    model = request.args.get('model', default='simple', type=str)
+    if model not in MODELS:
+        return jsonify({'error': f"model must be one of {MODELS}"}), 400
+    discount_rate = request.args.get('discount_rate', default=0.0, type=float)
+    if discount_rate < 0:
+        return jsonify({'error': 'Discount rate cannot be negative'}), 400
+
     customer_id = request.args.get('customer_id', type=str)  
 
-    avg_order_value = avg_order_value or summary['average_order_value'].mean()
-    purchase_freq = purchase_freq or summary['purchase_freq'].mean()
+    sort = request.args.get('sort', type=str)
+    if sort is not None and sort not in SORT_KEYS:
+        return jsonify({'error': f"sort must be one of {SORT_KEYS}"}), 400
+    order = request.args.get('order', default='desc', type=str)
+    if order not in ('asc', 'desc'):
+        return jsonify({'error': "order must be 'asc' or 'desc'"}), 400
+    response_format = request.args.get('format', default='json', type=str)
+    if response_format not in RESPONSE_FORMATS:
+        return jsonify({'error': f"format must be one of {RESPONSE_FORMATS}"}), 400
+
+    top = request.args.get('top', type=int)
+    page = request.args.get('page', type=int)
+    per_page = request.args.get('per_page', type=int)
+    if (top is not None and top < 1) or (page is not None and page < 1):
+        return jsonify({'error': 'top and page must be positive'}), 400
+    if per_page is not None and not 1 <= per_page <= MAX_PER_PAGE:
+        return jsonify({'error': f'per_page must be between 1 and {MAX_PER_PAGE}'}), 400
+    paginated = page is not None or per_page is not None
+
+    avg_order_value = avg_order_value or default_avg_order_value
+    purchase_freq = purchase_freq or default_purchase_freq
     lifespan = lifespan or (days / 365)  # Convert days to years
 
- 
-    summary['expected_avg_order_value'] = ggf.conditional_expected_average_profit(
-        summary['frequency'], summary['monetary_value']
-    )
-    
-    summary['expected_avg_order_value'] = summary['expected_avg_order_value'].fillna(avg_order_value)
-    summary['expected_avg_order_value'] = summary['expected_avg_order_value'].replace([np.inf, -np.inf], avg_order_value)
-    
-    summary['ltv'] = (summary['expected_avg_order_value'] * purchase_freq * lifespan)
-   
-    summary['ltv'] = summary['ltv'].fillna(0)
-    summary['ltv'] = summary['ltv'].replace([np.inf, -np.inf], 0)
-    
+    if model == 'bgnbd':
+        params = ('bgnbd', avg_order_value, days, discount_rate)
+    else:
+        params = ('simple', avg_order_value, purchase_freq, lifespan)
+    arrays = model_arrays(params)
+
     if customer_id and customer_id.lower() != 'null':
-        filtered_summary = summary[summary['customer_id'] == customer_id]  
-        if filtered_summary.empty:
+        position = customer_positions.get(customer_id)
+        if position is None:
             return jsonify({'error': 'Customer ID not found'}), 404
-        cltv_data = filtered_summary[['customer_id', 'ltv', 'expected_avg_order_value']].rename(
-            columns={'expected_avg_order_value': 'avg_order_value'}
-        ).to_dict(orient='records')
+        positions = np.array([position])
     else:
-        cltv_data = summary[['customer_id', 'ltv', 'expected_avg_order_value']].rename(
-            columns={'expected_avg_order_value': 'avg_order_value'}
-        ).to_dict(orient='records')
-    
-    return jsonify({
+        # Select rows by position only; nothing is serialised until the page is known
+        if sort:
+            positions = sorted_positions(params, sort, order == 'desc')
+        else:
+            positions = slice(None)
+        positions = np.arange(len(customer_ids))[positions]
+        if top is not None:
+            positions = positions[:top]
+
+    meta = {
         'days': days,
         'avg_order_value': avg_order_value,
-        'purchase_freq': purchase_freq,
-        'lifespan': lifespan,
-        'customer_id': customer_id,
-        'data': cltv_data
+        'customer_id': customer_id
+    }
+    if model == 'bgnbd':
+        meta.update({'model': model, 'discount_rate': discount_rate})
+    else:
+        meta.update({'purchase_freq': purchase_freq, 'lifespan': lifespan})
+    if sort or top is not None or paginated:
+        meta.update({'sort': sort, 'order': order, 'total_records': len(positions)})
+    if paginated:
+        page, per_page = page or 1, per_page or 100
+        positions = positions[(page - 1) * per_page:page * per_page]
+        meta.update({'page': page, 'per_page': per_page})
+
+    if response_format == 'ndjson':
+        # First line carries the request metadata, then one customer per line
+        def generate():
+            yield json.dumps(meta) + '\n'
+            for start in range(0, len(positions), STREAM_CHUNK):
+                records = cltv_records(positions[start:start + STREAM_CHUNK], arrays)
+                yield ''.join(json.dumps(record) + '\n' for record in records)
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    if response_format == 'arrow':
+        columns = {name: pa.array(values, from_pandas=True) for name, values in cltv_columns(positions, arrays).items()}
+        table = pa.table(columns, metadata={'meta': json.dumps(meta)})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return Response(sink.getvalue().to_pybytes(), mimetype='application/vnd.apache.arrow.stream')
+
+    if response_format == 'columnar':
+        cltv_data = {name: json_values(values) for name, values in cltv_columns(positions, arrays).items()}
+    else:
+        cltv_data = cltv_records(positions, arrays)
+
+    return jsonify({**meta, 'data': cltv_data})
+
+@blueprint.route('/api/cltv_horizons', methods=['GET'])
+def get_cltv_horizons():
+    # BG/NBD expected purchases and CLTV for several horizons at once, as one (customers x horizons) evaluation
+    try:
+        horizons = [int(h) for h in request.args.get('horizons', default='30,90,180,365', type=str).split(',')]
+    except ValueError:
+        return jsonify({'error': 'horizons must be a comma-separated list of days'}), 400
+    if not horizons or len(horizons) > MAX_HORIZONS or min(horizons) <= 0:
+        return jsonify({'error': f'Provide between 1 and {MAX_HORIZONS} positive horizons'}), 400
+    if max(horizons) > MAX_DAYS:
+        return jsonify({'error': f'Horizons must be at most {MAX_DAYS} days'}), 400
+
+    discount_rate = request.args.get('discount_rate', default=0.0, type=float)
+    if discount_rate < 0:
+        return jsonify({'error': 'Discount rate cannot be negative'}), 400
+
+    customer_id = request.args.get('customer_id', type=str)
+    if customer_id and customer_id.lower() != 'null':
+        position = customer_positions.get(customer_id)
+        if position is None:
+            return jsonify({'error': 'Customer ID not found'}), 404
+        positions = np.array([position])
+    else:
+        page = request.args.get('page', default=1, type=int)
+        per_page = request.args.get('per_page', default=100, type=int)
+        if page < 1 or not 1 <= per_page <= MAX_PER_PAGE:
+            return jsonify({'error': f'page must be positive and per_page between 1 and {MAX_PER_PAGE}'}), 400
+        positions = np.arange(len(customer_ids))[(page - 1) * per_page:page * per_page]
+
+    purchases = cltv_engine.expected_purchases(
+        np.broadcast_to(np.array(horizons, dtype=np.float64), (len(positions), len(horizons))), positions
+    )
+    aov = np.where(np.isfinite(expected_avg_order_values[positions]), expected_avg_order_values[positions], default_avg_order_value)
+    ltv = np.column_stack([
+        cltv_engine.cltv(horizon, discount_rate, customers=positions) if discount_rate else aov * purchases[:, i]
+        for i, horizon in enumerate(horizons)
+    ])
+
+    return jsonify({
+        'horizons': horizons,
+        'discount_rate': discount_rate,
+        'total_records': len(customer_ids),
+        'customer_id': customer_ids[positions].tolist(),
+        'avg_order_value': json_values(aov),
+        'expected_purchases': json_values(purchases),
+        'ltv': json_values(ltv)
     })
 
+app = create_app([blueprint])
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
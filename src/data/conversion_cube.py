@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+from batch_metrics import categorize_conversion, CONVERSION_LABELS
+
+# Product conversion cube. Every non-empty (product, city, store_type,
+# loyalty_status, month) cell keeps the exact, sorted list of customers who
+# bought the product there, stored as one flat array of (cell, customer) pairs
+# so memory grows with the data rather than cells x customers. Any slice or
+# roll-up (per city, per month, a window of months, ...) is a distinct count
+# over the selected pairs, answered without rescanning the transactions. The
+# denominator of a slice is the number of distinct customers who bought
+# anything in it.
+
+DIMENSIONS = ['city', 'store_type', 'loyalty_status', 'month']
+COLUMNS = ['transaction_date', 'customer_id', 'product_id', 'product_name', 'category', 'city', 'store_type', 'loyalty_status']
+LOW_CONVERSION = CONVERSION_LABELS[0]
+
+
+def distinct_counts(groups, members, n_groups, n_members):
+    # Distinct members per group, for (group, member) pairs that may repeat across cells
+    keys = np.unique(groups.astype(np.int64) * n_members + members)
+    return np.bincount(keys // n_members, minlength=n_groups)
+
+
+class ConversionCube:
+    def __init__(self, products, product_info, customers, levels, cells, pair_cells, pair_customers):
+        self.products = products          # product ids, indexed by product code
+        self.product_info = product_info  # product_name, category per product code
+        self.customers = customers        # customer ids, indexed by customer code
+        self.levels = levels              # dimension -> values, indexed by code
+        self.cells = cells                # (n_cells, 1 + len(DIMENSIONS)) product and dimension codes
+        self.pair_cells = pair_cells          # cell index of each (cell, customer) pair, ascending
+        self.pair_customers = pair_customers  # customer code of each pair
+
+    @classmethod
+    def build(cls, df):
+        # One pass: factorise every key and dedupe (cell, customer) pairs
+        product_codes, products = pd.factorize(df['product_id'], sort=True)
+        customer_codes, customers = pd.factorize(df['customer_id'], sort=True)
+        keys = {
+            'city': df['city'].astype(str),
+            'store_type': df['store_type'].astype(str),
+            'loyalty_status': df['loyalty_status'].astype(str),
+            'month': df['transaction_date'].dt.strftime('%Y-%m'),
+        }
+        levels, codes = {}, [product_codes]
+        for dimension in DIMENSIONS:
+            dimension_codes, levels[dimension] = pd.factorize(keys[dimension], sort=True)
+            codes.append(dimension_codes)
+
+        valid = np.logical_and.reduce([c >= 0 for c in codes]) & (customer_codes >= 0)
+        shape = (len(products), *(len(levels[d]) for d in DIMENSIONS))
+        cell_keys = np.ravel_multi_index([c[valid] for c in codes], shape)
+        pairs = np.unique(cell_keys * len(customers) + customer_codes[valid])
+        cell_keys, customer_index = np.divmod(pairs, len(customers))
+
+        cell_keys, cell_index = np.unique(cell_keys, return_inverse=True)
+        cells = np.column_stack(np.unravel_index(cell_keys, shape))
+
+        # First seen name/category for each product id
+        _, first_rows = np.unique(product_codes, return_index=True)
+        first_rows = first_rows[product_codes[first_rows] >= 0]
+        product_info = df[['product_name', 'category']].iloc[first_rows].astype(str).reset_index(drop=True)
+        return cls(np.asarray(products), product_info, np.asarray(customers), levels, cells,
+                   cell_index.astype(np.int32), customer_index.astype(np.int32))
+
+    def _mask(self, filters, start, end):
+        mask = np.ones(len(self.cells), dtype=bool)
+        for dimension, values in (filters or {}).items():
+            if dimension not in self.levels:
+                raise ValueError(f"Unknown dimension: {dimension}")
+            values = [values] if isinstance(values, str) else list(values)
+            codes = np.flatnonzero(pd.Index(self.levels[dimension]).isin(values))
+            mask &= np.isin(self.cells[:, 1 + DIMENSIONS.index(dimension)], codes)
+
+        # Month window, inclusive at both ends ('YYYY-MM')
+        months = np.asarray(self.levels['month'])[self.cells[:, 1 + DIMENSIONS.index('month')]]
+        if start:
+            mask &= months >= start
+        if end:
+            mask &= months <= end
+        return mask
+
+    def _rollup(self, columns, mask):
+        # Distinct-customer counts per combination of the given cube columns
+        group_codes, groups = np.unique(self.cells[mask][:, columns], axis=0, return_inverse=True)
+        cell_groups = np.full(len(self.cells), -1, dtype=np.int64)
+        cell_groups[mask] = groups.ravel()
+        selected = mask[self.pair_cells]
+        counts = distinct_counts(cell_groups[self.pair_cells[selected]], self.pair_customers[selected],
+                                 len(group_codes), len(self.customers))
+        return group_codes, counts
+
+    def _customers(self, mask):
+        return int(np.count_nonzero(np.bincount(self.pair_customers[mask[self.pair_cells]], minlength=1)))
+
+    def customers_in(self, filters=None, start=None, end=None):
+        # Distinct customers who bought anything in the slice
+        return self._customers(self._mask(filters, start, end))
+
+    def rates(self, by=(), filters=None, start=None, end=None):
+        # Conversion rate per product (and per value of each `by` dimension) within the slice
+        by = list(by)
+        unknown = [dimension for dimension in by if dimension not in DIMENSIONS]
+        if unknown:
+            raise ValueError(f"Unknown dimensions: {unknown}")
+        mask = self._mask(filters, start, end)
+        by_columns = [1 + DIMENSIONS.index(dimension) for dimension in by]
+
+        product_groups, buyers = self._rollup([0, *by_columns], mask)
+        if by:
+            slice_groups, slice_customers = self._rollup(by_columns, mask)
+        else:
+            customers = self._customers(mask)
+            slice_groups = np.empty((1 if customers else 0, 0), dtype=np.int64)
+            slice_customers = np.array([customers] if customers else [], dtype=np.int64)
+
+        # Every product x every slice with customers: pairs nobody bought are
+        # the worst converters and come back with customers=0
+        slice_position = {tuple(group): i for i, group in enumerate(slice_groups.tolist())}
+        n_slices = len(slice_groups)
+        counts = np.zeros(len(self.products) * n_slices, dtype=np.int64)
+        positions = [slice_position[tuple(group)] for group in product_groups[:, 1:].tolist()]
+        counts[product_groups[:, 0] * n_slices + np.asarray(positions, dtype=np.int64)] = buyers
+        codes = np.repeat(np.arange(len(self.products)), n_slices)
+        slices = np.tile(np.arange(n_slices), len(self.products))
+
+        result = pd.DataFrame({'product_id': self.products[codes]})
+        for i, dimension in enumerate(by):
+            result[dimension] = np.asarray(self.levels[dimension])[slice_groups[slices, i]]
+        result = pd.concat([result, self.product_info.iloc[codes].reset_index(drop=True)], axis=1)
+        result['customers'] = counts
+        result['slice_customers'] = slice_customers[slices]
+        totals = result['slice_customers'].to_numpy()
+        result['conversion_rate'] = counts / np.maximum(totals, 1) * 100
+        result['conversion_category'] = categorize_conversion(result['conversion_rate'])
+        return result
+
+    def low_converters(self, by=(), filters=None, start=None, end=None):
+        rates = self.rates(by, filters, start, end)
+        low = rates[rates['conversion_category'] == LOW_CONVERSION]
+        return low.sort_values([*by, 'conversion_rate']).reset_index(drop=True)
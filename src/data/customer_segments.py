@@ -0,0 +1,76 @@
+from flask import Blueprint, jsonify, request
+import numpy as np
+import model_registry
+import segmentation
+from segmentation import FEATURES
+from api import create_app
+
+blueprint = Blueprint('customer_segments', __name__)
+
+# Segment assignment API: places new or updated customers into the segments
+# pca.py last trained, using the persisted scaler, PCA and centroids.
+
+MAX_BATCH_SIZE = 10000
+
+customer_data = segmentation.load_customer_data()
+customer_positions = {customer: i for i, customer in enumerate(customer_data['customer_id'])}
+
+# Never refit at startup when a trained model exists, even if the data has moved on since
+model = model_registry.load_latest(segmentation.MODEL_NAME) or segmentation.load_model(customer_data)
+
+def assignment_records(customer_ids, features):
+    clusters, segments, coords = model.assign(features)
+    return [
+        {'customer_id': customer, 'cluster': int(cluster), 'segment': segment, 'pca1': x, 'pca2': y}
+        for customer, cluster, segment, (x, y) in zip(customer_ids, clusters, segments, coords.tolist())
+    ]
+
+@blueprint.route('/api/segments', methods=['GET'])
+def get_segments():
+    summary = model.summary.reset_index()
+    summary['segment'] = summary['Cluster'].map(model.labels)
+    return jsonify({
+        'k': model.k,
+        'silhouette': model.silhouette,
+        'segments': summary.rename(columns={'Cluster': 'cluster'}).to_dict(orient='records')
+    })
+
+@blueprint.route('/api/assign_segment', methods=['POST'])
+def assign_segment():
+    # customers: [{customer_id, <feature>: value, ...}] with explicit features;
+    # customer_ids: [...] to use the customer's current features from the store
+    data = request.get_json(silent=True) or {}
+    customers = data.get('customers') or []
+    customer_ids = data.get('customer_ids') or []
+    if not isinstance(customers, list) or not isinstance(customer_ids, list):
+        return jsonify({'error': 'customers and customer_ids must be lists'}), 400
+    if not customers and not customer_ids:
+        return jsonify({'error': 'customers or customer_ids is required'}), 400
+    if len(customers) + len(customer_ids) > MAX_BATCH_SIZE:
+        return jsonify({'error': f'At most {MAX_BATCH_SIZE} customers per request'}), 400
+
+    rows = []
+    for i, customer in enumerate(customers):
+        try:
+            rows.append([float(customer[feature]) for feature in FEATURES])
+        except (KeyError, TypeError, ValueError):
+            return jsonify({'error': f'customers[{i}] needs numeric values for {FEATURES}'}), 400
+    results = assignment_records(
+        [customer.get('customer_id') for customer in customers], np.array(rows).reshape(-1, len(FEATURES))
+    ) if customers else []
+
+    positions = [customer_positions.get(str(customer_id)) for customer_id in customer_ids]
+    known = [(customer_id, position) for customer_id, position in zip(customer_ids, positions) if position is not None]
+    known_records = iter(assignment_records(
+        [customer_id for customer_id, _ in known],
+        customer_data[FEATURES].to_numpy()[[position for _, position in known]]
+    ) if known else [])
+    for customer_id, position in zip(customer_ids, positions):
+        results.append(next(known_records) if position is not None else {'customer_id': customer_id, 'error': 'Customer ID not found'})
+
+    return jsonify({'results': results})
+
+app = create_app([blueprint])
+
+if __name__ == '__main__':
+    app.run(debug=True, port=5010)
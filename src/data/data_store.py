@@ -0,0 +1,171 @@
+import io
+import os
+import json
+import argparse
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+# Shared data-access layer: the raw CSV is parsed once into a typed Feather
+# (Arrow IPC) file that every script and service loads memory-mapped.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PUBLIC_DATA_DIR = os.environ.get(
+    'SUPERMART_DATA_DIR', os.path.abspath(os.path.join(BASE_DIR, '..', '..', 'public', 'data'))
+)
+CACHE_DIR = os.environ.get('SUPERMART_CACHE_DIR', os.path.join(BASE_DIR, '.cache'))
+OUTPUT_DIR = os.environ.get('SUPERMART_OUTPUT_DIR', 'public/data')
+
+RAW_CSV = os.path.join(PUBLIC_DATA_DIR, 'indian_retail_data_audi_2028.csv')
+RAW_CSV_2030 = os.path.join(PUBLIC_DATA_DIR, 'indian_retail_data_audi_2030.csv')
+
+# Bump whenever the typed schema below changes so old stores get rebuilt
+SCHEMA_VERSION = 2
+
+DATE_FORMAT = '%d-%m-%Y'
+DATE_COLUMNS = ['transaction_date', 'signup_date']
+CATEGORICAL_COLUMNS = ['city', 'state', 'category', 'store_type', 'payment_method', 'loyalty_status']
+STRING_COLUMNS = ['customer_id', 'customer_name', 'transaction_id', 'store_id', 'product_id', 'product_name']
+
+CSV_DTYPES = {col: str for col in DATE_COLUMNS + STRING_COLUMNS}
+
+INT32_MIN, INT32_MAX = np.iinfo(np.int32).min, np.iinfo(np.int32).max
+
+# In-process memo so repeated calls within one interpreter share a frame
+_loaded = {}
+
+
+def parse_dates(series):
+    # Canonical DD-MM-YYYY parsing; anything else falls back to dayfirst
+    values = series.astype('string').str.strip()
+    parsed = pd.to_datetime(values, format=DATE_FORMAT, errors='coerce')
+    retry = parsed.isna() & values.notna()
+    if retry.any():
+        parsed[retry] = pd.to_datetime(values[retry], format='mixed', dayfirst=True, errors='coerce')
+    return parsed.astype('datetime64[ns]')
+
+
+def _downcast_numeric(series):
+    # Whole-number columns shrink to int32 where they fit; fractional measures
+    # (money, averages) stay float64, since float32 can't hold their cents exactly
+    if pd.api.types.is_integer_dtype(series) or (
+        series.notna().all() and np.array_equal(series, np.floor(series))
+    ):
+        if series.empty or (series.min() >= INT32_MIN and series.max() <= INT32_MAX):
+            return series.astype(np.int32)
+        return series.astype(np.int64)
+    return series.astype(np.float64)
+
+
+def source_signature(source):
+    stat = os.stat(source)
+    return {
+        'source': os.path.abspath(source),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'schema_version': SCHEMA_VERSION,
+    }
+
+
+def store_paths(source):
+    name = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(CACHE_DIR, f'{name}.feather'), os.path.join(CACHE_DIR, f'{name}.meta.json')
+
+
+def ingest_csv(source):
+    return apply_schema(pd.read_csv(source, dtype=CSV_DTYPES))
+
+
+def read_csv_delta(source, offset):
+    # Parse only the rows appended after byte offset (which must sit on a line boundary)
+    with open(source, 'rb') as f:
+        header = f.readline()
+        f.seek(offset)
+        body = f.read()
+    return apply_schema(pd.read_csv(io.BytesIO(header + body), dtype=CSV_DTYPES)), offset + len(body)
+
+
+def apply_schema(df):
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            df[col] = parse_dates(df[col])
+
+    # Rows without a usable transaction date are unusable everywhere
+    if 'transaction_date' in df.columns:
+        df = df.dropna(subset=['transaction_date'])
+
+    for col in df.columns:
+        if col in CATEGORICAL_COLUMNS:
+            df[col] = df[col].astype('category')
+        elif col in STRING_COLUMNS:
+            df[col] = df[col].str.strip()
+        elif pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = _downcast_numeric(df[col])
+
+    return df.reset_index(drop=True)
+
+
+def _store_is_fresh(store_path, meta_path, signature):
+    if not (os.path.exists(store_path) and os.path.exists(meta_path)):
+        return False
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return all(meta.get(key) == value for key, value in signature.items())
+
+
+def build_store(source=RAW_CSV, force=False):
+    if not os.path.exists(source):
+        raise FileNotFoundError(f"Dataset file {source} not found")
+
+    signature = source_signature(source)
+    store_path, meta_path = store_paths(source)
+    if not force and _store_is_fresh(store_path, meta_path, signature):
+        return store_path
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    df = ingest_csv(source)
+
+    # Write to temp files and swap in atomically so concurrent readers never see a partial store
+    tmp_store = f'{store_path}.{os.getpid()}.tmp'
+    tmp_meta = f'{meta_path}.{os.getpid()}.tmp'
+    feather.write_feather(df, tmp_store, compression='uncompressed')
+    with open(tmp_meta, 'w') as f:
+        json.dump({**signature, 'rows': len(df)}, f, indent=4)
+    os.replace(tmp_store, store_path)
+    os.replace(tmp_meta, meta_path)
+    return store_path
+
+
+def load_transactions(source=RAW_CSV, columns=None):
+    # Returned frames are shared and memory-mapped; treat them as read-only
+    store_path = build_store(source)
+    key = (store_path, os.stat(store_path).st_mtime_ns)
+
+    df = _loaded.get(key)
+    if df is None:
+        table = feather.read_table(store_path, memory_map=True)
+        df = table.to_pandas(split_blocks=True)
+        # Drop frames of superseded store versions
+        for old_key in [k for k in _loaded if k[0] == store_path]:
+            del _loaded[old_key]
+        _loaded[key] = df
+
+    if columns is not None:
+        return df[list(columns)]
+    return df
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the columnar transaction store')
+    parser.add_argument('sources', nargs='*', default=[RAW_CSV, RAW_CSV_2030])
+    parser.add_argument('--force', action='store_true', help='rebuild even if the source is unchanged')
+    args = parser.parse_args()
+
+    for source in args.sources:
+        path = build_store(source, force=args.force)
+        with open(store_paths(source)[1]) as f:
+            rows = json.load(f)['rows']
+        print(f"✅ {os.path.basename(source)} -> {path} ({rows} rows)")
@@ -0,0 +1,221 @@
+from flask import Blueprint, jsonify, request
+import numpy as np
+import pandas as pd
+from data_store import load_transactions, DATE_FORMAT
+from api import create_app
+
+blueprint = Blueprint('filter_data', __name__)
+
+# Self Service Reports backend. The transaction table is loaded once, ordered
+# newest first, and indexed so that every filter resolves to a packed bitmap;
+# filters combine with bitwise AND and a page is decoded from the bitmap
+# without materialising the full result.
+
+EXACT_FILTERS = ['customer_id', 'city', 'state', 'category', 'store_type', 'payment_method', 'loyalty_status']
+DISPLAY_COLUMNS = [
+    'transaction_date', 'customer_id', 'city', 'state', 'category', 'product_name', 'store_type', 'payment_method',
+]
+MAX_PER_PAGE = 100
+
+# Number of set bits in every byte value
+POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def normalize(value):
+    return str(value).strip().casefold()
+
+
+def to_bitmap(rows, base, n_bytes):
+    # Packed little-endian bitmap of row ids (relative to base); rows must be unique
+    rows = np.asarray(rows, dtype=np.int64) - base
+    return np.bincount(rows >> 3, weights=(1 << (rows & 7)), minlength=n_bytes).astype(np.uint8)
+
+
+def range_bitmap(lo, hi, base, n_bytes):
+    # Packed bitmap with rows [lo, hi) set
+    bitmap = np.full(n_bytes, 0xFF, dtype=np.uint8)
+    if n_bytes:
+        bitmap[0] &= (0xFF << (lo - base)) & 0xFF
+        if (hi - base) & 7:
+            bitmap[-1] &= (1 << ((hi - base) & 7)) - 1
+    return bitmap
+
+
+class InvertedIndex:
+    # CSR posting lists: rows[offsets[i]:offsets[i + 1]] are the (sorted) rows holding value i
+    def __init__(self, values):
+        codes, uniques = pd.factorize(values)
+        order = np.argsort(codes, kind='stable').astype(np.int32)
+        missing = int((codes < 0).sum())
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        self.rows = order[missing:]
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+        self.values = list(uniques)
+        self.lookup = {}
+        for i, value in enumerate(uniques):
+            self.lookup.setdefault(normalize(value), []).append(i)
+
+    def postings(self, codes):
+        parts = [self.rows[self.offsets[i]:self.offsets[i + 1]] for i in codes]
+        if len(parts) == 1:
+            return parts[0]
+        return np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int32)
+
+    def find(self, value):
+        return self.postings(self.lookup.get(normalize(value), []))
+
+
+class SubstringIndex:
+    # Trigram index over the distinct values of a column, so substring search
+    # scales with the vocabulary rather than with the number of rows
+    def __init__(self, inverted):
+        self.inverted = inverted
+        self.names = [normalize(value) for value in inverted.values]
+        self.trigrams = {}
+        for i, name in enumerate(self.names):
+            for j in range(len(name) - 2):
+                self.trigrams.setdefault(name[j:j + 3], set()).add(i)
+
+    def matching_codes(self, query):
+        query = normalize(query)
+        if len(query) < 3:
+            candidates = range(len(self.names))
+        else:
+            grams = [query[j:j + 3] for j in range(len(query) - 2)]
+            candidates = set.intersection(*(self.trigrams.get(gram, set()) for gram in grams))
+        return sorted(i for i in candidates if query in self.names[i])
+
+    def find(self, query):
+        return self.inverted.postings(self.matching_codes(query))
+
+
+class TransactionIndex:
+    def __init__(self, df):
+        # Newest transactions first; row ids below refer to this ordering
+        df = df.sort_values('transaction_date', ascending=False, kind='stable').reset_index(drop=True)
+        self.df = df
+        self.n_rows = len(df)
+
+        self.exact = {col: InvertedIndex(df[col].astype(str).to_numpy()) for col in EXACT_FILTERS}
+        self.product_names = SubstringIndex(InvertedIndex(df['product_name'].astype(str).to_numpy()))
+
+        # Dates are descending, so negate them to get an ascending search key
+        self.date_keys = -df['transaction_date'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+
+        income = df['annual_income'].to_numpy(dtype=np.float64, na_value=np.nan)
+        self.income_order = np.argsort(income, kind='stable')
+        self.income_sorted = income[self.income_order]
+
+        self.cities = sorted(df['city'].dropna().astype(str).unique().tolist())
+
+    def date_window(self, start=None, end=None):
+        lo, hi = 0, self.n_rows
+        if end is not None:
+            lo = int(np.searchsorted(self.date_keys, -end.value, side='left'))
+        if start is not None:
+            hi = int(np.searchsorted(self.date_keys, -start.value, side='right'))
+        return lo, max(lo, hi)
+
+    def income_rows(self, low=None, high=None):
+        left = 0 if low is None else np.searchsorted(self.income_sorted, low, side='left')
+        right = np.searchsorted(self.income_sorted, np.inf if high is None else high, side='right')
+        return self.income_order[left:right]
+
+    def query(self, filters, page=1, per_page=10):
+        lo, hi = self.date_window(filters.get('start_date'), filters.get('end_date'))
+        base = lo & ~7
+        n_bytes = (hi - base + 7) >> 3
+
+        # Start from the date window, then AND in every other filter
+        bitmap = range_bitmap(lo, hi, base, n_bytes)
+        row_sets = [self.exact[col].find(filters[col]) for col in EXACT_FILTERS if col in filters]
+        if 'product_name' in filters:
+            row_sets.append(self.product_names.find(filters['product_name']))
+        if 'min_annual_income' in filters or 'max_annual_income' in filters:
+            row_sets.append(self.income_rows(filters.get('min_annual_income'), filters.get('max_annual_income')))
+
+        for rows in sorted(row_sets, key=len):
+            rows = rows[(rows >= lo) & (rows < hi)]
+            bitmap &= to_bitmap(rows, base, n_bytes)
+            if not bitmap.any():
+                break
+
+        counts = POPCOUNT[bitmap]
+        cumulative = np.cumsum(counts, dtype=np.int64)
+        total = int(cumulative[-1]) if len(cumulative) else 0
+
+        # Decode only the bytes that hold the requested page
+        start_rank = (page - 1) * per_page
+        rows = np.empty(0, dtype=np.int64)
+        if start_rank < total:
+            first = int(np.searchsorted(cumulative, start_rank, side='right'))
+            last = int(np.searchsorted(cumulative, start_rank + per_page, side='left')) + 1
+            bits = np.unpackbits(bitmap[first:last], bitorder='little')
+            skip = start_rank - (int(cumulative[first - 1]) if first else 0)
+            rows = (np.flatnonzero(bits) + base + first * 8)[skip:skip + per_page]
+
+        return total, self.df.iloc[rows]
+
+
+index = TransactionIndex(load_transactions(columns=DISPLAY_COLUMNS + ['loyalty_status', 'annual_income']))
+
+
+def parse_filters(args):
+    filters = {}
+    for col in EXACT_FILTERS + ['product_name']:
+        value = args.get(col, type=str)
+        if value and value.strip() and value.lower() != 'null':
+            filters[col] = value
+
+    for key in ['start_date', 'end_date']:
+        value = args.get(key, type=str)
+        if value:
+            try:
+                filters[key] = pd.Timestamp(value).normalize()
+            except ValueError:
+                raise ValueError(f"Invalid {key}: {value}")
+
+    for key in ['min_annual_income', 'max_annual_income']:
+        value = args.get(key, type=str)
+        if value:
+            try:
+                filters[key] = float(value)
+            except ValueError:
+                raise ValueError(f"Invalid {key}: {value}")
+    return filters
+
+
+@blueprint.route('/api/get_cities', methods=['GET'])
+def get_cities():
+    return jsonify(index.cities)
+
+
+@blueprint.route('/api/get_filtered_data', methods=['GET'])
+def get_filtered_data():
+    page = request.args.get('page', default=1, type=int)
+    per_page = request.args.get('per_page', default=10, type=int)
+    if page < 1 or per_page < 1:
+        return jsonify({'error': 'page and per_page must be positive'}), 400
+    per_page = min(per_page, MAX_PER_PAGE)
+
+    try:
+        filters = parse_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    total, rows = index.query(filters, page, per_page)
+    rows = rows[DISPLAY_COLUMNS].astype({col: str for col in DISPLAY_COLUMNS[1:]})
+    rows['transaction_date'] = rows['transaction_date'].dt.strftime(DATE_FORMAT)
+
+    return jsonify({
+        'page': page,
+        'per_page': per_page,
+        'total_records': total,
+        'data': rows.to_dict(orient='records')
+    })
+
+
+app = create_app([blueprint])
+
+if __name__ == '__main__':
+    app.run(debug=True, port=5002)
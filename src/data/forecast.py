@@ -1,81 +1,146 @@
+import hashlib
 import pandas as pd
-import numpy as np
-from statsmodels.tsa.arima.model import ARIMA
-from xgboost import XGBRegressor
-from sklearn.model_selection import train_test_split
-from flask import Flask, jsonify
-from flask_cors import CORS
+from datetime import datetime, timezone
+from functools import lru_cache
+from flask import Blueprint, jsonify, request, Response
+import model_registry
+import sales_forecast
+from api import create_app
 
-app = Flask(__name__)
-CORS(app)
+blueprint = Blueprint('forecast', __name__)
 
 try:
-    file_path = "/Users/apple/Desktop/Blazebuilders/Deloitte_Round_3/react-app/public/data/indian_retail_data_audi_2028.csv"
-    df = pd.read_csv(file_path)
-    df['transaction_date'] = pd.to_datetime(df['transaction_date'], errors='coerce', dayfirst=True)
-    df = df.dropna(subset=['transaction_date'])
-    df = df[df['transaction_date'].dt.year >= 2021]
-    df_yearly_sales = df.groupby(df['transaction_date'].dt.year)['total_sales_per_transaction'].sum().reset_index()
-    df_yearly_sales.columns = ['Year', 'Total_Sales']
+    df_yearly_sales = sales_forecast.load_yearly_sales()
 except Exception as e:
     print(f"Error loading data: {e}")
     raise
 
-# Train ARIMA model
-try:
-    arima_model = ARIMA(df_yearly_sales['Total_Sales'], order=(3, 2, 2))
-    arima_fit = arima_model.fit()
-except Exception as e:
-    print(f"Error training ARIMA: {e}")
-    raise
+series_sales = sales_forecast.load_sales()
 
-# Compute ARIMA forecast and residuals
-forecast_years = list(range(2025, 2029))
-arima_forecast = arima_fit.forecast(steps=4)
-df_yearly_sales['ARIMA_Predictions'] = arima_fit.fittedvalues
-df_yearly_sales['Residuals'] = df_yearly_sales['Total_Sales'] - df_yearly_sales['ARIMA_Predictions']
+FORECAST_STEPS = sales_forecast.FORECAST_STEPS
+RESPONSE_CACHE_SIZE = 1024
+
+# ARIMA + XGBoost hybrid and the precomputed series forecasts (trained in sales_forecast.py)
+models = sales_forecast.load_model(df_yearly_sales, series_sales)
+arima_fit, xgb_model = models['arima_fit'], models['xgb_model']
 
-#features for XGBoost
-df_yearly_sales['Year_lag1'] = df_yearly_sales['Total_Sales'].shift(1)
-df_yearly_sales['Year_lag2'] = df_yearly_sales['Total_Sales'].shift(2)
-df_xgb = df_yearly_sales.dropna()
+MODEL_VERSION = sales_forecast.model_fingerprint(df_yearly_sales, series_sales)[:16]
+manifest = model_registry.read_manifest(sales_forecast.MODEL_NAME) or {}
+MODEL_TRAINED_AT = datetime.fromtimestamp(int(manifest.get('saved_at', 0)), timezone.utc)
 
-# Split data and train XGBoost
-X = df_xgb[['Year_lag1', 'Year_lag2']]
-y = df_xgb['Residuals']
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=False)
-xgb_model = XGBRegressor(n_estimators=100, learning_rate=0.1, objective='reg:squarederror')
-xgb_model.fit(X_train, y_train)
+forecast_years = list(range(2025, 2025 + FORECAST_STEPS))
+df_yearly_sales['ARIMA_Predictions'] = arima_fit.fittedvalues
+df_yearly_sales = df_yearly_sales.join(sales_forecast.hybrid_features(df_yearly_sales['Total_Sales'], arima_fit))
 
 #Generate Forcast
 def generate_forecast():
-    future_xgb_data = pd.DataFrame({
-        'Year_lag1': [df_yearly_sales['Total_Sales'].iloc[-1], *arima_forecast[:-1]],
-        'Year_lag2': [df_yearly_sales['Total_Sales'].iloc[-2], df_yearly_sales['Total_Sales'].iloc[-1], *arima_forecast[:-2]]
-    }).dropna()
-    xgb_forecast_residuals = xgb_model.predict(future_xgb_data)
-    hybrid_forecast = arima_forecast + xgb_forecast_residuals
     return pd.DataFrame({
         'year': forecast_years,
-        'predicted_sales': hybrid_forecast
+        'predicted_sales': models['yearly_forecast']
     })
 
-@app.route('/api/get_sales_data', methods=['GET'])
+# Precomputed series forecasts: (granularity, dimension, key) -> rows for the stored horizon
+precomputed_series = {
+    key: frame for key, frame in models['series_forecasts'].groupby(['granularity', 'dimension', 'series'], sort=False)
+}
+
+# Serialised response bodies; they only change when the model version does
+response_cache = {}
+
+def cached_json(cache_key, build):
+    entry = response_cache.get(cache_key)
+    if entry is None:
+        body = jsonify(build()).get_data()
+        entry = (body, f"{MODEL_VERSION}-{hashlib.sha256(body).hexdigest()[:16]}")
+        if len(response_cache) >= RESPONSE_CACHE_SIZE:
+            response_cache.pop(next(iter(response_cache)))
+        response_cache[cache_key] = entry
+
+    response = Response(entry[0], mimetype='application/json')
+    response.set_etag(entry[1])
+    response.last_modified = MODEL_TRAINED_AT
+    response.cache_control.no_cache = True  # clients revalidate, which costs a 304
+    response.headers['X-Model-Version'] = MODEL_VERSION
+    return response.make_conditional(request)
+
+# Granular series (per store / category / city, daily or weekly); anything outside the precomputed set is fitted on demand
+SERIES_ARGS = ['granularity', 'dimension', 'key', 'horizon', 'level']
+
+@lru_cache(maxsize=8)
+def series_frame(dimension, granularity):
+    return sales_forecast.build_series(series_sales, None if dimension == 'total' else dimension, granularity)
+
+def forecast_records(dates, mean, lower, upper):
+    return [
+        {'date': date, 'predicted_sales': value, 'lower': low, 'upper': high}
+        for date, value, low, high in zip(dates.strftime('%Y-%m-%d'), mean.tolist(), lower.tolist(), upper.tolist())
+    ]
+
+def series_forecast(dimension, key, granularity, horizon, level):
+    precomputed = precomputed_series.get((granularity, dimension, key))
+    if precomputed is not None and horizon <= len(precomputed) and level == sales_forecast.DEFAULT_LEVEL:
+        rows = precomputed.iloc[:horizon]
+        return forecast_records(
+            pd.DatetimeIndex(rows['date']), *(rows[col].to_numpy() for col in ['predicted_sales', 'lower', 'upper'])
+        )
+
+    series = series_frame(dimension, granularity)
+    mean, lower, upper = sales_forecast.fit_forecast(series[key].to_numpy(), granularity, horizon, level)
+    dates = sales_forecast.future_index(series.index[-1], granularity, horizon)
+    return forecast_records(dates, mean, lower, upper)
+
+def predict_series(args):
+    granularity = args.get('granularity', default='daily', type=str)
+    if granularity not in sales_forecast.GRANULARITIES:
+        return jsonify({"error": f"granularity must be one of {list(sales_forecast.GRANULARITIES)}"}), 400
+    dimension = args.get('dimension', default='total', type=str)
+    if dimension not in ['total', *sales_forecast.SERIES_DIMENSIONS]:
+        return jsonify({"error": f"dimension must be one of {['total', *sales_forecast.SERIES_DIMENSIONS]}"}), 400
+
+    key = 'total' if dimension == 'total' else args.get('key', type=str)
+    if not key:
+        return jsonify({"error": f"key is required for dimension '{dimension}'"}), 400
+    if key not in series_frame(dimension, granularity).columns:
+        return jsonify({"error": f"No {dimension} series named '{key}'"}), 404
+
+    max_horizon = sales_forecast.MAX_HORIZON[granularity]
+    horizon = args.get('horizon', default=sales_forecast.DEFAULT_HORIZON[granularity], type=int)
+    if not 1 <= horizon <= max_horizon:
+        return jsonify({"error": f"horizon must be between 1 and {max_horizon}"}), 400
+    level = args.get('level', default=sales_forecast.DEFAULT_LEVEL, type=float)
+    if not 0 < level < 1:
+        return jsonify({"error": "level must be between 0 and 1"}), 400
+
+    return cached_json(('series', dimension, key, granularity, horizon, level), lambda: {
+        'dimension': dimension,
+        'key': key,
+        'granularity': granularity,
+        'horizon': horizon,
+        'level': level,
+        'model_version': MODEL_VERSION,
+        'forecast': series_forecast(dimension, key, granularity, horizon, level)
+    })
+
+@blueprint.route('/api/get_sales_data', methods=['GET'])
 def get_sales_data():
     try:
-        sales_json = df_yearly_sales[['Year', 'Total_Sales']].rename(columns={'Total_Sales': 'total_amt'}).to_dict(orient='records')
-        return jsonify(sales_json)
+        return cached_json(('sales_data',), lambda: df_yearly_sales[['Year', 'Total_Sales']].rename(
+            columns={'Total_Sales': 'total_amt'}
+        ).to_dict(orient='records'))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/predict_sales', methods=['GET'])
+@blueprint.route('/api/predict_sales', methods=['GET'])
 def predict_sales():
+    # Without series parameters this keeps serving the yearly hybrid forecast
+    if any(arg in request.args for arg in SERIES_ARGS):
+        return predict_series(request.args)
     try:
-        forecast_df = generate_forecast()
-        forecast_json = forecast_df[['year', 'predicted_sales']].to_dict(orient='records')
-        return jsonify(forecast_json)
+        return cached_json(('yearly',), lambda: generate_forecast()[['year', 'predicted_sales']].to_dict(orient='records'))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+app = create_app([blueprint])
+
 if __name__ == "__main__":
     app.run(debug=True, port=5001, host='0.0.0.0')  
\ No newline at end of file
@@ -0,0 +1,337 @@
+import os
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+from data_store import load_transactions, RAW_CSV, CACHE_DIR, DATE_FORMAT
+
+# Deterministic synthetic transactions in the 32-column schema of
+# indian_retail_data_audi_2028.csv, at any scale. Vocabularies and
+# distributions (products, cities, names, quantities, margins, loyalty and
+# payment mixes) are taken from the source CSV; everything else is drawn from
+# one seeded generator. Customers are generated in chunks together with all
+# of their transactions, so per-customer fields (purchase_frequency,
+# cumulative_spending, days_since_last_purchase, ...) agree with the rows
+# while memory stays bounded by the chunk size.
+
+GENERATOR_VERSION = 2
+DEFAULT_ROWS = 1_000_000
+DEFAULT_SEED = 42
+CHUNK_ROWS = 1_000_000
+STORES_PER_MILLION_ROWS = 50
+PRODUCTS_PER_MILLION_ROWS = 2000  # the catalogue grows with the data, never below the real one
+BENCH_DATA_DIR = os.path.join(CACHE_DIR, 'synthetic')
+
+FIRST_DAY = pd.Timestamp('2021-01-01')
+LAST_DAY = pd.Timestamp('2024-12-31')
+FIRST_SIGNUP = pd.Timestamp('2018-01-01')
+REFERENCE_DAY = LAST_DAY  # 'days since' fields count from here
+
+COLUMNS = [
+    'customer_id', 'customer_name', 'city', 'state', 'annual_income', 'signup_date', 'loyalty_status',
+    'days_since_signup', 'days_since_last_purchase', 'transaction_id', 'transaction_date', 'store_id',
+    'store_type', 'payment_method', 'total_items', 'total_sales_per_transaction', 'total_profit_per_transaction',
+    'total_cost', 'product_id', 'product_name', 'category', 'unit_price', 'quantity', 'satisfaction_score',
+    'store_sales', 'store_profit', 'daily_footfall', 'purchase_frequency', 'total_items_bought',
+    'cumulative_spending', 'cumulative_cost', 'average_order_value',
+]
+
+
+def distribution(series):
+    counts = series.value_counts()
+    return counts.index.to_numpy(), (counts / counts.sum()).to_numpy()
+
+
+def source_profile(source=RAW_CSV):
+    # Everything the generator borrows from the real data
+    df = load_transactions(source).dropna(subset=['customer_id', 'product_id'])
+    customers = df.drop_duplicates('customer_id')
+    products = df.drop_duplicates('product_id').sort_values('product_id')
+    names = customers['customer_name'].astype(str).str.split(' ', n=1, expand=True).fillna('')
+    sales = df['total_sales_per_transaction'].to_numpy(dtype=np.float64)
+    margins = pd.Series(np.round(df['total_profit_per_transaction'].to_numpy(dtype=np.float64) / np.maximum(sales, 1), 2))
+    cities = df.drop_duplicates('city')[['city', 'state']].astype(str).sort_values('city')
+    stores = df.drop_duplicates('store_id')
+
+    return {
+        'products': products[['product_id', 'product_name', 'category', 'unit_price']].astype(
+            {'product_id': str, 'product_name': str, 'category': str}
+        ).reset_index(drop=True),
+        'product_weights': df['product_id'].value_counts(normalize=True).reindex(products['product_id']).to_numpy(),
+        'margins': {category: distribution(margins[df['category'].astype(str).to_numpy() == category])
+                    for category in products['category'].astype(str).unique()},
+        'cities': cities['city'].to_numpy(),
+        'states': cities['state'].to_numpy(),
+        'city_weights': customers['city'].astype(str).value_counts(normalize=True).reindex(cities['city']).fillna(0).to_numpy(),
+        'first_names': names[0].unique(),
+        'last_names': names[1].unique(),
+        'log_income': (float(np.log(customers['annual_income']).mean()), float(np.log(customers['annual_income']).std())),
+        'frequency': distribution(customers['purchase_frequency'].astype(int)),
+        'quantity': distribution(df['quantity'].astype(int)),
+        'satisfaction': distribution(df['satisfaction_score'].astype(int)),
+        'loyalty': distribution(customers['loyalty_status'].astype(str)),
+        'payment': distribution(df['payment_method'].astype(str)),
+        'physical_share': float((df['store_type'].astype(str) == 'Physical').mean()),
+        'physical_stores': float((stores['store_type'].astype(str) == 'Physical').mean()),
+        'footfall': (int(df['daily_footfall'].min()), int(df['daily_footfall'].max())),
+        'monthly_store_sales': float(df['store_sales'].mean()),
+    }
+
+
+def extend_products(products, weights, n_products, rng):
+    # Extra catalogue entries are priced variants of the real products
+    if n_products <= len(products):
+        return products, weights
+    base = rng.integers(0, len(products), n_products - len(products))
+    extra = products.iloc[base].reset_index(drop=True)
+    variant = np.arange(len(products), n_products)
+    extra['product_id'] = [f'PROD{i + 1:04d}' for i in variant]
+    # Variants are numbered per base product, so names stay unique however large the catalogue gets
+    extra['product_name'] = extra['product_name'] + ' - Variant ' + (pd.Series(base).groupby(base).cumcount() + 2).astype(str)
+    extra['unit_price'] = np.round(extra['unit_price'].to_numpy() * rng.uniform(0.8, 1.2, len(extra)), -1)
+    weights = np.concatenate([weights, weights[base]])
+    return pd.concat([products, extra], ignore_index=True), weights / weights.sum()
+
+
+def draw(rng, dist, size):
+    values, probabilities = dist
+    return values[rng.choice(len(values), size=size, p=probabilities)]
+
+
+def ids(prefix, numbers, width):
+    return pc.binary_join_element_wise(prefix, pc.utf8_lpad(pa.array(numbers).cast(pa.string()), width, '0'), '')
+
+
+def take(values, codes):
+    return pa.array(values, type=pa.string()).take(pa.array(codes))
+
+
+class Generator:
+    def __init__(self, rows, seed=DEFAULT_SEED, source=RAW_CSV, n_stores=None, n_products=None, chunk_rows=CHUNK_ROWS):
+        # Output is fully determined by these parameters (each chunk has its own seeded stream)
+        self.rows = rows
+        self.seed = seed
+        self.chunk_rows = chunk_rows
+        rng = np.random.default_rng(seed)
+        profile = self.profile = source_profile(source)
+
+        # Transactions per customer, drawn until the row budget is used up
+        values, probabilities = profile['frequency']
+        frequencies = draw(rng, profile['frequency'], int(rows / (values * probabilities).sum() * 1.2) + 1)
+        cumulative = np.cumsum(frequencies)
+        while cumulative[-1] < rows:
+            frequencies = np.concatenate([frequencies, draw(rng, profile['frequency'], len(frequencies))])
+            cumulative = np.cumsum(frequencies)
+        n_customers = int(np.searchsorted(cumulative, rows)) + 1
+        self.frequencies = frequencies[:n_customers].astype(np.int64)
+        self.frequencies[-1] -= cumulative[n_customers - 1] - rows
+        self.n_customers = n_customers
+
+        n_products = n_products or max(len(profile['products']), rows * PRODUCTS_PER_MILLION_ROWS // 1_000_000)
+        self.products, self.product_weights = extend_products(profile['products'], profile['product_weights'], n_products, rng)
+
+        # Stores: a share is physical and tied to one city, the rest serve every city online
+        self.n_stores = n_stores or max(STORES_PER_MILLION_ROWS, rows * STORES_PER_MILLION_ROWS // 1_000_000)
+        physical = rng.random(self.n_stores) < profile['physical_stores']
+        self.store_physical = physical
+        self.store_city = np.where(physical, rng.choice(len(profile['cities']), self.n_stores, p=profile['city_weights']), -1)
+        self.online_stores = np.flatnonzero(~physical)
+        if not len(self.online_stores):
+            self.online_stores = np.arange(self.n_stores)
+        # Physical stores grouped by city: city_stores[city_start[c]:city_start[c] + city_count[c]]
+        self.city_stores = np.flatnonzero(physical)[np.argsort(self.store_city[physical], kind='stable')]
+        self.city_count = np.bincount(self.store_city[physical], minlength=len(profile['cities']))
+        self.city_start = np.concatenate([[0], np.cumsum(self.city_count)[:-1]])
+        # Only customers in a city with a physical store can shop in one; scale up to keep the overall share
+        covered = profile['city_weights'][self.city_count > 0].sum()
+        self.physical_share = min(1.0, profile['physical_share'] / covered) if covered else 0.0
+        self.store_footfall = rng.integers(profile['footfall'][0], profile['footfall'][1] + 1, self.n_stores)
+
+        # Per store and month sales figures (48 months)
+        n_months = (LAST_DAY.year - FIRST_DAY.year) * 12 + LAST_DAY.month - FIRST_DAY.month + 1
+        self.store_sales = np.round(rng.gamma(2.0, profile['monthly_store_sales'] / 2, (self.n_stores, n_months)), -1)
+        self.store_profit = np.round(self.store_sales * rng.uniform(0.15, 0.2, (self.n_stores, n_months)), 1)
+
+        days = pd.date_range(FIRST_SIGNUP, LAST_DAY, freq='D')
+        self.date_strings = days.strftime(DATE_FORMAT).to_numpy()
+        self.day_month = ((days.year - FIRST_DAY.year) * 12 + days.month - FIRST_DAY.month).to_numpy()
+        self.first_day = (FIRST_DAY - FIRST_SIGNUP).days
+        self.reference_day = (REFERENCE_DAY - FIRST_SIGNUP).days
+
+        # Transaction ids: an affine bijection on 0..rows-1, so ids look shuffled without a permutation array
+        self.id_step = next(step for step in range(int(rows * 0.618) | 1, 2 * rows + 3, 2) if np.gcd(step, rows) == 1)
+        self.id_offset = int(rng.integers(0, rows))
+        self.customer_width = max(5, len(str(n_customers)))
+        self.transaction_width = max(5, len(str(rows)))
+        self.store_width = max(4, len(str(self.n_stores)))
+
+    def chunks(self):
+        # Yields pyarrow tables of whole customers, roughly chunk_rows rows each
+        cumulative = np.cumsum(self.frequencies)
+        ends = np.searchsorted(cumulative, np.arange(self.chunk_rows, self.rows, self.chunk_rows), side='right')
+        bounds = [0, *ends.tolist(), self.n_customers]
+        row_start = 0
+        for i, (first, last) in enumerate(zip(bounds[:-1], bounds[1:])):
+            if last > first:
+                table = self._chunk(first, last, row_start, np.random.default_rng([self.seed, i]))
+                row_start += table.num_rows
+                yield table
+
+    def _chunk(self, first, last, row_start, rng):
+        profile = self.profile
+        counts = self.frequencies[first:last]
+        n_customers, n = last - first, int(counts.sum())
+        customer = np.repeat(np.arange(n_customers), counts)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+        # Customers
+        city = rng.choice(len(profile['cities']), n_customers, p=profile['city_weights'])
+        income = np.round(np.exp(rng.normal(*profile['log_income'], n_customers)))
+        loyalty = draw(rng, profile['loyalty'], n_customers)
+        first_names = rng.integers(0, len(profile['first_names']), n_customers)
+        last_names = rng.integers(0, len(profile['last_names']), n_customers)
+
+        # Transactions, grouped by customer
+        day = rng.integers(self.first_day, self.reference_day + 1, n)
+        product = rng.choice(len(self.products), n, p=self.product_weights)
+        quantity = draw(rng, profile['quantity'], n).astype(np.int64)
+        price = self.products['unit_price'].to_numpy(dtype=np.float64)[product]
+        sales = price * quantity
+        categories = self.products['category'].to_numpy()[product]
+        margin = np.empty(n)
+        for category, dist in profile['margins'].items():
+            rows = categories == category
+            margin[rows] = draw(rng, dist, int(rows.sum()))
+        profit = np.round(sales * margin, 2)
+        cost = sales - profit
+
+        # Physical purchases happen in a store in the customer's city, when there is one
+        store = self.online_stores[rng.integers(0, len(self.online_stores), n)]
+        row_city = city[customer]
+        local = (rng.random(n) < self.physical_share) & (self.city_count[row_city] > 0)
+        pick = (rng.random(int(local.sum())) * self.city_count[row_city[local]]).astype(np.int64)
+        store[local] = self.city_stores[self.city_start[row_city[local]] + pick]
+
+        # Per-customer fields derived from the customer's own rows
+        last_day = np.maximum.reduceat(day, starts)
+        first_day = np.minimum.reduceat(day, starts)
+        signup = first_day - rng.integers(0, first_day + 1)
+        spending = np.add.reduceat(sales, starts)
+        customer_cost = np.add.reduceat(cost, starts)
+        items = np.add.reduceat(quantity, starts)
+
+        order = rng.permutation(n)
+        customer, day, product, quantity, sales, profit, cost, store = (
+            a[order] for a in (customer, day, product, quantity, sales, profit, cost, store)
+        )
+        transaction = (self.id_step * (row_start + order) + self.id_offset) % self.rows + 1
+        month = self.day_month[day]
+        customer_numbers = first + customer + 1
+
+        columns = {
+            'customer_id': ids('CUST', customer_numbers, self.customer_width),
+            'customer_name': pc.binary_join_element_wise(
+                take(profile['first_names'], first_names[customer]), take(profile['last_names'], last_names[customer]), ' '
+            ),
+            'city': take(profile['cities'], row_city[order]),
+            'state': take(profile['states'], row_city[order]),
+            'annual_income': income[customer].astype(np.int64),
+            'signup_date': take(self.date_strings, signup[customer]),
+            'loyalty_status': pa.array(loyalty[customer], type=pa.string()),
+            'days_since_signup': (self.reference_day - signup)[customer],
+            'days_since_last_purchase': (self.reference_day - last_day)[customer],
+            'transaction_id': ids('TRANS', transaction, self.transaction_width),
+            'transaction_date': take(self.date_strings, day),
+            'store_id': ids('STORE', store + 1, self.store_width),
+            'store_type': take(['Online', 'Physical'], self.store_physical[store].astype(np.int8)),
+            'payment_method': pa.array(draw(rng, profile['payment'], n), type=pa.string()),
+            'total_items': quantity,
+            'total_sales_per_transaction': sales.astype(np.int64),
+            'total_profit_per_transaction': profit,
+            'total_cost': cost,
+            'product_id': take(self.products['product_id'].to_numpy(), product),
+            'product_name': take(self.products['product_name'].to_numpy(), product),
+            'category': take(self.products['category'].to_numpy(), product),
+            'unit_price': self.products['unit_price'].to_numpy(dtype=np.float64)[product].astype(np.int64),
+            'quantity': quantity,
+            'satisfaction_score': draw(rng, profile['satisfaction'], n),
+            'store_sales': self.store_sales[store, month],
+            'store_profit': self.store_profit[store, month],
+            'daily_footfall': self.store_footfall[store],
+            'purchase_frequency': counts[customer],
+            'total_items_bought': items[customer],
+            'cumulative_spending': spending[customer],
+            'cumulative_cost': np.round(customer_cost[customer], 2),
+            'average_order_value': np.round(spending / counts, 2)[customer],
+        }
+        return pa.table({name: columns[name] for name in COLUMNS})
+
+    def write(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        writer = None
+        try:
+            for table in self.chunks():
+                if writer is None:
+                    writer = pa_csv.CSVWriter(tmp, table.schema, write_options=pa_csv.WriteOptions(quoting_style='needed'))
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+        os.replace(tmp, path)
+
+        meta = self.meta()
+        with open(f'{path}.json', 'w') as f:
+            json.dump(meta, f, indent=4)
+        return meta
+
+    def meta(self):
+        return {
+            'generator_version': GENERATOR_VERSION,
+            'rows': self.rows,
+            'seed': self.seed,
+            'customers': self.n_customers,
+            'stores': self.n_stores,
+            'products': len(self.products),
+            'chunk_rows': self.chunk_rows,
+        }
+
+
+def dataset_dir(rows, seed=DEFAULT_SEED, base_dir=BENCH_DATA_DIR):
+    return os.path.join(base_dir, f'{rows}_{seed}')
+
+
+def generate(rows, seed=DEFAULT_SEED, path=None, source=RAW_CSV, n_stores=None, n_products=None, chunk_rows=CHUNK_ROWS):
+    # Reuses an existing file generated with the same parameters
+    path = path or os.path.join(dataset_dir(rows, seed), os.path.basename(RAW_CSV))
+    generator = Generator(rows, seed, source, n_stores, n_products, chunk_rows)
+    try:
+        with open(f'{path}.json') as f:
+            if json.load(f) == generator.meta() and os.path.exists(path):
+                return path, generator.meta()
+    except (OSError, ValueError):
+        pass
+    return path, generator.write(path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate synthetic transactions in the dataset schema')
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS)
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--output', help='CSV path (default: <cache>/synthetic/<rows>_<seed>/<dataset name>)')
+    parser.add_argument('--stores', type=int, help=f'default: {STORES_PER_MILLION_ROWS} per million rows (at least {STORES_PER_MILLION_ROWS})')
+    parser.add_argument('--products', type=int,
+                        help=f'catalogue size, default: {PRODUCTS_PER_MILLION_ROWS} per million rows (at least the real '
+                             'catalogue); extra products are variants of the real ones')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--source', default=RAW_CSV, help='CSV the vocabularies and distributions are taken from')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    path, meta = generate(args.rows, args.seed, args.output, args.source, args.stores, args.products, args.chunk_rows)
+    print(f"✅ {meta['rows']} rows ({meta['customers']} customers, {meta['stores']} stores, "
+          f"{meta['products']} products) at '{path}' in {time.perf_counter() - start:.1f}s")
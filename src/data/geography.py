@@ -1,19 +1,21 @@
-from flask import Flask, jsonify
-from flask_cors import CORS
-import pandas as pd
+from flask import Blueprint, jsonify, request, Response
+from datetime import datetime, timezone
+import hashlib
+import threading
 import os
+from data_store import load_transactions, source_signature, RAW_CSV
+from api import create_app
 
-app = Flask(__name__)
-CORS(app)  
+blueprint = Blueprint('geography', __name__)
 
-DATA_FILE = '/Users/apple/Desktop/Blazebuilders/Deloitte_Round_3/react-app/public/data/indian_retail_data_audi_2028.csv'  
+DATA_FILE = RAW_CSV
 
 def load_and_validate_data():
     try:
         if not os.path.exists(DATA_FILE):
             raise FileNotFoundError(f"Dataset file {DATA_FILE} not found")
         
-        df = pd.read_csv(DATA_FILE)
+        df = load_transactions(DATA_FILE)
         
         required_columns = [
             'city', 'store_type', 'total_sales_per_transaction', 'store_profit',
@@ -38,72 +40,113 @@ tier_cities = {
                'Shillong', 'Shimla', 'Nainital', 'Mysore', 'Kota', 'Srinagar', 'Amritsar', 'Varanasi', 'Ujjain']
 }
 
-def assign_tier(city):
-    for tier, cities in tier_cities.items():
-        if city in cities:
-            return tier
-    return 'Tier 3'
+# City -> tier lookup; unlisted cities are Tier 3
+city_tier = {city: tier for tier, cities in tier_cities.items() for city in cities}
+
+# City x store type aggregates
+CUBE_AGGREGATES = {
+    'total_sales_per_transaction': 'sum',
+    'store_profit': 'sum',
+    'daily_footfall': 'mean',
+    'average_order_value': 'mean',
+    'cumulative_spending': 'sum',
+    'transaction_id': 'count',
+    'customer_id': 'nunique'
+}
 
-@app.route('/api/analyze_stores', methods=['GET'])
+def build_cube(df):
+    cube = df.groupby(['city', 'store_type'], observed=True).agg(CUBE_AGGREGATES).reset_index()
+    cube[['city', 'store_type']] = cube[['city', 'store_type']].astype(str)
+    return cube
+
+def analyze_cube(city_store_analysis):
+    # Split into Online and Physical Stores
+    online_city_data = city_store_analysis[city_store_analysis['store_type'] == 'Online'].copy()
+    physical_city_data = city_store_analysis[city_store_analysis['store_type'] == 'Physical'].copy()
+
+    # Add tier column to online data Stores
+    online_city_data['tier'] = online_city_data['city'].map(city_tier).fillna('Tier 3')
+
+    # Cities with only online stores
+    recommended_physical_store_cities = online_city_data[~online_city_data['city'].isin(physical_city_data['city'])].copy()
+    recommended_physical_store_cities = recommended_physical_store_cities.sort_values(
+        by=['total_sales_per_transaction', 'cumulative_spending'], ascending=[False, False]
+    )
+
+    # Split recommendations acc to tier
+    tier_1_recommendations = recommended_physical_store_cities[recommended_physical_store_cities['tier'] == 'Tier 1']
+    tier_2_recommendations = recommended_physical_store_cities[recommended_physical_store_cities['tier'] == 'Tier 2']
+    tier_3_recommendations = recommended_physical_store_cities[recommended_physical_store_cities['tier'] == 'Tier 3']
+
+    # Convert to JSON format
+    response = {
+        'tier_1_recommendations': tier_1_recommendations.to_dict(orient='records'),
+        'tier_2_recommendations': tier_2_recommendations.to_dict(orient='records'),
+        'tier_3_recommendations': tier_3_recommendations.to_dict(orient='records'),
+        'physical_store_locations': physical_city_data.to_dict(orient='records')  # All physical stores are included here
+    }
+
+    return response
+
+# The cube and its serialised response, rebuilt only when the data file changes
+cube_lock = threading.Lock()
+cube_state = {'signature': None}
+
+def current_cube():
+    signature = source_signature(DATA_FILE)
+    if cube_state['signature'] != signature:
+        with cube_lock:
+            if cube_state['signature'] != signature:
+                cube = build_cube(load_and_validate_data())
+                body = jsonify({'status': 'success', 'data': analyze_cube(cube)}).get_data()
+                cube_state.update({
+                    'cube': cube,
+                    'body': body,
+                    'etag': hashlib.sha256(body).hexdigest()[:16],
+                    'last_modified': datetime.fromtimestamp(signature['mtime_ns'] // 10**9, timezone.utc),
+                    'signature': signature,
+                })
+    return cube_state
+
+@blueprint.route('/api/analyze_stores', methods=['GET'])
 def analyze_stores():
     try:
-        df = load_and_validate_data()
-
-        # Group data by city and store type
-        city_store_analysis = df.groupby(['city', 'store_type']).agg({
-            'total_sales_per_transaction': 'sum',
-            'store_profit': 'sum',
-            'daily_footfall': 'mean',
-            'average_order_value': 'mean',
-            'cumulative_spending': 'sum',
-            'transaction_id': 'count',
-            'customer_id': pd.Series.nunique
-        }).reset_index()
-
-        # Split into Online and Physical Stores
-        online_city_data = city_store_analysis[city_store_analysis['store_type'] == 'Online'].copy()
-        physical_city_data = city_store_analysis[city_store_analysis['store_type'] == 'Physical'].copy()
-
-        # Add tier column to online data Stores
-        online_city_data['tier'] = online_city_data['city'].apply(assign_tier)
-
-        # Cities with only online stores
-        recommended_physical_store_cities = online_city_data[~online_city_data['city'].isin(physical_city_data['city'])].copy()
-        recommended_physical_store_cities = recommended_physical_store_cities.sort_values(
-            by=['total_sales_per_transaction', 'cumulative_spending'], ascending=[False, False]
-        )
-
-        # Split recommendations acc to tier
-        tier_1_recommendations = recommended_physical_store_cities[recommended_physical_store_cities['tier'] == 'Tier 1']
-        tier_2_recommendations = recommended_physical_store_cities[recommended_physical_store_cities['tier'] == 'Tier 2']
-        tier_3_recommendations = recommended_physical_store_cities[recommended_physical_store_cities['tier'] == 'Tier 3']
-
-        # Convert to JSON format
-        response = {
-            'tier_1_recommendations': tier_1_recommendations.to_dict(orient='records'),
-            'tier_2_recommendations': tier_2_recommendations.to_dict(orient='records'),
-            'tier_3_recommendations': tier_3_recommendations.to_dict(orient='records'),
-            'physical_store_locations': physical_city_data.to_dict(orient='records')  # All physical stores are included here
-        }
-
-        return jsonify({
-            'status': 'success',
-            'data': response
-        })
-
+        if not os.path.exists(DATA_FILE):
+            raise FileNotFoundError(f"Dataset file {DATA_FILE} not found")
+        state = current_cube()
     except Exception as e:
         return jsonify({
             'status': 'error',
             'message': str(e)
         }), 500
 
-@app.errorhandler(404)
+    response = Response(state['body'], mimetype='application/json')
+    response.set_etag(state['etag'])
+    response.last_modified = state['last_modified']
+    response.cache_control.no_cache = True  # clients revalidate, which costs a 304
+    return response.make_conditional(request)
+
+# Scoped to this blueprint, so other services mounted next to it keep their own error pages
+@blueprint.errorhandler(404)
 def not_found(error):
     return jsonify({'status': 'error', 'message': 'Resource not found'}), 404
 
-@app.errorhandler(500)
+@blueprint.errorhandler(500)
 def internal_error(error):
     return jsonify({'status': 'error', 'message': 'Internal server error'}), 500
 
+app = create_app([blueprint])
+# Standalone, unknown URLs get the same JSON body as before
+app.register_error_handler(404, not_found)
+app.register_error_handler(500, internal_error)
+
+# Built at import, i.e. inside api.load_app() before gc.freeze(), so preloaded
+# workers share one cube instead of each building it on its first request
+try:
+    with app.app_context():
+        current_cube()
+except Exception as e:
+    print(f"Error loading data: {e}")
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5008)
\ No newline at end of file
@@ -0,0 +1,214 @@
+import os
+import json
+import hashlib
+import argparse
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+from data_store import (
+    load_transactions, read_csv_delta, build_store, store_paths, RAW_CSV, CACHE_DIR, OUTPUT_DIR, SCHEMA_VERSION,
+)
+from batch_metrics import compute_aggregates, OUTPUTS, COLUMNS
+
+# Append-only refresh of the batch_metrics outputs. A checkpoint records how
+# far into the raw CSV we have folded; later runs parse only the appended
+# bytes and merge their aggregates into the persisted state. Anything that
+# does not look like a pure append triggers a full rebuild.
+
+STATE_DIR = os.path.join(CACHE_DIR, 'batch_state')
+CHECKPOINT_FILE = os.path.join(STATE_DIR, 'checkpoint.json')
+STATE_FRAMES = ['daily', 'customers', 'products', 'product_customers']
+
+# Sampled blocks of the already-processed bytes used to detect rewritten history
+# (files up to FINGERPRINT_BLOCK * FINGERPRINT_SAMPLES bytes are hashed in full)
+FINGERPRINT_BLOCK = 64 * 1024
+FINGERPRINT_SAMPLES = 64
+
+
+def history_fingerprint(source, offset):
+    h = hashlib.sha256()
+    starts = np.linspace(0, max(offset - FINGERPRINT_BLOCK, 0), FINGERPRINT_SAMPLES).astype(np.int64)
+    with open(source, 'rb') as f:
+        for start in np.unique(starts):
+            f.seek(start)
+            h.update(f.read(min(FINGERPRINT_BLOCK, offset - start)))
+    return h.hexdigest()
+
+
+def state_from_aggregates(agg):
+    pair_products, pair_customers = agg['product_customer_pairs']
+    return {
+        'daily': pd.DataFrame(
+            {'sales': agg['daily_sales'], 'profit': agg['daily_profit']},
+            index=pd.DatetimeIndex(agg['days'], name='day'),
+        ),
+        'customers': pd.DataFrame(
+            {'sales': agg['customer_sales'], 'transactions': agg['customer_transactions']},
+            index=pd.Index(agg['customers'], name='customer_id'),
+        ),
+        'products': agg['product_info'].set_index(pd.Index(agg['products'], name='product_id')),
+        'product_customers': pd.DataFrame({
+            'product_id': np.asarray(agg['products'])[pair_products],
+            'customer_id': np.asarray(agg['customers'])[pair_customers],
+        }),
+    }
+
+
+def aggregates_from_state(state, sales_is_integral):
+    daily = state['daily'].sort_index()
+    customers = state['customers'].sort_index()
+    products = state['products'].sort_index()
+    product_customers = state['product_customers'].groupby('product_id').size().reindex(products.index, fill_value=0)
+    return {
+        'days': daily.index,
+        'daily_sales': daily['sales'].to_numpy(),
+        'daily_profit': daily['profit'].to_numpy(),
+        'sales_is_integral': sales_is_integral,
+        'customers': customers.index,
+        'customer_sales': customers['sales'].to_numpy(),
+        'customer_transactions': customers['transactions'].to_numpy(),
+        'products': products.index,
+        'product_info': products.reset_index(drop=True),
+        'product_customers': product_customers.to_numpy(),
+    }
+
+
+def merge_state(state, delta):
+    customers = state['customers'].add(delta['customers'], fill_value=0)
+    customers['transactions'] = customers['transactions'].astype(np.int64)
+    new_products = delta['products'][~delta['products'].index.isin(state['products'].index)]
+    return {
+        'daily': state['daily'].add(delta['daily'], fill_value=0),
+        'customers': customers,
+        'products': pd.concat([state['products'], new_products]),
+        'product_customers': pd.concat(
+            [state['product_customers'], delta['product_customers']], ignore_index=True
+        ).drop_duplicates(),
+    }
+
+
+def load_checkpoint():
+    try:
+        with open(CHECKPOINT_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_state():
+    state = {}
+    for name in STATE_FRAMES:
+        frame = feather.read_feather(os.path.join(STATE_DIR, f'{name}.feather'))
+        state[name] = frame if name == 'product_customers' else frame.set_index(frame.columns[0])
+    return state
+
+
+def save_state(state, checkpoint):
+    os.makedirs(STATE_DIR, exist_ok=True)
+    for name in STATE_FRAMES:
+        frame = state[name] if name == 'product_customers' else state[name].reset_index()
+        feather.write_feather(frame.reset_index(drop=True), os.path.join(STATE_DIR, f'{name}.feather'))
+    # Checkpoint goes last so an interrupted save is never mistaken for a valid one
+    tmp = f'{CHECKPOINT_FILE}.{os.getpid()}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(checkpoint, f, indent=4)
+    os.replace(tmp, CHECKPOINT_FILE)
+
+
+def _make_checkpoint(source, offset, df, previous=None):
+    last_date = df['transaction_date'].max() if len(df) else None
+    if previous and (last_date is None or str(last_date.date()) < previous['last_transaction_date']):
+        last_date = pd.Timestamp(previous['last_transaction_date'])
+    return {
+        'source': os.path.abspath(source),
+        'schema_version': SCHEMA_VERSION,
+        'offset': offset,
+        'fingerprint': history_fingerprint(source, offset),
+        'rows': len(df) + (previous['rows'] if previous else 0),
+        'last_transaction_date': str(last_date.date()) if last_date is not None else None,
+        'last_transaction_id': df['transaction_id'].iloc[-1] if len(df) else (previous or {}).get('last_transaction_id'),
+        'sales_is_integral': bool(
+            pd.api.types.is_integer_dtype(df['total_sales_per_transaction'])
+            and (previous['sales_is_integral'] if previous else True)
+        ),
+    }
+
+
+def _write_outputs(agg, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    for name, (file_name, build, write) in OUTPUTS.items():
+        write(build(agg), os.path.join(output_dir, file_name))
+
+
+def full_refresh(source=RAW_CSV, output_dir=OUTPUT_DIR):
+    build_store(source)
+    with open(store_paths(source)[1]) as f:
+        offset = json.load(f)['size']
+
+    df = load_transactions(source, columns=COLUMNS)
+    agg = compute_aggregates(df)
+    _write_outputs(agg, output_dir)
+    save_state(state_from_aggregates(agg), _make_checkpoint(source, offset, df))
+    return len(df)
+
+
+def _history_changed(checkpoint, source):
+    # Returns the reason a full rebuild is needed, or None for a clean append
+    if checkpoint is None:
+        return 'no checkpoint'
+    if checkpoint['source'] != os.path.abspath(source) or checkpoint['schema_version'] != SCHEMA_VERSION:
+        return 'source or schema changed'
+    if not all(os.path.exists(os.path.join(STATE_DIR, f'{name}.feather')) for name in STATE_FRAMES):
+        return 'state files missing'
+    offset = checkpoint['offset']
+    if os.path.getsize(source) < offset:
+        return 'source was truncated'
+    with open(source, 'rb') as f:
+        f.seek(offset - 1)
+        if f.read(1) != b'\n':
+            return 'last processed row was incomplete'
+    if history_fingerprint(source, offset) != checkpoint['fingerprint']:
+        return 'processed history was modified'
+    return None
+
+
+def incremental_refresh(source=RAW_CSV, output_dir=OUTPUT_DIR):
+    checkpoint = load_checkpoint()
+    reason = _history_changed(checkpoint, source)
+    if reason is None and os.path.getsize(source) == checkpoint['offset']:
+        print("✅ No new transactions since the last refresh")
+        return 0
+
+    if reason is None:
+        delta, offset = read_csv_delta(source, checkpoint['offset'])
+        delta = delta[COLUMNS]
+        if len(delta) and str(delta['transaction_date'].min().date()) < checkpoint['last_transaction_date']:
+            reason = 'late-arriving transactions'
+        elif checkpoint['last_transaction_id'] in set(delta['transaction_id']):
+            reason = 'processed transactions were replayed'
+
+    if reason is not None:
+        print(f"⚠️ Full rebuild: {reason}")
+        return full_refresh(source, output_dir)
+
+    new_checkpoint = _make_checkpoint(source, offset, delta, checkpoint)
+    state = load_state()
+    if len(delta):
+        state = merge_state(state, state_from_aggregates(compute_aggregates(delta)))
+    _write_outputs(aggregates_from_state(state, new_checkpoint['sales_is_integral']), output_dir)
+    save_state(state, new_checkpoint)
+    return len(delta)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fold newly appended transactions into the precomputed metrics')
+    parser.add_argument('--source', default=RAW_CSV)
+    parser.add_argument('--output-dir', default=OUTPUT_DIR)
+    parser.add_argument('--full', action='store_true', help='ignore the checkpoint and rebuild from scratch')
+    args = parser.parse_args()
+
+    if args.full:
+        rows = full_refresh(args.source, args.output_dir)
+    else:
+        rows = incremental_refresh(args.source, args.output_dir)
+    print(f"✅ Processed {rows} transactions into '{args.output_dir}'")
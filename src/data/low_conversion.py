@@ -1,48 +1,30 @@
-import pandas as pd
-import numpy as np
-
-file_path = '/Users/apple/Desktop/Blazebuilders/Deloitte_Round_3/react-app/public/data/indian_retail_data_audi_2028.csv'
-df = pd.read_csv(file_path)
-
-# Ensure datetime columns are in the correct format (DD-MM-YYYY)
-df['transaction_date'] = pd.to_datetime(df['transaction_date'], format='%d-%m-%Y')
-df['signup_date'] = pd.to_datetime(df['signup_date'], format='%d-%m-%Y')
-
-
+import os
+import argparse
+from batch_metrics import run
+from data_store import load_transactions, OUTPUT_DIR
+from conversion_cube import ConversionCube, COLUMNS, DIMENSIONS
+
+parser = argparse.ArgumentParser(description='Product conversion rates and low-converter lists per slice')
+parser.add_argument('--by', nargs='*', choices=DIMENSIONS, default=['city', 'month'],
+                    help='write low_conversion_by_<dimension>.json for each dimension')
+parser.add_argument('--start', help="first month of the window ('YYYY-MM')")
+parser.add_argument('--end', help="last month of the window ('YYYY-MM')")
+parser.add_argument('--output-dir', default=OUTPUT_DIR)
+parser.add_argument('--skip-rates', action='store_true',
+                    help="don't write product_conversion_rates.json (run_all.py leaves it to batch_metrics)")
+args = parser.parse_args()
+
+# Thin entry point kept for compatibility; the metrics come from batch_metrics.py
 # Conversion rate = (number of unique customers who bought the product / total unique customers) * 100
-
-num_customers = df['customer_id'].nunique()  # Total unique customers in the dataset
-
-product_conversion = df.groupby(['product_id', 'product_name', 'category']).agg({
-    'customer_id': 'nunique',  # Number of unique customers who bought the product
-    'total_sales_per_transaction': 'sum'
-}).reset_index()
-
-# Calculate conversion rate for each product
-product_conversion['conversion_rate'] = (product_conversion['customer_id'] / num_customers) * 100
-
-# Map acc to values
-def categorize_conversion(rate):
-    if rate <= 8:
-        return 'Low Conversion (≤8%)'
-    elif 9 <= rate <= 25:
-        return 'Medium Conversion (9%–25%)'
-    else:
-        return 'High Conversion (>25%)'
-
-# Apply categorization acc to our values
-product_conversion['conversion_category'] = product_conversion['conversion_rate'].apply(categorize_conversion)
-
-# Filter low conversion products (conversion rate ≤ 8%)
-low_conversion_products = product_conversion[product_conversion['conversion_rate'] <= 8]
-
-# Prepare data for JSON format
-conversion_data_json = product_conversion[['product_name', 'category', 'conversion_rate', 'conversion_category']]
-
-
-output_file_path = 'public/data/product_conversion_rates.json'
-conversion_data_json.to_json(output_file_path, orient='records', lines=False)  
-
-
-print(f"Product conversion rates saved to {output_file_path}")
-
+if not args.skip_rates:
+    output_file_path, product_conversion = run(['product_conversion_rates'], args.output_dir)['product_conversion_rates']
+    print(f"Product conversion rates saved to {output_file_path}")
+
+# Per-slice low converters, all rolled up from one conversion cube
+os.makedirs(args.output_dir, exist_ok=True)
+cube = ConversionCube.build(load_transactions(columns=COLUMNS))
+for dimension in args.by:
+    low = cube.low_converters([dimension], start=args.start, end=args.end)
+    path = os.path.join(args.output_dir, f'low_conversion_by_{dimension}.json')
+    low.to_json(path, orient='records', lines=False)
+    print(f"✅ {len(low)} low converters by {dimension} saved to '{path}'")
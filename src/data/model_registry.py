@@ -0,0 +1,156 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import inspect
+import argparse
+import importlib
+import joblib
+import numpy as np
+import pandas as pd
+from data_store import CACHE_DIR
+
+# Fitted-model registry. Every model is stored as <name>.joblib next to a
+# small <name>.json manifest holding the fingerprint of its training data and
+# hyperparameters. Services call load_or_train at startup: the manifest is
+# checked first and the model is only refitted when the fingerprint differs.
+
+REGISTRY_DIR = os.path.join(CACHE_DIR, 'models')
+
+# Registered model -> module whose load_model() loads (or trains) it on the current data
+MODELS = {
+    'cltv': 'cltv_engine',
+    'forecast': 'sales_forecast',
+    'recommender': 'recommender',
+    'basket': 'basket',
+    'segmentation': 'segmentation',
+}
+
+# Set by `model_registry.py train --force` to ignore stored artifacts
+FORCE_ENV = 'SUPERMART_RETRAIN'
+
+
+def artifact_paths(name, registry_dir=None):
+    registry_dir = registry_dir or REGISTRY_DIR
+    return os.path.join(registry_dir, f'{name}.joblib'), os.path.join(registry_dir, f'{name}.json')
+
+
+def fingerprint(*parts):
+    # Stable hash over arrays, frames, series and plain (JSON-serialisable) values
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, (pd.DataFrame, pd.Series)):
+            h.update(pd.util.hash_pandas_object(part, index=True).to_numpy().tobytes())
+            h.update(str(list(part.columns) if isinstance(part, pd.DataFrame) else part.name).encode())
+        elif isinstance(part, np.ndarray):
+            if part.dtype == object:
+                h.update('\x1f'.join(map(str, part.ravel())).encode())
+            else:
+                h.update(np.ascontiguousarray(part).tobytes())
+            h.update(f'{part.dtype}{part.shape}'.encode())
+        else:
+            h.update(json.dumps(part, sort_keys=True, default=str).encode())
+        h.update(b'\x1e')
+    return h.hexdigest()
+
+
+def read_manifest(name, registry_dir=None):
+    try:
+        with open(artifact_paths(name, registry_dir)[1]) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load(name, expected_fingerprint, registry_dir=None, mmap_mode=None):
+    # The stored model, or None when it is missing, stale or unreadable
+    manifest = read_manifest(name, registry_dir)
+    if not manifest or manifest.get('fingerprint') != expected_fingerprint:
+        return None
+    try:
+        return joblib.load(artifact_paths(name, registry_dir)[0], mmap_mode=mmap_mode)
+    except Exception:
+        return None
+
+
+def load_latest(name, registry_dir=None, mmap_mode=None):
+    # Whatever was trained last, regardless of fingerprint (for services that must not refit)
+    if read_manifest(name, registry_dir) is None:
+        return None
+    try:
+        return joblib.load(artifact_paths(name, registry_dir)[0], mmap_mode=mmap_mode)
+    except Exception:
+        return None
+
+
+def save(name, model, model_fingerprint, registry_dir=None, **info):
+    model_path, manifest_path = artifact_paths(name, registry_dir)
+    os.makedirs(os.path.dirname(model_path), exist_ok=True)
+
+    tmp = f'{model_path}.{os.getpid()}.tmp'
+    joblib.dump(model, tmp)
+    os.replace(tmp, model_path)
+
+    # Manifest last, so a crash mid-save never pairs a new fingerprint with an old model
+    tmp = f'{manifest_path}.{os.getpid()}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({'name': name, 'fingerprint': model_fingerprint, 'saved_at': time.time(), **info}, f, indent=4)
+    os.replace(tmp, manifest_path)
+
+
+def load_or_train(name, model_fingerprint, train, registry_dir=None, mmap_mode=None):
+    if not os.environ.get(FORCE_ENV):
+        model = load(name, model_fingerprint, registry_dir, mmap_mode)
+        if model is not None:
+            print(f"✅ Loaded {name} model from registry")
+            return model
+
+    print(f"🔄 Training {name} model ...")
+    start = time.perf_counter()
+    model = train()
+    save(name, model, model_fingerprint, registry_dir, train_seconds=round(time.perf_counter() - start, 3))
+    if mmap_mode:
+        return joblib.load(artifact_paths(name, registry_dir)[0], mmap_mode=mmap_mode)
+    return model
+
+
+def train_models(names, force=False, workers=None):
+    # Offline training with the same inputs and settings the services load with;
+    # models that fit in a process pool (load_model(workers=...)) get the worker count
+    if force:
+        os.environ[FORCE_ENV] = '1'
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    for name in names:
+        start = time.perf_counter()
+        load_model = importlib.import_module(MODELS[name]).load_model
+        load_model(**({'workers': workers} if 'workers' in inspect.signature(load_model).parameters else {}))
+        print(f"✅ {name} ready in {time.perf_counter() - start:.2f}s")
+
+
+def list_models():
+    print(f"{'model':<14}{'fingerprint':<18}{'trained (s)':>12}  saved at")
+    for name in MODELS:
+        manifest = read_manifest(name)
+        if manifest is None:
+            print(f"{name:<14}{'-':<18}{'-':>12}  not trained")
+            continue
+        saved_at = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(manifest['saved_at']))
+        print(f"{name:<14}{manifest['fingerprint'][:16]:<18}{manifest.get('train_seconds', 0):>12.2f}  {saved_at}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Train or inspect the persisted service models')
+    commands = parser.add_subparsers(dest='command', required=True)
+    train_parser = commands.add_parser('train', help='train models whose fingerprint changed')
+    train_parser.add_argument('--models', nargs='+', choices=list(MODELS), default=list(MODELS))
+    train_parser.add_argument('--force', action='store_true', help='retrain even if the stored model is current')
+    train_parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                              help='processes for models that fit many series in parallel')
+    commands.add_parser('list', help='show stored models')
+    args = parser.parse_args()
+
+    if args.command == 'train':
+        train_models(args.models, args.force, args.workers)
+    else:
+        list_models()
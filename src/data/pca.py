@@ -1,118 +1,116 @@
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans
-from sklearn.decomposition import PCA
-from sklearn.metrics import silhouette_score
-from tabulate import tabulate
 import os
+import json
+import argparse
+from data_store import load_transactions, OUTPUT_DIR
+import segmentation
+from segmentation import FEATURES
+
+parser = argparse.ArgumentParser(description='Segment customers and save customer_segments.csv')
+parser.add_argument('--mode', choices=segmentation.MODES, default='full',
+                    help="'minibatch' streams customers through MiniBatchKMeans in batches")
+parser.add_argument('--k', default=str(segmentation.DEFAULT_K),
+                    help="number of segments, or 'auto' to sweep k and seeds and pick the best")
+parser.add_argument('--k-range', type=int, nargs=2, default=[segmentation.K_RANGE.start, segmentation.K_RANGE.stop - 1],
+                    metavar=('MIN', 'MAX'), help='k values tried by --k auto')
+parser.add_argument('--seeds', type=int, nargs='+', default=segmentation.SWEEP_SEEDS)
+parser.add_argument('--bootstrap', type=int, default=segmentation.BOOTSTRAP_ROUNDS, help='bootstrap rounds for stability')
+parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+parser.add_argument('--silhouette-sample', type=int, default=segmentation.SILHOUETTE_SAMPLE,
+                    help='customers sampled for the silhouette estimate')
+parser.add_argument('--report', action='store_true',
+                    help='pretty-print tables and save a scatter plot (needs tabulate, matplotlib and seaborn)')
+args = parser.parse_args()
+
+# Segment colours, shared by the chart payload and the report plot
+cluster_colors = {
+    'Loyal Customers': '#4CAF50',    # Green
+    'Big Spenders': '#2196F3',       # Blue
+    'Occasional Shoppers': '#FF9800', # Orange
+    'At-Risk Customers': '#F44336'    # Red
+}
+
+def show(title, frame):
+    # Plotting and reporting libraries are only imported in --report mode
+    if args.report:
+        from tabulate import tabulate
+        print(f"\n{title}:\n", tabulate(frame, headers='keys', tablefmt='pretty', showindex=True))
+    else:
+        print(f"\n{title}:\n", frame.to_string())
 
-output_dir = "public/data"
+output_dir = OUTPUT_DIR
 os.makedirs(output_dir, exist_ok=True)
 
 # Load the dataset
 try:
-    df = pd.read_csv("/Users/apple/Desktop/Blazebuilders/Deloitte_Round_3/react-app/public/data/indian_retail_data_audi_2028.csv")
+    df = load_transactions()
 except FileNotFoundError:
     print("Error: 'indian_retail_data_audi_2028.csv' not found. Please ensure the file exists.")
     exit()
 
 # Aggregate Customer Data
-customer_data = df.groupby('customer_id').agg({
-    'days_since_last_purchase': 'min',  # Most recent purchases
-    'purchase_frequency': 'mean',       # Number of transactions
-    'cumulative_spending': 'mean',      # Total spending
-    'annual_income': 'mean',            # Customer income
-    'days_since_signup': 'mean'         # Tenure
-}).reset_index()
+customer_data = segmentation.customer_features(df)
 
 # Check for missing values
 print("Missing Values in customer_data:\n", customer_data.isnull().sum())
 customer_data = customer_data.dropna()
 
-#Select features for clustering (RFM + extras)
-features = customer_data[['days_since_last_purchase', 'purchase_frequency', 
-                         'cumulative_spending', 'annual_income', 'days_since_signup']]
-
-#Standardize the features
-scaler = StandardScaler()
-scaled_features = scaler.fit_transform(features)
-
-#Apply PCA for Dimensionality Reduction (2D)
-pca = PCA(n_components=2)
-pca_features = pca.fit_transform(scaled_features)
+# Standardize, project to 2D with PCA and cluster (RFM + extras); the fitted
+# scaler, PCA and centroids are reused from the registry while the data is unchanged
+if args.k == 'auto':
+    sweep_results = segmentation.sweep(
+        customer_data, range(args.k_range[0], args.k_range[1] + 1), args.seeds, args.mode, args.workers,
+        args.silhouette_sample, args.bootstrap
+    )
+    k, seed, per_k = segmentation.choose_k(sweep_results)
+    show("Segmentation Sweep", per_k)
+    print(f"Selected k={k} (seed {seed})")
+else:
+    k, seed = int(args.k), segmentation.SEED
+
+model = segmentation.load_or_train(customer_data, k, args.mode, seed, args.silhouette_sample)
+clusters, segments, pca_features = model.assign(customer_data[FEATURES])
 
 customer_data['PCA1'] = pca_features[:, 0]
 customer_data['PCA2'] = pca_features[:, 1]
+customer_data['Cluster'] = clusters
 
-# Step 5: Apply K-means clustering with k=4
-kmeans = KMeans(n_clusters=4, random_state=42, n_init=10)
-customer_data['Cluster'] = kmeans.fit_predict(scaled_features)
-
-# Step 6: Analyze cluster characteristics
-cluster_summary = customer_data.groupby('Cluster').agg({
-    'days_since_last_purchase': 'mean',
-    'purchase_frequency': 'mean',
-    'cumulative_spending': 'mean',
-    'annual_income': 'mean',
-    'days_since_signup': 'mean',
-    'customer_id': 'count'
-}).rename(columns={'customer_id': 'count'})
-print("\nCluster Summary:\n", tabulate(cluster_summary, headers='keys', tablefmt='pretty', showindex=True))
-
-# Step 7: Assign predefined labels based on cluster characteristics
-def label_clusters(summary):
-    labels = {}
-    available_clusters = set(summary.index)
-
-    # 1. Loyal Customers: High frequency, low recency
-    loyal_score = summary['purchase_frequency'] - summary['days_since_last_purchase']
-    loyal_idx = loyal_score.idxmax()
-    labels[loyal_idx] = 'Loyal Customers'
-    available_clusters.remove(loyal_idx)
-
-    # 2. Big Spenders: Highest cumulative spending
-    big_spender_idx = summary.loc[list(available_clusters), 'cumulative_spending'].idxmax()
-    labels[big_spender_idx] = 'Big Spenders'
-    available_clusters.remove(big_spender_idx)
-
-    # 3. At-Risk Customers: High recency, low frequency
-    at_risk_score = summary['days_since_last_purchase'] - summary['purchase_frequency']
-    at_risk_idx = at_risk_score[list(available_clusters)].idxmax()
-    labels[at_risk_idx] = 'At-Risk Customers'
-    available_clusters.remove(at_risk_idx)
-
-    # 4. Occasional Shoppers: Remaining cluster
-    occasional_idx = available_clusters.pop()
-    labels[occasional_idx] = 'Occasional Shoppers'
-
-    return labels
+# Analyze cluster characteristics
+cluster_summary = model.summary
+show("Cluster Summary", cluster_summary)
 
 # Apply labeling
-cluster_labels = label_clusters(cluster_summary)
-customer_data['Segment'] = customer_data['Cluster'].map(cluster_labels)  # Kept as 'Segment' to match first script
+cluster_labels = model.labels
+customer_data['Segment'] = segments  # Kept as 'Segment' to match first script
 
 # Print labeled cluster summary
-labeled_summary = cluster_summary.assign(label=cluster_labels.values())
-print("\nCluster Summary with Labels:\n", tabulate(labeled_summary, headers='keys', tablefmt='pretty', showindex=True))
+labeled_summary = cluster_summary.assign(label=cluster_summary.index.map(cluster_labels))
+show("Cluster Summary with Labels", labeled_summary)
 print("\nCustomer Count by Segment:\n", customer_data['Segment'].value_counts().to_string())
 
-# Step 8: Calculate Silhouette Score
-silhouette_avg = silhouette_score(scaled_features, customer_data['Cluster'])
-print(f"\nSilhouette Score: {silhouette_avg:.3f}")
-
-# Step 9: Visualize clusters in 2D using PCA with enhanced styling and custom colors
-cluster_colors = {
-    'Loyal Customers': '#4CAF50',    # Green
-    'Big Spenders': '#2196F3',       # Blue
-    'Occasional Shoppers': '#FF9800', # Orange
-    'At-Risk Customers': '#F44336'    # Red
-}
-
+# Silhouette Score (sampled once the customer base outgrows --silhouette-sample)
+print(f"\nSilhouette Score: {model.silhouette:.3f}")
+
+# Compact per-segment scatter data and cluster summary for PCAChart.jsx
+chart_path = os.path.join(output_dir, "customer_segments_chart.json")
+with open(chart_path, 'w', encoding='utf-8') as f:
+    json.dump(segmentation.chart_payload(customer_data, model, cluster_colors), f, separators=(',', ':'))
+print(f"✅ Segment chart data saved at: {chart_path}")
+
+# Visualize clusters in 2D using PCA with custom colors (report mode only)
+if args.report:
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    plt.figure(figsize=(10, 7))
+    sns.scatterplot(data=customer_data, x='PCA1', y='PCA2', hue='Segment', palette=cluster_colors, s=30, alpha=0.7)
+    plt.title('Customer Segments (PCA)')
+    plot_path = os.path.join(output_dir, "customer_segments.png")
+    plt.savefig(plot_path, dpi=120, bbox_inches='tight')
+    print(f"✅ Segment plot saved at: {plot_path}")
 
 # Save customer segmentation data
 customer_segments_path = os.path.join(output_dir, "customer_segments.csv")
 customer_data.to_csv(customer_segments_path, index=False)
-print(f"✅ Customer segmentation data saved at: {customer_segments_path}")
\ No newline at end of file
+print(f"✅ Customer segmentation data saved at: {customer_segments_path}")
@@ -0,0 +1,213 @@
+import re
+import hashlib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.feature_extraction.text import TfidfVectorizer
+from data_store import load_transactions, RAW_CSV_2030
+from taxonomy import assign_subcategories
+import model_registry
+
+# Precomputed top-k neighbour index for the product recommender. Similarities
+# are only computed within a product's sub_category, in row blocks of sparse
+# TF-IDF products, so no products x products matrix is ever materialised.
+
+INDEX_NAME = 'recommender'
+INDEX_VERSION = 1
+TOP_K = 20
+BLOCK_ROWS = 1024
+
+# Product-name resolution
+MAX_PREFIX = 12
+NGRAM = 3
+FUZZY_MIN_SCORE = 0.3
+AMBIGUITY_MARGIN = 0.15
+
+
+def top_k_neighbours(matrix, groups, k=TOP_K):
+    # matrix rows must be L2-normalised (TfidfVectorizer's default), so dot product == cosine
+    n = matrix.shape[0]
+    neighbours = np.full((n, k), -1, dtype=np.int32)
+    scores = np.zeros((n, k), dtype=np.float32)
+
+    codes, _ = pd.factorize(pd.Series(groups))
+    order = np.argsort(codes, kind='stable')
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(codes[codes >= 0]))])
+    order = order[(codes < 0).sum():]
+
+    for g in range(len(bounds) - 1):
+        members = order[bounds[g]:bounds[g + 1]]
+        kk = min(k, len(members) - 1)
+        if kk <= 0:
+            continue
+        group_matrix = matrix[members]
+        for start in range(0, len(members), BLOCK_ROWS):
+            block = np.arange(start, min(start + BLOCK_ROWS, len(members)))
+            sims = (group_matrix[block] @ group_matrix.T).toarray()
+            sims[np.arange(len(block)), block] = -np.inf  # never recommend the product itself
+
+            top = np.argpartition(-sims, kk - 1, axis=1)[:, :kk]
+            top_scores = np.take_along_axis(sims, top, axis=1)
+            # Highest score first, ties broken by catalogue position
+            rank = np.lexsort((top, -top_scores), axis=1)
+            neighbours[members[block], :kk] = members[np.take_along_axis(top, rank, axis=1)]
+            scores[members[block], :kk] = np.take_along_axis(top_scores, rank, axis=1)
+
+    return neighbours, scores
+
+
+class NeighbourIndex:
+    def __init__(self, neighbours, scores):
+        self.neighbours = neighbours
+        self.scores = scores
+
+    def lookup(self, idx, n=None):
+        row = self.neighbours[idx]
+        row = row[row >= 0]
+        return row if n is None else row[:n]
+
+    def lookup_many(self, indices, n=None, keys=None):
+        # One gather for a whole batch; neighbours whose key (e.g. lowercased
+        # name) equals the query product's key are dropped
+        indices = np.asarray(indices, dtype=np.intp)
+        rows = self.neighbours[indices]
+        valid = rows >= 0
+        if keys is not None:
+            valid &= keys[np.maximum(rows, 0)] != keys[indices][:, None]
+        return [row[mask][:n] for row, mask in zip(rows, valid)]
+
+
+def index_fingerprint(names, groups, k, params=''):
+    h = hashlib.sha256(f'{INDEX_VERSION}|{k}|{params}'.encode())
+    for name, group in zip(names, groups):
+        h.update(f'{name}\x1f{group}\x1e'.encode())
+    return h.hexdigest()
+
+
+def load_or_build_index(names, groups, build_matrix, k=TOP_K, params='', registry_dir=None):
+    # build_matrix is only called (and the vectorizer only fitted) when the index is stale.
+    # The stored arrays are memory-mapped, so worker processes share one copy.
+    def train():
+        neighbours, scores = top_k_neighbours(build_matrix(), groups, k)
+        return {'neighbours': neighbours, 'scores': scores}
+
+    arrays = model_registry.load_or_train(
+        INDEX_NAME, index_fingerprint(names, groups, k, params), train, registry_dir, mmap_mode='r'
+    )
+    return NeighbourIndex(arrays['neighbours'], arrays['scores'])
+
+
+def load_catalogue(source=RAW_CSV_2030):
+    # One row per (product_name, category), with its refined sub_category (rules live in taxonomy.py)
+    df = load_transactions(source, columns=['product_id', 'product_name', 'category'])
+    products = df.dropna().drop_duplicates(subset=['product_name', 'category']).reset_index(drop=True)
+    products['category'] = products['category'].astype(str)
+    products['sub_category'] = assign_subcategories(products['product_name'], products['category'])
+    return products
+
+
+def load_model(catalogue=None):
+    # TF-IDF over product names; the vectorizer is only fitted when the persisted index is stale
+    catalogue = load_catalogue() if catalogue is None else catalogue
+    vectorizer = TfidfVectorizer(stop_words='english')
+    return load_or_build_index(
+        catalogue['product_name'].tolist(), catalogue['sub_category'].tolist(),
+        lambda: vectorizer.fit_transform(catalogue['product_name']),
+        params=f'{sorted(vectorizer.get_params().items())}|{sklearn.__version__}'
+    )
+
+
+def normalize_name(text):
+    return ' '.join(re.sub(r'[^0-9a-z]+', ' ', str(text).casefold()).split())
+
+
+def char_ngrams(text, n=NGRAM):
+    padded = f' {text} '
+    return {padded[i:i + n] for i in range(max(len(padded) - n + 1, 1))}
+
+
+class Resolution:
+    def __init__(self, match_type, candidates, ambiguous=False):
+        self.match_type = match_type
+        self.candidates = candidates  # [(idx, score)], best first
+        self.ambiguous = ambiguous
+
+    @property
+    def best(self):
+        return self.candidates[0][0] if self.candidates and not self.ambiguous else None
+
+
+class ProductResolver:
+    # Resolves free-text queries to catalogue rows: exact normalised name, then
+    # token prefixes (every query token must prefix some name token), then
+    # character n-gram similarity. Lookups touch only the matching posting
+    # lists, never the whole catalogue.
+    def __init__(self, names):
+        self.names = list(names)
+        self.lengths = []
+        self.exact = {}
+        self.prefixes = {}
+        self.ngrams = {}
+        self.ngram_counts = []
+        for i, name in enumerate(self.names):
+            norm = normalize_name(name)
+            self.lengths.append(len(norm))
+            self.exact.setdefault(norm, []).append(i)
+            for token in norm.split():
+                for j in range(1, min(len(token), MAX_PREFIX) + 1):
+                    tokens = self.prefixes.setdefault(token[:j], {}).setdefault(i, [])
+                    tokens.append(token)
+            grams = char_ngrams(norm)
+            self.ngram_counts.append(len(grams))
+            for gram in grams:
+                self.ngrams.setdefault(gram, []).append(i)
+
+    def _rank(self, scores):
+        # Best score first, then shorter names, then catalogue order
+        return sorted(scores.items(), key=lambda item: (-item[1], self.lengths[item[0]], item[0]))
+
+    def _token_matches(self, tokens):
+        scores = None
+        for query_token in tokens:
+            matches = {}
+            for i, name_tokens in self.prefixes.get(query_token[:MAX_PREFIX], {}).items():
+                lengths = [len(token) for token in name_tokens if token.startswith(query_token)]
+                if lengths:
+                    matches[i] = len(query_token) / min(lengths)
+            if scores is None:
+                scores = matches
+            else:
+                scores = {i: scores[i] + score for i, score in matches.items() if i in scores}
+            if not scores:
+                return {}
+        return {i: score / len(tokens) for i, score in scores.items()}
+
+    def _fuzzy_matches(self, norm):
+        grams = char_ngrams(norm)
+        shared = {}
+        for gram in grams:
+            for i in self.ngrams.get(gram, ()):
+                shared[i] = shared.get(i, 0) + 1
+        # Dice coefficient over n-gram sets
+        return {
+            i: 2 * count / (len(grams) + self.ngram_counts[i]) for i, count in shared.items()
+            if 2 * count / (len(grams) + self.ngram_counts[i]) >= FUZZY_MIN_SCORE
+        }
+
+    def resolve(self, query, limit=5):
+        norm = normalize_name(query)
+        if not norm:
+            return Resolution(None, [])
+
+        if norm in self.exact:
+            return Resolution('exact', [(i, 1.0) for i in self.exact[norm]][:limit])
+
+        # Stages run lazily: the fuzzy scan only happens when no token match exists
+        stages = (('token', lambda: self._token_matches(norm.split())), ('fuzzy', lambda: self._fuzzy_matches(norm)))
+        for match_type, match in stages:
+            scores = match()
+            if scores:
+                ranked = self._rank(scores)[:limit]
+                ambiguous = len(ranked) > 1 and ranked[0][1] - ranked[1][1] < AMBIGUITY_MARGIN
+                return Resolution(match_type, ranked, ambiguous)
+        return Resolution(None, [])
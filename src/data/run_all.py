@@ -1,42 +1,310 @@
-import subprocess
 import os
+import ast
+import sys
+import json
+import time
+import hashlib
+import argparse
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from data_store import RAW_CSV, RAW_CSV_2030, CACHE_DIR, OUTPUT_DIR, store_paths
+from model_registry import MODELS, artifact_paths
+
+# Pipeline runner: batch stages declare the artifacts they read and write,
+# independent stages run concurrently (bounded), stages whose inputs hash the
+# same as last time are skipped, and the API services start only once the
+# artifacts they need exist.
+
+scripts_dir = os.path.dirname(os.path.abspath(__file__))
+STATE_FILE = os.path.join(CACHE_DIR, 'pipeline_state.json')
+
+
+def script(name):
+    return os.path.join(scripts_dir, name)
+
+
+def output(name):
+    return os.path.abspath(os.path.join(OUTPUT_DIR, name))
+
+
+STORE_2028 = store_paths(RAW_CSV)[0]
+STORE_2030 = store_paths(RAW_CSV_2030)[0]
+
+# Batch stages: name -> script (+ optional args), input artifacts, output artifacts.
+# 'parallel' stages take --workers, sized so they don't oversubscribe the CPUs
+# alongside the other stages the runner has in flight; 'imports' lists local
+# modules a stage loads dynamically (static imports are found automatically).
+STAGES = {
+    'data_store': {
+        'script': 'data_store.py',
+        'inputs': [RAW_CSV, RAW_CSV_2030],
+        'outputs': [STORE_2028, STORE_2030],
+    },
+    'batch_metrics': {
+        'script': 'batch_metrics.py',
+        'inputs': [STORE_2028],
+        'outputs': [
+            output('sales_profit_metrics.json'),
+            output('average_basket_size.json'),
+            output('product_conversion_rates.json'),
+            output('precomputed_sales_data_audi_2028.csv'),
+        ],
+    },
+    'low_conversion': {
+        'script': 'low_conversion.py',
+        'args': ['--skip-rates'],  # product_conversion_rates.json is owned by batch_metrics
+        'inputs': [STORE_2028],
+        'outputs': [output('low_conversion_by_city.json'), output('low_conversion_by_month.json')],
+    },
+    'pca': {
+        'script': 'pca.py',
+        'inputs': [STORE_2028],
+        'outputs': [output('customer_segments.csv'), output('customer_segments_chart.json')],
+    },
+    'recommendations': {
+        'script': 'ai_model.py',
+        'args': ['--export'],
+        'inputs': [STORE_2030],
+        'outputs': [output('product_recommendations.json')],
+    },
+    'frequent_itemsets': {
+        'script': 'basket.py',
+        'inputs': [STORE_2030],
+        'outputs': [output('frequent_itemsets.json')],
+    },
+    'sales_forecasts': {
+        'script': 'sales_forecast.py',
+        'parallel': True,
+        'inputs': [STORE_2028],
+        'outputs': [output('sales_forecasts_daily.csv')],
+    },
+    'models': {
+        'script': 'model_registry.py',
+        'args': ['train'],
+        'parallel': True,
+        'imports': list(MODELS.values()),
+        'inputs': [STORE_2028, STORE_2030],
+        'outputs': [artifact_paths(name)[1] for name in MODELS],
+    },
+}
+
+# Long-running API services: name -> script, artifacts required before start.
+# 'api' serves every blueprint from one preloaded multi-worker process on all
+# the legacy ports and 'async_api' does the same from an asyncio event loop;
+# they and the standalone services bind the same ports, so start only one kind.
+SERVICES = {
+    'api': {'script': 'api.py', 'requires': [STORE_2028, STORE_2030]},
+    'async_api': {'script': 'async_api.py', 'requires': [STORE_2028, STORE_2030]},
+    'ai_model': {'script': 'ai_model.py', 'requires': [STORE_2030]},
+    'clv': {'script': 'clv.py', 'requires': [STORE_2028]},
+    'filter_data': {'script': 'filter_data.py', 'requires': [STORE_2028]},
+    'forecast': {'script': 'forecast.py', 'requires': [STORE_2028]},
+    'geography': {'script': 'geography.py', 'requires': [STORE_2028]},
+    'customer_segments': {'script': 'customer_segments.py', 'requires': [STORE_2028]},
+}
+
+print_lock = threading.Lock()
+
+
+def log(message):
+    with print_lock:
+        print(message, flush=True)
+
+
+def file_hash(path, h=None):
+    h = h or hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h
+
+
+def local_modules(path, found=None):
+    # Local modules a script imports, followed transitively
+    found = set() if found is None else found
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), path)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            module = script(f"{name.split('.')[0]}.py")
+            if module not in found and os.path.exists(module):
+                found.add(module)
+                local_modules(module, found)
+    return found
+
+
+def stage_fingerprint(stage):
+    # Content hash of the stage's script, the local modules it imports and every input artifact
+    sources = {script(stage['script']), *(script(f'{name}.py') for name in stage.get('imports', []))}
+    for path in list(sources):
+        local_modules(path, sources)
+    h = hashlib.sha256()
+    for path in sorted(sources):
+        h.update(os.path.basename(path).encode())
+        file_hash(path, h)
+    h.update(' '.join(stage.get('args', [])).encode())
+    for path in stage['inputs']:
+        h.update(path.encode())
+        file_hash(path, h)
+    return h.hexdigest()
+
+
+def load_state():
+    try:
+        with open(STATE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = f'{STATE_FILE}.{os.getpid()}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(state, f, indent=4)
+    os.replace(tmp, STATE_FILE)
+
+
+def peak_rss_mb(rusage):
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return rusage.ru_maxrss / divisor
+
+
+def run_stage(name, stage, workers=1):
+    start = time.perf_counter()
+    args = [*stage.get('args', []), *(['--workers', str(workers)] if stage.get('parallel') else [])]
+    process = subprocess.Popen(
+        [sys.executable, '-u', script(stage['script']), *args],
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1,
+    )
+    # Stream output as it arrives instead of buffering until exit
+    for line in process.stdout:
+        log(f"[{name}] {line.rstrip()}")
+    process.stdout.close()
+
+    _, status, rusage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return process.returncode, time.perf_counter() - start, peak_rss_mb(rusage)
+
+
+def dependencies(stages):
+    # Every artifact has exactly one producing stage; ordering is derived from that
+    producers = {}
+    for name, stage in stages.items():
+        for path in stage['outputs']:
+            if producers.setdefault(path, name) != name:
+                raise ValueError(f"{path} is written by both {producers[path]} and {name}")
+    return {
+        name: {producers[path] for path in stage['inputs'] if path in producers and producers[path] != name}
+        for name, stage in stages.items()
+    }
+
+
+def run_pipeline(stages, workers, force=False):
+    state = load_state()
+    # Process pools inside parallel stages share the CPUs with the other running stages
+    stage_workers = max(1, (os.cpu_count() or 1) // workers)
+    deps = dependencies(stages)
+    pending = dict(stages)
+    done, failed, report = set(), set(), []
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        running = {}
+        while pending or running:
+            for name in [n for n in pending if deps[n] <= done | failed]:
+                stage = pending.pop(name)
+                if deps[name] & failed:
+                    log(f"⏭️ {name} skipped: upstream stage failed")
+                    failed.add(name)
+                    report.append((name, 'blocked', 0.0, 0.0))
+                    continue
+                missing = [path for path in stage['inputs'] if not os.path.exists(path)]
+                if missing:
+                    log(f"❌ {name} is missing inputs: {missing}")
+                    failed.add(name)
+                    report.append((name, 'missing inputs', 0.0, 0.0))
+                    continue
+                fingerprint = stage_fingerprint(stage)
+                outputs_exist = all(os.path.exists(path) for path in stage['outputs'])
+                if not force and outputs_exist and state.get(name) == fingerprint:
+                    log(f"⏭️ {name} unchanged, skipping")
+                    done.add(name)
+                    report.append((name, 'cached', 0.0, 0.0))
+                    continue
+                log(f"✅ Running {name} ...")
+                running[pool.submit(run_stage, name, stage, stage_workers)] = (name, fingerprint)
+
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, fingerprint = running.pop(future)
+                returncode, elapsed, rss = future.result()
+                if returncode == 0:
+                    done.add(name)
+                    state[name] = fingerprint
+                    save_state(state)
+                    report.append((name, 'ok', elapsed, rss))
+                else:
+                    failed.add(name)
+                    state.pop(name, None)
+                    report.append((name, f'exit {returncode}', elapsed, rss))
+
+    return report, failed
+
+
+def print_report(report):
+    log(f"\n{'stage':<16}{'status':<16}{'wall (s)':>10}{'peak RSS (MB)':>16}")
+    for name, status, elapsed, rss in report:
+        log(f"{name:<16}{status:<16}{elapsed:>10.2f}{rss:>16.1f}")
+
+
+def start_services(names):
+    processes = []
+    for name in names:
+        service = SERVICES[name]
+        missing = [path for path in service['requires'] if not os.path.exists(path)]
+        if missing:
+            log(f"❌ Not starting {name}: missing artifacts {missing}")
+            continue
+        log(f"🚀 Starting {name} ...")
+        processes.append((name, subprocess.Popen([sys.executable, script(service['script'])])))
+    return processes
+
+
+def wait_for_services(processes):
+    try:
+        for name, process in processes:
+            process.wait()
+            log(f"⚠️ {name} exited with code {process.returncode}")
+    except KeyboardInterrupt:
+        for name, process in processes:
+            process.terminate()
+        for name, process in processes:
+            process.wait()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the batch pipeline, then start the API services')
+    parser.add_argument('--workers', type=int, default=max(1, min(4, os.cpu_count() or 1)))
+    parser.add_argument('--force', action='store_true', help='rerun stages even if their inputs are unchanged')
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES))
+    parser.add_argument('--services', nargs='*', choices=list(SERVICES), default=['api'])
+    parser.add_argument('--no-services', action='store_true', help='only run the batch stages')
+    args = parser.parse_args()
+
+    report, failed = run_pipeline({name: STAGES[name] for name in args.stages}, args.workers, args.force)
+    print_report(report)
+    log("🎯 All batch stages have been processed.")
 
-# Define the correct scripts directory
-scripts_dir = "/Users/apple/Desktop/Blazebuilders/Deloitte_Round_3/react-app/src/data"
-
-# List of Python script filenames (without 'src/data/' prefix)
-files = [
-    "ai_model.py",
-    "average_basket_size.py",
-    "filter_data.py",
-    "fullsales.py",
-    "geography.py",
-    "pca.py",
-    "precompute_sales.py",
-    "clv.py",
-    "forecast.py",
-]
-
-# Run all scripts
-processes = []
-for file in files:
-    script_path = os.path.join(scripts_dir, file)
-
-    # Ensure the script exists before running it
-    if os.path.exists(script_path):
-        print(f"✅ Running {file} ...")
-        process = subprocess.Popen(["python3", script_path], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        processes.append((file, process))
-    else:
-        print(f"❌ Warning: {file} not found. Skipping.")
-
-# Wait for all processes to complete and capture output
-for file, process in processes:
-    stdout, stderr = process.communicate()
-
-    if process.returncode == 0:
-        print(f"✅ {file} executed successfully.")
-    else:
-        print(f"⚠️ {file} encountered an error:\n{stderr.decode()}")
-
-print("🎯 All scripts have been processed.")
\ No newline at end of file
+    if not args.no_services and args.services:
+        wait_for_services(start_services(args.services))
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,252 @@
+import os
+import time
+import argparse
+import warnings
+import numpy as np
+import pandas as pd
+import statsmodels
+import xgboost
+from concurrent.futures import ProcessPoolExecutor
+from scipy.stats import norm
+from statsmodels.tsa.arima.model import ARIMA
+from statsmodels.tsa.exponential_smoothing.ets import ETSModel
+from xgboost import XGBRegressor
+from sklearn.model_selection import train_test_split
+from data_store import load_transactions, RAW_CSV, OUTPUT_DIR
+from batch_metrics import SALES_YEARS
+import model_registry
+
+# Granular sales forecasting: the daily sales series (the same daily totals
+# precompute_sales.py writes) split per store, category or city, resampled to
+# daily or weekly buckets and fitted independently with additive ETS models.
+# Series are fitted in chunks across a process pool; every forecast carries a
+# prediction interval. The ARIMA + XGBoost residual hybrid behind the yearly
+# forecast lives here too, so it can be trained and backtested on any series.
+
+SERIES_DIMENSIONS = ['store_id', 'category', 'city']
+GRANULARITIES = {'daily': 'D', 'weekly': 'W-SUN'}
+SEASONAL_PERIODS = {'daily': 7, 'weekly': None}
+MAX_HORIZON = {'daily': 365, 'weekly': 104}
+DEFAULT_HORIZON = {'daily': 28, 'weekly': 12}
+DEFAULT_LEVEL = 0.95
+CHUNK_SIZE = 32
+
+# Hybrid model: ARIMA, then XGBoost on its residuals from two lag features
+ARIMA_ORDER = (3, 2, 2)
+XGB_PARAMS = {'n_estimators': 100, 'learning_rate': 0.1, 'objective': 'reg:squarederror'}
+LAG_FEATURES = ['Year_lag1', 'Year_lag2']
+
+# Registered model served by forecast.py: the yearly hybrid plus series
+# forecasts precomputed at training time (granularity -> horizon) for the
+# total and every store / category / city series at the default interval level
+MODEL_NAME = 'forecast'
+FORECAST_STEPS = 4
+PRECOMPUTED_HORIZONS = {'daily': 90, 'weekly': 26}
+
+
+def load_sales(source=RAW_CSV):
+    df = load_transactions(source, columns=['transaction_date', *SERIES_DIMENSIONS, 'total_sales_per_transaction'])
+    return df[df['transaction_date'].dt.year.isin(SALES_YEARS)]
+
+
+def build_series(df, dimension=None, granularity='daily'):
+    # Wide frame: one column per series key (or 'total'), one row per bucket, zero-filled
+    days = df['transaction_date'].to_numpy(dtype='datetime64[D]')
+    start, end = days.min(), days.max()
+    day_codes = (days - start).astype(np.int64)
+    n_days = int((end - start).astype(np.int64)) + 1
+
+    if dimension is None:
+        codes, keys = np.zeros(len(df), dtype=np.int64), ['total']
+    else:
+        codes, keys = pd.factorize(df[dimension].astype(str), sort=True)
+    sales = np.bincount(
+        day_codes * len(keys) + codes, weights=df['total_sales_per_transaction'].to_numpy(dtype=np.float64),
+        minlength=n_days * len(keys)
+    ).reshape(n_days, len(keys))
+    frame = pd.DataFrame(sales, index=pd.date_range(start, periods=n_days, freq='D'), columns=list(keys))
+
+    if granularity == 'weekly':
+        frame = frame.resample(GRANULARITIES['weekly']).sum()
+        # Drop a trailing partial week so it doesn't read as a sales drop
+        if frame.index[-1] > pd.Timestamp(end):
+            frame = frame.iloc[:-1]
+    return frame
+
+
+def fit_ets(values, granularity='daily'):
+    values = pd.Series(np.asarray(values, dtype=np.float64))
+    season = SEASONAL_PERIODS[granularity]
+    if not values.any() or len(values) < 2 * (season or 4):
+        raise ValueError('series too short or empty')
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        if season:
+            model = ETSModel(values, error='add', trend=None, seasonal='add', seasonal_periods=season)
+        else:
+            model = ETSModel(values, error='add', trend='add', damped_trend=True)
+        return model.fit(disp=False)
+
+
+def predict_ets(fit, horizon, level=DEFAULT_LEVEL):
+    n = fit.nobs
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        frame = fit.get_prediction(start=n, end=n + horizon - 1).summary_frame(alpha=1 - level)
+    return tuple(frame[col].to_numpy() for col in ['mean', 'pi_lower', 'pi_upper'])
+
+
+def fit_forecast(values, granularity='daily', horizon=None, level=DEFAULT_LEVEL):
+    # (mean, lower, upper) arrays for the next `horizon` buckets
+    horizon = horizon or DEFAULT_HORIZON[granularity]
+    values = pd.Series(np.asarray(values, dtype=np.float64))
+
+    try:
+        mean, lower, upper = predict_ets(fit_ets(values, granularity), horizon, level)
+    except Exception:
+        # Fallback for sparse or degenerate series: flat mean with a normal interval
+        spread = norm.ppf(0.5 + level / 2) * (values.std(ddof=0) if len(values) else 0.0)
+        mean = np.full(horizon, values.mean() if len(values) else 0.0)
+        lower, upper = mean - spread, mean + spread
+
+    # Sales are never negative
+    return np.maximum(mean, 0), np.maximum(lower, 0), np.maximum(upper, 0)
+
+
+def hybrid_features(sales, arima_fit):
+    # ARIMA residuals plus lag features for XGBoost
+    return pd.DataFrame({
+        'Residuals': sales - arima_fit.fittedvalues,
+        'Year_lag1': sales.shift(1),
+        'Year_lag2': sales.shift(2),
+    })
+
+
+def fit_hybrid(sales, order=ARIMA_ORDER, xgb_params=XGB_PARAMS):
+    # sales: pandas Series in time order; returns (arima_fit, xgb_model)
+    arima_fit = ARIMA(sales, order=order).fit()
+
+    df_xgb = hybrid_features(sales, arima_fit).dropna()
+    X_train, X_test, y_train, y_test = train_test_split(
+        df_xgb[LAG_FEATURES], df_xgb['Residuals'], test_size=0.2, shuffle=False
+    )
+    xgb_model = XGBRegressor(**xgb_params)
+    xgb_model.fit(X_train, y_train)
+    return arima_fit, xgb_model
+
+
+def hybrid_forecast(sales, arima_fit, xgb_model, steps):
+    # ARIMA forecast corrected by the predicted residuals; lags roll forward over the ARIMA forecast
+    arima_forecast = arima_fit.forecast(steps=steps)
+    history = np.r_[sales.iloc[-2:], arima_forecast]
+    future_xgb_data = pd.DataFrame({
+        'Year_lag1': history[1:1 + steps],
+        'Year_lag2': history[:steps]
+    })
+    xgb_forecast_residuals = xgb_model.predict(future_xgb_data)
+    return arima_forecast + xgb_forecast_residuals
+
+
+def load_yearly_sales(source=RAW_CSV):
+    df = load_transactions(source, columns=['transaction_date', 'total_sales_per_transaction'])
+    df = df[df['transaction_date'].dt.year >= 2021]
+    yearly_sales = df.groupby(df['transaction_date'].dt.year)['total_sales_per_transaction'].sum().reset_index()
+    yearly_sales.columns = ['Year', 'Total_Sales']
+    return yearly_sales
+
+
+def future_index(last, granularity, horizon):
+    return pd.date_range(last, periods=horizon + 1, freq=GRANULARITIES[granularity])[1:]
+
+
+def _fit_chunk(chunk, granularity, horizon, level):
+    return [(key, *fit_forecast(values, granularity, horizon, level)) for key, values in chunk]
+
+
+def forecast_all(df, dimensions=SERIES_DIMENSIONS, granularity='daily', horizon=None, level=DEFAULT_LEVEL, workers=1):
+    # Long frame: dimension, series, date, predicted_sales, lower, upper - one
+    # block of `horizon` rows for the total series and for every key of every dimension
+    horizon = horizon or DEFAULT_HORIZON[granularity]
+    items = []
+    for dimension in [None, *dimensions]:
+        series = build_series(df, dimension, granularity)
+        items += [((dimension or 'total', key), series[key].to_numpy()) for key in series.columns]
+    chunks = [items[i:i + CHUNK_SIZE] for i in range(0, len(items), CHUNK_SIZE)]
+
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = [row for rows in pool.map(
+                _fit_chunk, chunks, *([arg] * len(chunks) for arg in (granularity, horizon, level))
+            ) for row in rows]
+    else:
+        results = [row for chunk in chunks for row in _fit_chunk(chunk, granularity, horizon, level)]
+
+    dates = future_index(series.index[-1], granularity, horizon)
+    return pd.DataFrame({
+        'dimension': np.repeat([key[0] for key, *_ in results], horizon),
+        'series': np.repeat([key[1] for key, *_ in results], horizon),
+        'date': np.tile(dates, len(results)),
+        'predicted_sales': np.concatenate([mean for _, mean, _, _ in results]),
+        'lower': np.concatenate([lower for _, _, lower, _ in results]),
+        'upper': np.concatenate([upper for _, _, _, upper in results]),
+    })
+
+
+def precompute_series_forecasts(sales, workers=None):
+    # Every series is fitted independently, so they are spread over a process pool
+    workers = workers or os.cpu_count() or 1
+    frames = []
+    for granularity, horizon in PRECOMPUTED_HORIZONS.items():
+        frame = forecast_all(sales, granularity=granularity, horizon=horizon, workers=workers)
+        frame.insert(0, 'granularity', granularity)
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def train_models(yearly_sales, sales, workers=None):
+    # ARIMA on yearly totals, XGBoost on its residuals
+    arima_fit, xgb_model = fit_hybrid(yearly_sales['Total_Sales'])
+
+    # Forecasts only depend on the fitted models, so they are stored alongside them
+    return {
+        'arima_fit': arima_fit,
+        'xgb_model': xgb_model,
+        'yearly_forecast': hybrid_forecast(yearly_sales['Total_Sales'], arima_fit, xgb_model, FORECAST_STEPS),
+        'series_forecasts': precompute_series_forecasts(sales, workers),
+    }
+
+
+def model_fingerprint(yearly_sales, sales):
+    return model_registry.fingerprint(
+        yearly_sales, sales, ARIMA_ORDER, XGB_PARAMS, PRECOMPUTED_HORIZONS, DEFAULT_LEVEL,
+        statsmodels.__version__, xgboost.__version__
+    )
+
+
+def load_model(yearly_sales=None, sales=None, workers=None):
+    # Models and their forecasts are reused from the registry while the sales data and settings are unchanged
+    yearly_sales = load_yearly_sales() if yearly_sales is None else yearly_sales
+    sales = load_sales() if sales is None else sales
+    return model_registry.load_or_train(
+        MODEL_NAME, model_fingerprint(yearly_sales, sales), lambda: train_models(yearly_sales, sales, workers)
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Forecast sales per store, category and city')
+    parser.add_argument('--dimensions', nargs='*', choices=SERIES_DIMENSIONS, default=SERIES_DIMENSIONS)
+    parser.add_argument('--granularity', choices=list(GRANULARITIES), default='daily')
+    parser.add_argument('--horizon', type=int, help='buckets ahead (days or weeks)')
+    parser.add_argument('--level', type=float, default=DEFAULT_LEVEL, help='prediction interval coverage')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--output', help='CSV file (default: <output dir>/sales_forecasts_<granularity>.csv)')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    forecasts = forecast_all(load_sales(), args.dimensions, args.granularity, args.horizon, args.level, args.workers)
+    output = args.output or os.path.join(OUTPUT_DIR, f'sales_forecasts_{args.granularity}.csv')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    forecasts.to_csv(output, index=False, date_format='%Y-%m-%d')
+
+    n_series = forecasts[['dimension', 'series']].drop_duplicates().shape[0]
+    print(f"✅ {n_series} {args.granularity} forecasts saved to '{output}' in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,306 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+import sklearn
+from concurrent.futures import ProcessPoolExecutor
+from sklearn.preprocessing import StandardScaler
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.decomposition import PCA, IncrementalPCA
+from sklearn.metrics import silhouette_score, davies_bouldin_score, adjusted_rand_score
+from data_store import load_transactions, RAW_CSV
+import model_registry
+
+# Customer segmentation shared by the batch job (pca.py) and the assignment
+# API (customer_segments.py). The fitted scaler, PCA projection and centroids
+# are kept in the model registry, so new or updated customers are placed into
+# the existing segments without refitting.
+
+MODEL_NAME = 'segmentation'
+FEATURES = ['days_since_last_purchase', 'purchase_frequency', 'cumulative_spending', 'annual_income', 'days_since_signup']
+MODES = ['full', 'minibatch']
+DEFAULT_K = 4
+SEED = 42
+SILHOUETTE_SAMPLE = 10000
+BATCH_SIZE = 4096
+MINIBATCH_EPOCHS = 5
+
+# k sweep: candidates are scored on sampled silhouette (higher is better),
+# Davies-Bouldin (lower is better) and bootstrap stability (mean adjusted Rand
+# index between the clustering and refits on bootstrap resamples)
+K_RANGE = range(2, 9)
+SWEEP_SEEDS = [42, 7, 2024]
+BOOTSTRAP_ROUNDS = 5
+
+# Chart payload: segments up to MAX_CHART_POINTS customers are sent point by
+# point; larger ones are binned on a CHART_BINS x CHART_BINS grid
+MAX_CHART_POINTS = 2000
+CHART_BINS = 64
+CHART_DECIMALS = 3
+
+
+def customer_features(df):
+    # One row per customer: recency, frequency, spending, income and tenure.
+    # Features stay float64 (as read_csv produced them), so the store's int32
+    # columns don't change the written CSV or the fitted scaler
+    return df.groupby('customer_id', observed=True).agg({
+        'days_since_last_purchase': 'min',  # Most recent purchases
+        'purchase_frequency': 'mean',       # Number of transactions
+        'cumulative_spending': 'mean',      # Total spending
+        'annual_income': 'mean',            # Customer income
+        'days_since_signup': 'mean'         # Tenure
+    }).astype({feature: 'float64' for feature in FEATURES}).reset_index()
+
+
+def sampled_silhouette(X, clusters, sample_size=SILHOUETTE_SAMPLE, seed=SEED):
+    # Exact below sample_size; above it, an estimate on a random sample so cost stays O(sample_size²)
+    if len(set(clusters)) < 2:
+        return None
+    if len(X) <= sample_size:
+        return float(silhouette_score(X, clusters))
+    return float(silhouette_score(X, clusters, sample_size=sample_size, random_state=seed))
+
+
+def batches(n, batch_size=BATCH_SIZE):
+    return [slice(start, min(start + batch_size, n)) for start in range(0, n, batch_size)]
+
+
+class Segmentation:
+    def __init__(self, scaler, pca, centroids, labels=None, summary=None, silhouette=None):
+        self.scaler = scaler
+        self.pca = pca
+        self.centroids = np.asarray(centroids, dtype=np.float64)  # in scaled feature space
+        self.labels = labels or {}  # cluster -> segment name
+        self.summary = summary  # per-cluster feature means and counts at training time
+        self.silhouette = silhouette
+
+    @property
+    def k(self):
+        return len(self.centroids)
+
+    @classmethod
+    def fit(cls, features, k=DEFAULT_K, mode='full', seed=SEED, batch_size=BATCH_SIZE):
+        # Returns (model, cluster per row)
+        values = np.asarray(features, dtype=np.float64)
+        if mode == 'full':
+            scaler = StandardScaler()
+            X = scaler.fit_transform(values)
+            pca = PCA(n_components=2).fit(X)
+            kmeans = KMeans(n_clusters=k, random_state=seed, n_init=10)
+            clusters = kmeans.fit_predict(X)
+            return cls(scaler, pca, kmeans.cluster_centers_), clusters
+
+        # Streaming: every estimator only ever sees one batch of customers at a time
+        scaler, pca = StandardScaler(), IncrementalPCA(n_components=2)
+        parts = batches(len(values), batch_size)
+        for part in parts:
+            scaler.partial_fit(values[part])
+        for part in parts:
+            if part.stop - part.start >= 2:
+                pca.partial_fit(scaler.transform(values[part]))
+        kmeans = MiniBatchKMeans(n_clusters=k, random_state=seed, batch_size=batch_size, n_init=3)
+        rng = np.random.default_rng(seed)
+        for _ in range(MINIBATCH_EPOCHS):
+            for part in batches(len(values), max(batch_size, 3 * k)):
+                rows = np.arange(part.start, part.stop)
+                rows = rows if len(rows) >= k else rng.choice(len(values), k, replace=False)
+                kmeans.partial_fit(scaler.transform(values[rows]))
+        model = cls(scaler, pca, kmeans.cluster_centers_)
+        return model, model.predict(values)
+
+    def transform(self, features):
+        return self.scaler.transform(np.asarray(features, dtype=np.float64))
+
+    def predict(self, features, scaled=False):
+        # Nearest centroid per row, in batches so memory stays O(batch x k)
+        X = features if scaled else self.transform(features)
+        clusters = np.empty(len(X), dtype=np.int32)
+        centroid_norms = (self.centroids ** 2).sum(axis=1)
+        for part in batches(len(X)):
+            distances = centroid_norms - 2 * X[part] @ self.centroids.T
+            clusters[part] = distances.argmin(axis=1)
+        return clusters
+
+    def assign(self, features):
+        # (cluster, segment label, 2D PCA coordinates) for new or updated customers
+        X = self.transform(features)
+        clusters = self.predict(X, scaled=True)
+        segments = [self.labels.get(int(cluster)) for cluster in clusters]
+        return clusters, segments, self.pca.transform(X)
+
+
+def cluster_summary(customer_data, clusters):
+    return customer_data.assign(Cluster=clusters).groupby('Cluster').agg({
+        'days_since_last_purchase': 'mean',
+        'purchase_frequency': 'mean',
+        'cumulative_spending': 'mean',
+        'annual_income': 'mean',
+        'days_since_signup': 'mean',
+        'customer_id': 'count'
+    }).rename(columns={'customer_id': 'count'})
+
+
+def _z(summary, column):
+    values = summary[column]
+    spread = values.std(ddof=0)
+    return (values - values.mean()) / spread if spread else values * 0.0
+
+
+# Segment profiles in priority order: label -> score over the cluster summary.
+# Each label goes to the best-scoring cluster not yet labelled.
+SEGMENT_RULES = [
+    # High frequency, low recency
+    ('Loyal Customers', lambda s: s['purchase_frequency'] - s['days_since_last_purchase']),
+    # Highest cumulative spending
+    ('Big Spenders', lambda s: s['cumulative_spending']),
+    # High recency, low frequency
+    ('At-Risk Customers', lambda s: s['days_since_last_purchase'] - s['purchase_frequency']),
+    # Only used when k > 4
+    ('High-Income Prospects', lambda s: _z(s, 'annual_income') - _z(s, 'cumulative_spending')),
+    ('New Customers', lambda s: -_z(s, 'days_since_signup')),
+    ('Lapsed Big Spenders', lambda s: _z(s, 'days_since_last_purchase') + _z(s, 'cumulative_spending')),
+]
+DEFAULT_SEGMENT = 'Occasional Shoppers'
+
+
+# Assign predefined labels based on cluster characteristics, for any k: rules
+# are applied in order while more than one cluster is left, and the last
+# cluster is always the Occasional Shoppers (exactly the fixed k=4 labelling)
+def label_clusters(summary):
+    labels = {}
+    available_clusters = list(summary.index)
+
+    for label, score in SEGMENT_RULES:
+        if len(available_clusters) <= 1:
+            break
+        best = score(summary)[available_clusters].idxmax()
+        labels[best] = label
+        available_clusters.remove(best)
+
+    for i, cluster in enumerate(available_clusters):
+        labels[cluster] = DEFAULT_SEGMENT if i == 0 else f'{DEFAULT_SEGMENT} {i + 1}'
+    return labels
+
+
+def evaluate_candidate(X, k, seed, mode='full', silhouette_sample=SILHOUETTE_SAMPLE, bootstrap_rounds=BOOTSTRAP_ROUNDS):
+    # Scores for one (k, seed); X is the scaled feature matrix
+    start = time.perf_counter()
+    model, clusters = Segmentation.fit(X, k, mode, seed)
+    fit_seconds = time.perf_counter() - start
+
+    # Stability: refit on bootstrap resamples and compare the induced partitions of all customers
+    rng = np.random.default_rng(seed)
+    agreement = []
+    for _ in range(bootstrap_rounds):
+        sample = rng.choice(len(X), len(X), replace=True)
+        resampled, _ = Segmentation.fit(X[sample], k, mode, seed)
+        agreement.append(adjusted_rand_score(clusters, resampled.predict(X)))
+
+    return {
+        'k': k,
+        'seed': seed,
+        'silhouette': sampled_silhouette(X, clusters, silhouette_sample, seed),
+        'davies_bouldin': float(davies_bouldin_score(X, clusters)) if len(set(clusters)) > 1 else None,
+        'stability': float(np.mean(agreement)) if agreement else None,
+        'fit_seconds': fit_seconds,
+    }
+
+
+def sweep(customer_data, k_values=K_RANGE, seeds=SWEEP_SEEDS, mode='full', workers=None,
+          silhouette_sample=SILHOUETTE_SAMPLE, bootstrap_rounds=BOOTSTRAP_ROUNDS):
+    # Every (k, seed) candidate in its own worker process; one row per candidate
+    X = StandardScaler().fit_transform(customer_data[FEATURES].to_numpy(dtype=np.float64))
+    candidates = [(k, seed) for k in k_values for seed in seeds if k < len(X)]
+    workers = workers or os.cpu_count() or 1
+
+    args = [[X] * len(candidates), *zip(*candidates), *([value] * len(candidates) for value in (mode, silhouette_sample, bootstrap_rounds))]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(evaluate_candidate, *args))
+    else:
+        results = list(map(evaluate_candidate, *args))
+    return pd.DataFrame(results)
+
+
+def choose_k(results):
+    # Average each metric over seeds, min-max normalise across k and add them up
+    # (Davies-Bouldin inverted); ties go to the smaller k. Returns (k, seed, per-k table).
+    per_k = results.groupby('k')[['silhouette', 'davies_bouldin', 'stability']].mean()
+
+    def normalised(values):
+        spread = values.max() - values.min()
+        return (values - values.min()) / spread if spread else values * 0.0
+
+    per_k['score'] = normalised(per_k['silhouette']) + (1 - normalised(per_k['davies_bouldin'])) + normalised(per_k['stability'])
+    best_k = int(per_k['score'].idxmax())
+    candidates = results[results['k'] == best_k]
+    best_seed = int(candidates.loc[candidates['silhouette'].idxmax(), 'seed'])
+    return best_k, best_seed, per_k
+
+
+def train(customer_data, k=DEFAULT_K, mode='full', seed=SEED, silhouette_sample=SILHOUETTE_SAMPLE):
+    model, clusters = Segmentation.fit(customer_data[FEATURES], k, mode, seed)
+    summary = cluster_summary(customer_data, clusters)
+    model.labels = {int(cluster): label for cluster, label in label_clusters(summary).items()}
+    model.summary = summary
+    model.silhouette = sampled_silhouette(model.transform(customer_data[FEATURES]), clusters, silhouette_sample, seed)
+    return model
+
+
+def load_or_train(customer_data, k=DEFAULT_K, mode='full', seed=SEED, silhouette_sample=SILHOUETTE_SAMPLE):
+    fingerprint = model_registry.fingerprint(
+        customer_data[['customer_id', *FEATURES]], k, mode, seed, silhouette_sample, sklearn.__version__
+    )
+    return model_registry.load_or_train(
+        MODEL_NAME, fingerprint, lambda: train(customer_data, k, mode, seed, silhouette_sample)
+    )
+
+
+def load_customer_data(source=RAW_CSV):
+    return customer_features(load_transactions(source, columns=['customer_id', *FEATURES])).dropna().reset_index(drop=True)
+
+
+def load_model(customer_data=None):
+    # Default-k segmentation, as pca.py trains it without arguments
+    return load_or_train(load_customer_data() if customer_data is None else customer_data)
+
+
+def chart_payload(customer_data, model, colors=None, max_points=MAX_CHART_POINTS, bins=CHART_BINS):
+    # Columnar scatter data per segment plus the cluster summary, sized for the dashboard chart.
+    # customer_data needs customer_id, PCA1, PCA2, Cluster and Segment columns.
+    colors = colors or {}
+    x_all, y_all = customer_data['PCA1'].to_numpy(), customer_data['PCA2'].to_numpy()
+    x_edges = np.linspace(x_all.min(), x_all.max(), bins + 1)
+    y_edges = np.linspace(y_all.min(), y_all.max(), bins + 1)
+
+    segments = []
+    for (cluster, segment), rows in customer_data.groupby(['Cluster', 'Segment'], sort=True):
+        entry = {'segment': segment, 'cluster': int(cluster), 'color': colors.get(segment), 'count': len(rows)}
+        x, y = rows['PCA1'].to_numpy(), rows['PCA2'].to_numpy()
+        if len(rows) <= max_points:
+            entry.update({
+                'binned': False,
+                'customer_id': rows['customer_id'].astype(str).tolist(),
+                'x': np.round(x, CHART_DECIMALS).tolist(),
+                'y': np.round(y, CHART_DECIMALS).tolist(),
+            })
+        else:
+            # One point per occupied cell, at the mean position of its customers, weighted by count
+            cells = np.clip(np.digitize(x, x_edges[1:-1]), 0, bins - 1) * bins + np.clip(np.digitize(y, y_edges[1:-1]), 0, bins - 1)
+            occupied, inverse, counts = np.unique(cells, return_inverse=True, return_counts=True)
+            entry.update({
+                'binned': True,
+                'x': np.round(np.bincount(inverse, weights=x) / counts, CHART_DECIMALS).tolist(),
+                'y': np.round(np.bincount(inverse, weights=y) / counts, CHART_DECIMALS).tolist(),
+                'weight': counts.tolist(),
+            })
+        segments.append(entry)
+
+    summary = model.summary.reset_index().rename(columns={'Cluster': 'cluster'})
+    summary.insert(1, 'segment', summary['cluster'].map(model.labels))
+    return {
+        'k': model.k,
+        'silhouette': model.silhouette,
+        'segments': segments,
+        'summary': summary.to_dict(orient='list'),
+    }
@@ -0,0 +1,71 @@
+import re
+import numpy as np
+import pandas as pd
+
+# Product taxonomy shared by the recommender and any module that needs
+# sub-categories. Refinement rules are compiled once into a single regex per
+# category and applied to the distinct (product_name, category) pairs with
+# vectorised string extraction.
+
+# Category refinement: category -> sub_category -> keywords (case-insensitive substrings)
+CATEGORY_REFINEMENT = {
+    "Electronics": {
+        "Headphones": ["boAt", "JBL", "Sony", "Bose"],
+        "Televisions": ["TV", "LED", "Smart TV", "OLED"],
+        "Speakers": ["Speaker", "Soundbar", "Bluetooth Speaker"]
+    },
+    "Appliances": {
+        "Kitchen Appliances": ["Microwave", "Blender", "Toaster"],
+        "Home Appliances": ["Washing Machine", "Refrigerator", "Air Conditioner"]
+    }
+}
+
+
+def compile_category(sub_categories):
+    # One alternative per sub_category, each a lookahead over the whole name.
+    # Alternatives are tried in order at position 0, so the first sub_category
+    # with any matching keyword wins - the same priority as the rule table.
+    rules = [(sub_category, keywords) for sub_category, keywords in sub_categories.items() if keywords]
+    alternatives = [
+        f"(?=.*?(?:{'|'.join(re.escape(keyword) for keyword in keywords)}))(?P<s{i}>)"
+        for i, (_, keywords) in enumerate(rules)
+    ]
+    pattern = re.compile(f"^(?:{'|'.join(alternatives)})", re.IGNORECASE | re.DOTALL)
+    return pattern, np.array([sub_category for sub_category, _ in rules], dtype=object)
+
+
+class TaxonomyRules:
+    def __init__(self, refinement=CATEGORY_REFINEMENT):
+        self.refinement = refinement
+        self.patterns = {
+            category: compile_category(sub_categories)
+            for category, sub_categories in refinement.items()
+            if any(sub_categories.values())
+        }
+
+    def assign(self, product_names, categories):
+        # Sub-category per row; rows without a matching rule keep their category
+        names = pd.Series(product_names).astype(str).reset_index(drop=True)
+        cats = pd.Series(categories).astype(str).reset_index(drop=True)
+
+        codes, uniques = pd.factorize(pd.MultiIndex.from_arrays([names, cats]))
+        unique_names = pd.Series(uniques.get_level_values(0))
+        unique_cats = uniques.get_level_values(1)
+        labels = np.asarray(unique_cats, dtype=object).copy()
+
+        for category, (pattern, sub_categories) in self.patterns.items():
+            rows = np.flatnonzero(unique_cats == category)
+            if not len(rows):
+                continue
+            matched = unique_names.iloc[rows].str.extract(pattern).notna().to_numpy()
+            has_match = matched.any(axis=1)
+            labels[rows[has_match]] = sub_categories[matched.argmax(axis=1)[has_match]]
+
+        return pd.Series(labels[codes], index=pd.Series(product_names).index, name='sub_category')
+
+
+default_rules = TaxonomyRules()
+
+
+def assign_subcategories(product_names, categories, rules=None):
+    return (rules or default_rules).assign(product_names, categories)
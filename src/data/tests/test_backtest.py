@@ -0,0 +1,14 @@
+import numpy as np
+import backtest
+
+
+def test_short_yearly_history_is_skipped_not_failed():
+    folds = [
+        backtest.run_fold('yearly', model, np.array([90.0, 95.0, 101.0, 104.0]), 3, 1, 1)
+        for model in backtest.FREQUENCIES['yearly']['models']
+    ]
+    summary = {row['model']: row for row in backtest.summarise(folds)}
+    assert summary['naive']['folds'] == 1
+    for model in ['arima', 'xgb_hybrid']:
+        assert summary[model] == {'frequency': 'yearly', 'model': model, 'folds': 0, 'failed': 0, 'skipped': 1}
+    assert all('error' not in fold for fold in folds)
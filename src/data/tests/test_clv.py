@@ -0,0 +1,76 @@
+import json
+import numpy as np
+import pytest
+import clv
+from cltv_engine import CLTVEngine, MIN_DROPOUT_PARAM
+
+
+def strict_json(body):
+    # json.loads accepts NaN/Infinity by default; a real JSON parser does not
+    def reject(constant):
+        raise ValueError(f'non-finite JSON constant: {constant}')
+    return json.loads(body, parse_constant=reject)
+
+
+@pytest.fixture(scope='module')
+def client():
+    return clv.app.test_client()
+
+
+@pytest.mark.parametrize('query', [
+    'model=bgnbd&days=365',
+    'model=bgnbd&days=730',
+    'model=bgnbd&days=730&discount_rate=0.1',
+    'model=bgnbd&days=365&format=columnar',
+    'model=bgnbd&days=365&customer_id=CUST00052',
+])
+def test_future_cltv_bgnbd_is_strict_json(client, query):
+    response = client.get(f'/api/future_cltv?{query}')
+    assert response.status_code == 200
+    body = strict_json(response.data)
+    assert 'purchase_freq' not in body and 'lifespan' not in body
+
+
+def test_future_cltv_simple_keeps_its_meta(client):
+    body = strict_json(client.get('/api/future_cltv?days=365&top=5').data)
+    assert {'purchase_freq', 'lifespan'} <= set(body)
+
+
+@pytest.mark.parametrize('discount_rate', [0, 0.1])
+def test_cltv_horizons_is_strict_json(client, discount_rate):
+    query = f'horizons=30,365,730,{clv.MAX_DAYS}&discount_rate={discount_rate}&per_page={clv.MAX_PER_PAGE}'
+    body = strict_json(client.get(f'/api/cltv_horizons?{query}').data)
+    assert len(body['customer_id']) == min(len(clv.customer_ids), clv.MAX_PER_PAGE)
+    assert all(value is not None for row in body['expected_purchases'] for value in row)
+
+
+@pytest.mark.parametrize('path', [
+    '/api/future_cltv?model=bgnbd&days=100000000&discount_rate=0.1',
+    '/api/future_cltv?days=100000000',
+    '/api/cltv_horizons?horizons=30,100000000&discount_rate=0.1',
+])
+def test_horizons_beyond_max_days_are_rejected(client, path):
+    response = client.get(path)
+    assert response.status_code == 400
+    assert str(clv.MAX_DAYS) in strict_json(response.data)['error']
+
+
+def test_discounted_cltv_at_max_days(client):
+    body = strict_json(client.get(f'/api/future_cltv?model=bgnbd&days={clv.MAX_DAYS}&discount_rate=0.1').data)
+    assert body['data']
+
+
+def test_expected_purchases_finite_for_degenerate_fit():
+    # a, b -> 0 means nobody drops out; one-time buyers then follow the NBD limit r * t / (alpha + T)
+    params = {'r': 1.96, 'alpha': 422.0, 'a': 2e-18, 'b': 7e-8}
+    engine = CLTVEngine(clv.summary, params, clv.cltv_engine.gamma_gamma_params)
+    one_time = engine.frequency == 0
+    for t in [30, 365, 730, 3650]:
+        purchases = engine.expected_purchases(t)
+        assert np.isfinite(purchases).all()
+        limit = params['r'] * t / (params['alpha'] + engine.T[one_time])
+        np.testing.assert_allclose(purchases[one_time], limit, rtol=1e-9)
+
+
+def test_fitted_dropout_params_are_bounded():
+    assert min(clv.cltv_engine.bgnbd_params['a'], clv.cltv_engine.bgnbd_params['b']) >= MIN_DROPOUT_PARAM * (1 - 1e-9)
@@ -0,0 +1,34 @@
+import pandas as pd
+from conversion_cube import ConversionCube, LOW_CONVERSION
+
+
+def small_cube():
+    # P2 sells in Pune but is never bought in Agra
+    rows = [
+        ('C1', 'P1', 'Agra'), ('C2', 'P1', 'Agra'), ('C3', 'P1', 'Pune'),
+        ('C3', 'P2', 'Pune'), ('C4', 'P2', 'Pune'),
+    ]
+    df = pd.DataFrame(rows, columns=['customer_id', 'product_id', 'city'])
+    df['product_name'] = df['product_id'] + ' name'
+    df['category'] = 'Grocery'
+    df['store_type'] = 'Online'
+    df['loyalty_status'] = 'Gold'
+    df['transaction_date'] = pd.Timestamp('2024-01-15')
+    return ConversionCube.build(df)
+
+
+def test_rates_cover_every_product_and_slice():
+    rates = small_cube().rates(['city']).set_index(['product_id', 'city'])
+    assert len(rates) == 4
+    never_bought = rates.loc[('P2', 'Agra')]
+    assert never_bought['customers'] == 0
+    assert never_bought['slice_customers'] == 2
+    assert never_bought['conversion_rate'] == 0
+
+
+def test_never_bought_product_is_a_low_converter():
+    low = small_cube().low_converters(['city'])
+    agra = low[(low['city'] == 'Agra') & (low['product_id'] == 'P2')]
+    assert len(agra) == 1
+    assert agra['conversion_rate'].iat[0] == 0
+    assert agra['conversion_category'].iat[0] == LOW_CONVERSION
@@ -0,0 +1,16 @@
+import numpy as np
+import pandas as pd
+import data_store
+
+
+def test_fractional_measures_round_trip_exactly():
+    raw = pd.read_csv(data_store.RAW_CSV, usecols=['transaction_date', 'average_order_value', 'cumulative_cost'])
+    raw = raw.dropna(subset=['transaction_date']).reset_index(drop=True)
+    stored = data_store.load_transactions(columns=['average_order_value', 'cumulative_cost'])
+    for col in stored.columns:
+        assert stored[col].dtype == np.float64
+        np.testing.assert_array_equal(stored[col].to_numpy(), raw[col].to_numpy(dtype=np.float64))
+
+
+def test_whole_number_columns_stay_int32():
+    assert data_store.load_transactions(columns=['quantity'])['quantity'].dtype == np.int32
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+import pytest
+import sales_forecast
+
+
+@pytest.fixture(scope='module')
+def fitted():
+    rng = np.random.default_rng(0)
+    sales = pd.Series(1000 + np.arange(30) * 25 + rng.normal(0, 40, 30))
+    return (sales, *sales_forecast.fit_hybrid(sales))
+
+
+@pytest.mark.parametrize('steps', [1, 2, 5])
+def test_hybrid_forecast_any_horizon(fitted, steps):
+    sales, arima_fit, xgb_model = fitted
+    forecast = np.asarray(sales_forecast.hybrid_forecast(sales, arima_fit, xgb_model, steps))
+    assert forecast.shape == (steps,)
+    assert np.isfinite(forecast).all()
+
+
+def test_hybrid_forecast_prefix_is_stable(fitted):
+    # Lags only depend on earlier steps, so a longer horizon extends a shorter one
+    sales, arima_fit, xgb_model = fitted
+    short = np.asarray(sales_forecast.hybrid_forecast(sales, arima_fit, xgb_model, 2))
+    long = np.asarray(sales_forecast.hybrid_forecast(sales, arima_fit, xgb_model, 5))
+    np.testing.assert_allclose(long[:2], short, rtol=1e-6)